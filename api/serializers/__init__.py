@@ -1,7 +1,11 @@
 from .graph import GraphSerializer, \
     GraphLevelsUpdateSerializer, \
+    GraphOperationsSerializer, \
+    GraphRestoreVersionSerializer, \
+    GraphVersionSerializer, \
     GraphMetadataUpdateSerializer, \
-    GraphTitleUpdateSerializer
+    GraphTitleUpdateSerializer, \
+    GraphNodeSerializer
 from .note_and_node import NoteWithoutGraphInfoSerializer, \
     NoteSerializer, \
     NodesNotesRelationSerializer, \
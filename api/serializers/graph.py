@@ -1,19 +1,22 @@
+from django.core.exceptions import ValidationError
+from django.db import transaction
 from rest_framework import serializers
 
 from api.serializers.note_and_node import NodeMetadataUpdateSerializer
-from core.models import Graph
+from core.graph_operations import OPERATION_FIELDS, EDITABLE_ATTRS, GraphOperationError
+from core.models import Graph, GraphNode, GraphVersion, NodesNotesRelation
 
 
 class GraphSerializer(serializers.ModelSerializer):
     raw_data = serializers.CharField(allow_null=False, allow_blank=False, source='data', read_only=True)
 
-    levels = serializers.JSONField(read_only=True, source='dot_to_json_levels')
-    nodes_metadata = serializers.JSONField(read_only=True, source='get_nodes_metadata_json')
+    levels = serializers.JSONField(read_only=True)
+    nodes_metadata = serializers.JSONField(read_only=True)
 
     class Meta:
         model = Graph
         lookup_field = 'graph_id'
-        fields = ['graph_id', 'title', 'rsrch_id', 'raw_data', 'levels', 'nodes_metadata']
+        fields = ['graph_id', 'title', 'rsrch_id', 'revision', 'raw_data', 'levels', 'nodes_metadata']
         extra_kwargs = {
             'graph_id': {
                 'read_only': True,
@@ -22,7 +25,7 @@ class GraphSerializer(serializers.ModelSerializer):
 
 
 class GraphLevelsUpdateSerializer(serializers.ModelSerializer):
-    levels = serializers.JSONField(allow_null=False, source='dot_to_json_levels')
+    levels = serializers.JSONField(allow_null=False)
 
     def update(self, instance, validated_data):
         if 'levels' in validated_data:
@@ -41,6 +44,133 @@ class GraphLevelsUpdateSerializer(serializers.ModelSerializer):
         }
 
 
+class GraphOperationSerializer(serializers.Serializer):
+    op = serializers.ChoiceField(choices=list(OPERATION_FIELDS))
+    node_id = serializers.CharField(required=False, allow_blank=False)
+    src = serializers.CharField(required=False, allow_blank=False)
+    dst = serializers.CharField(required=False, allow_blank=False)
+    key = serializers.ChoiceField(choices=EDITABLE_ATTRS, required=False)
+    value = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+    attrs = serializers.DictField(child=serializers.CharField(allow_blank=True), required=False)
+
+    def validate(self, attrs):
+        missing = [field for field in OPERATION_FIELDS[attrs['op']] if field not in attrs]
+        if missing:
+            raise serializers.ValidationError(f"{attrs['op']} requires fields: {', '.join(missing)}")
+        return attrs
+
+
+class GraphOperationsSerializer(serializers.ModelSerializer):
+    operations = GraphOperationSerializer(many=True, allow_empty=False, write_only=True)
+
+    levels = serializers.JSONField(read_only=True)
+    nodes_metadata = serializers.JSONField(read_only=True)
+
+    def update(self, instance, validated_data):
+        with transaction.atomic():
+            old_metadata = instance._get_nodes_metadata_dict()
+            try:
+                removed_nodes = instance.apply_operations(validated_data['operations'])
+            except GraphOperationError as e:
+                raise serializers.ValidationError({'operations': [str(e)]})
+
+            if removed_nodes and \
+                    NodesNotesRelation.objects.filter(graph_id=instance, node_id__in=removed_nodes).exists():
+                raise serializers.ValidationError({'operations': ['notes are attached to the removed nodes']})
+
+            self._validate_subgraphs(instance, old_metadata)
+
+            try:
+                instance.save()
+            except ValidationError as e:
+                raise serializers.ValidationError(e.message_dict)
+
+        return instance
+
+    @staticmethod
+    def _validate_subgraphs(instance: Graph, old_metadata: dict):
+        """
+        Узлы, которым операциями назначили подграф, проверяются так же, как при изменении метаданных узла
+        (см. NodeMetadataUpdateSerializer и Graph.rewrite_node_metadata)
+        """
+        subgraphs = dict()
+        for node_id, attrs in instance._get_nodes_metadata_dict().items():
+            if attrs['subgraph'] and attrs['subgraph'] != old_metadata.get(node_id, {}).get('subgraph', 0):
+                subgraphs[node_id] = attrs['subgraph']
+        if not subgraphs:
+            return
+
+        graph_ids = set(subgraphs.values())
+        if instance.graph_id in graph_ids:
+            raise serializers.ValidationError({'operations': ['graph cannot be a subgraph of itself']})
+        if Graph.objects.filter(graph_id__in=graph_ids).count() != len(graph_ids):
+            raise serializers.ValidationError({'operations': ['there is no graph with such id']})
+
+        # нельзя переопределить узел как подграф, пока к нему привязаны заметки
+        new_subgraphs = [node_id for node_id in subgraphs if not old_metadata.get(node_id, {}).get('subgraph', 0)]
+        if new_subgraphs and \
+                NodesNotesRelation.objects.filter(graph_id=instance, node_id__in=new_subgraphs).exists():
+            raise serializers.ValidationError({'operations': ['notes are attached to the nodes made subgraphs']})
+
+    class Meta:
+        model = Graph
+        lookup_field = 'graph_id'
+        fields = ['graph_id', 'operations', 'levels', 'nodes_metadata']
+        extra_kwargs = {
+            'graph_id': {
+                'read_only': True,
+            },
+        }
+
+
+class GraphRestoreVersionSerializer(serializers.ModelSerializer):
+    restore_version = serializers.IntegerField(min_value=1, write_only=True)
+
+    levels = serializers.JSONField(read_only=True)
+    nodes_metadata = serializers.JSONField(read_only=True)
+
+    def update(self, instance, validated_data):
+        # восстановленное состояние записывается как новая версия, история не переписывается
+        try:
+            data = GraphVersion.get_data(instance.graph_id, validated_data['restore_version'])
+        except GraphVersion.DoesNotExist:
+            raise serializers.ValidationError({'restore_version': ['version does not exist']})
+
+        with transaction.atomic():
+            old_node_ids = set(instance.nodes_metadata)
+            instance.data = data
+            removed_nodes = old_node_ids - set(instance._get_nodes_dict())
+            if removed_nodes and \
+                    NodesNotesRelation.objects.filter(graph_id=instance, node_id__in=removed_nodes).exists():
+                raise serializers.ValidationError({'restore_version': ['notes are attached to the removed nodes']})
+
+            try:
+                instance.save()
+            except ValidationError as e:
+                raise serializers.ValidationError(e.message_dict)
+
+        return instance
+
+    class Meta:
+        model = Graph
+        lookup_field = 'graph_id'
+        fields = ['graph_id', 'restore_version', 'levels', 'nodes_metadata']
+        extra_kwargs = {
+            'graph_id': {
+                'read_only': True,
+            },
+        }
+
+
+class GraphVersionSerializer(serializers.ModelSerializer):
+    is_snapshot = serializers.BooleanField(read_only=True)
+
+    class Meta:
+        model = GraphVersion
+        fields = ['version', 'created_at', 'is_snapshot', 'delta']
+        read_only_fields = fields
+
+
 class GraphMetadataUpdateSerializer(serializers.ModelSerializer):
     node_metadata = NodeMetadataUpdateSerializer()
     node_id = serializers.CharField(allow_null=False, allow_blank=False)
@@ -85,3 +215,13 @@ class GraphTitleUpdateSerializer(serializers.ModelSerializer):
                 'read_only': True,
             },
         }
+
+
+class GraphNodeSerializer(serializers.ModelSerializer):
+    graph_id = serializers.IntegerField(source='graph.graph_id', read_only=True)
+    graph_title = serializers.CharField(source='graph.title', read_only=True)
+
+    class Meta:
+        model = GraphNode
+        fields = ['graph_id', 'graph_title', 'node_id', 'title', 'subgraph']
+        read_only_fields = fields
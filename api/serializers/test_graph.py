@@ -0,0 +1,45 @@
+import datetime
+
+from django.test import TestCase
+from rest_framework.exceptions import ValidationError
+
+from core.models import Graph, NodesNotesRelation, Note, Research, User
+from .graph import GraphOperationsSerializer
+
+
+class TestGraphOperationsSerializer_subgraphs(TestCase):
+    def setUp(self):
+        today = datetime.date.today()
+        research = Research.objects.create(rsrch_id='1', title='research', start_date=today, end_date=today)
+        self.graph = Graph(data='digraph{A;1;2;B;A->1;1->2;2->B;}', title='graph', rsrch_id=research)
+        self.graph.save()
+        self.other = Graph(title='other', rsrch_id=research)
+        self.other.save()
+
+        user = User.objects.create(username='user')
+        note = Note.objects.create(url='https://gitlab.example.com/note.tex', rsrch_id=research, user_id=user)
+        NodesNotesRelation.objects.create(node_id='1', note_id=note, graph_id=self.graph)
+
+    def _set_subgraph(self, node_id: str, value) -> Graph:
+        graph = Graph.objects.get(pk=self.graph.pk)
+        serializer = GraphOperationsSerializer(graph, data={'operations': [
+            {'op': 'set_attr', 'node_id': node_id, 'key': 'subgraph', 'value': str(value)},
+        ]})
+        serializer.is_valid(raise_exception=True)
+        return serializer.save()
+
+    def test_ok(self):
+        graph = self._set_subgraph('2', self.other.pk)
+        self.assertEqual(graph.nodes_metadata['2']['subgraph'], self.other.pk)
+
+    def test_rejected(self):
+        cases = [
+            ('1', self.other.pk, 'notes are attached'),
+            ('2', self.other.pk + 100, 'there is no graph'),
+            ('2', self.graph.pk, 'subgraph of itself'),
+        ]
+        for node_id, value, message in cases:
+            with self.assertRaises(ValidationError, msg=message) as cm:
+                self._set_subgraph(node_id, value)
+            self.assertIn(message, str(cm.exception.detail['operations'][0]))
+        self.assertEqual(Graph.objects.get(pk=self.graph.pk).revision, 1)
@@ -35,13 +35,29 @@ urlpatterns = [
 
     path('graph/<int:graph_id>/node/<int:node_id>/', views.NodeDetail.as_view(),
          name='GET - просмотр информации об узле графа'),
+    path('graph/<int:graph_id>/node/<str:node_id>/ancestors/',
+         views.GraphNodeReachability.as_view(direction='ancestors'),
+         name='GET - все узлы графа, из которых есть путь в узел'),
+    path('graph/<int:graph_id>/node/<str:node_id>/descendants/',
+         views.GraphNodeReachability.as_view(direction='descendants'),
+         name='GET - все узлы графа, в которые есть путь из узла'),
+    path('graph/<int:graph_id>/path/', views.GraphNodePath.as_view(),
+         name='GET - есть ли путь между узлами ?src= и ?dst= и какие узлы на нем лежат'),
     path('graph/<int:graph_id>/', views.GraphDetail.as_view(),
-         name='GET - показ информации о графе по его айди, DELETE - удаление графа, PATCH - обновление информации в графе'),
+         name='GET - показ информации о графе по его айди (?version=N - в одной из прежних версий), DELETE - удаление графа, PATCH - обновление информации в графе'),
     # TODO обязательно запиши что отсюда нельзя поменять набор заметок
+    path('graph/<int:graph_id>/subgraphs/', views.GraphSubgraphs.as_view(),
+         name='GET - графы, в которые встроен граф, и подграфы, на которые ссылаются его узлы'),
+    path('graph/<int:graph_id>/versions/', views.GraphVersionList.as_view(),
+         name='GET - история версий графа, содержимое версии - GET graph/<айди>/?version=N'),
+    path('graph/<int:graph_id>/render.<str:fmt>', views.GraphRender.as_view(),
+         name='GET - изображение графа в формате svg или png'),
 
-    path('graph/', views.CreateGraph.as_view(),
-         name='POST - создание графа'),
+    path('graph/', views.GraphList.as_view(),
+         name='GET - информация о нескольких графах (?ids=1,2,3 или ?rsrch_id=), POST - создание графа'),
 
+    path('research/<str:rsrch_id>/nodes/', views.GraphNodeSearch.as_view(),
+         name='GET - поиск узлов по названию (?title=) во всех графах исследования'),
     path('research/<str:rsrch_id>/', views.ResearchDetail.as_view(),
          name='GET - показ информации об исследовании, DELETE - удаление исследования, PATCH - обновление информации в исследовании'),
     path('research/', views.ResearchList.as_view(),
@@ -1,4 +1,5 @@
-from .graph import GraphDetail, CreateGraph
+from .graph import GraphDetail, GraphList, GraphSubgraphs, GraphNodeSearch, GraphNodeReachability, GraphNodePath, \
+    GraphRender, GraphVersionList
 from .note_and_node import NoteDetail, NoteCreate, NodeDetail
 from .remake_item import RemakeItemDetail, RemakeItemList
 from .research import ResearchDetail, ResearchList
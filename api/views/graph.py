@@ -1,16 +1,55 @@
 import collections
-import json
+from typing import Dict, Optional
 
 from django.core.exceptions import BadRequest
 from django.db import transaction
-from django.http import Http404
-from rest_framework import generics, permissions
+from django.db.models import OuterRef, Subquery
+from django.http import Http404, HttpResponse
+from django.utils.http import parse_etags
+from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 
 from api import serializers
+from api.pagination import StandardResultsSetPagination
 from sci_activity_doc.consts import GET_METHOD, DELETE_METHOD, PATCH_METHOD
 from auth_wrapper.license import IsOwnerObjectOrIsProfessorOrReadOnly
-from core.models import Graph, NodesNotesRelation, Note
+from core.graph_render import RENDER_FORMATS, GraphRenderBusy, GraphRenderError
+from core.models import Graph, GraphNode, GraphRevisionConflict, GraphVersion, NodesNotesRelation, Note, \
+    SubgraphRelation
+
+MAX_EXPAND_SUBGRAPHS_DEPTH = 10  # ограничение глубины для GET ?expand_subgraphs=N
+MAX_BULK_GRAPHS = 100  # ограничение числа графов для GET graph/?ids=
+
+
+def graph_detail(graph: Graph, notes, context: dict) -> dict:
+    """
+    Информация о графе в формате ответа GET, метаданные узлов дополнены айди привязанных заметок
+    """
+    graph = serializers.graph.GraphSerializer(graph, context=context).data
+    notes = serializers.note_and_node.NodesNotesRelationSerializer(notes, many=True, context=context).data
+    nodes_metadata = graph['nodes_metadata']
+
+    map_node_id_to_notes_ids = collections.defaultdict(list)  # маппинг айдишек узлов на список айдишек заметок
+    notes_id_without_graph = list()  # список айдишек заметок, не привязанных ни к какому графу
+    for note in notes:
+        note = dict(note)
+        if 'node_id' not in note and 'note_id' in note:
+            notes_id_without_graph.append(note['note_id'])
+        map_node_id_to_notes_ids[note['node_id']].append(note['note_id'])
+
+    full_nodes_info = dict()
+    for id in nodes_metadata:
+        full_nodes_info[id] = dict()
+
+        full_nodes_info[id]['title'] = nodes_metadata[id].get('title', '')
+        full_nodes_info[id]['is_subgraph'] = nodes_metadata[id].get('subgraph', 0) != 0
+        full_nodes_info[id]['subgraph_graph_id'] = nodes_metadata[id].get('subgraph', 0)
+        full_nodes_info[id]['notes_ids'] = map_node_id_to_notes_ids[id]
+
+    graph['notes_without_graph'] = notes_id_without_graph
+    graph['nodes_metadata'] = full_nodes_info
+
+    return graph
 
 
 class GraphDetail(generics.RetrieveAPIView,
@@ -55,48 +94,106 @@ class GraphDetail(generics.RetrieveAPIView,
             title_serializer = serializers.graph.GraphTitleUpdateSerializer
             metadata_serializer = serializers.graph.GraphMetadataUpdateSerializer
             levels_serializer = serializers.graph.GraphLevelsUpdateSerializer
+            operations_serializer = serializers.graph.GraphOperationsSerializer
+            restore_serializer = serializers.graph.GraphRestoreVersionSerializer
 
             return title_serializer(*args, **kwargs), \
                 metadata_serializer(*args, **kwargs), \
-                levels_serializer(*args, **kwargs)
+                levels_serializer(*args, **kwargs), \
+                operations_serializer(*args, **kwargs), \
+                restore_serializer(*args, **kwargs)
 
     def retrieve(self, request, *args, **kwargs):
         graph, notes = self.get_object()
+        depth = self._get_expand_subgraphs_depth()
+
+        if 'version' in self.request.query_params:
+            graph = self._get_graph_version(graph)
+
+        result = self._graph_detail(graph, notes)
+        if 'version' in self.request.query_params:
+            result['version'] = int(self.request.query_params['version'])
+        if self.request.query_params.get('layout') in ('1', 'true'):
+            result['layout'] = graph.get_layout()
+        if depth:
+            result['subgraphs'] = self._expand_subgraphs(graph, depth)
+
+        response = Response(result)
+        if 'version' not in self.request.query_params:
+            # ревизия для If-Match в последующем PATCH
+            response['ETag'] = f'"{graph.revision}"'
+        return response
+
+    def _get_expand_subgraphs_depth(self) -> int:
+        try:
+            depth = int(self.request.query_params.get('expand_subgraphs', 0))
+        except ValueError:
+            raise BadRequest()
+        if depth < 0:
+            raise BadRequest()
+        return min(depth, MAX_EXPAND_SUBGRAPHS_DEPTH)
 
-        graph_serializer, _ = self.get_serializer(graph)
-        _, nodes_notes_rel_serializer = self.get_serializer(notes, many=True)
-        graph = graph_serializer.data
-        notes = nodes_notes_rel_serializer.data
-        nodes_metadata = json.loads(graph['nodes_metadata'])
-
-        map_node_id_to_notes_ids = collections.defaultdict(list)  # маппинг айдишек узлов на список айдишек заметок
-        notes_id_without_graph = list()  # список айдишек заметок, не привязанных ни к какому графу
-        for note in notes:
-            note = dict(note)
-            if 'node_id' not in note and 'note_id' in note:
-                notes_id_without_graph.append(note['note_id'])
-            map_node_id_to_notes_ids[note['node_id']].append(note['note_id'])
-
-        full_nodes_info = dict()
-        for id in nodes_metadata:
-            full_nodes_info[id] = dict()
-
-            full_nodes_info[id]['title'] = nodes_metadata[id].get('title', '')
-            full_nodes_info[id]['is_subgraph'] = nodes_metadata[id].get('subgraph', 0) != 0
-            full_nodes_info[id]['subgraph_graph_id'] = nodes_metadata[id].get('subgraph', 0)
-            full_nodes_info[id]['notes_ids'] = map_node_id_to_notes_ids[id]
+    def _get_graph_version(self, graph: Graph) -> Graph:
+        """
+        Несохраняемый экземпляр графа с data из версии ?version=N (см. GraphVersion)
+        """
+        try:
+            version = int(self.request.query_params['version'])
+        except ValueError:
+            raise BadRequest()
 
-        graph['notes_without_graph'] = notes_id_without_graph
-        graph['nodes_metadata'] = full_nodes_info
-        graph['levels'] = json.loads(graph['levels'])
+        try:
+            data = GraphVersion.get_data(graph.graph_id, version)
+        except GraphVersion.DoesNotExist:
+            raise Http404()
 
-        return Response(graph)
+        graph_version = Graph(graph_id=graph.graph_id, title=graph.title, rsrch_id_id=graph.rsrch_id_id, data=data)
+        graph_version.update_derived_fields()
+        return graph_version
+
+    def _graph_detail(self, graph: Graph, notes) -> dict:
+        return graph_detail(graph, notes, self.get_serializer_context())
+
+    def _expand_subgraphs(self, graph: Graph, depth: int) -> Dict[str, dict]:
+        """
+        Обходит подграфы в ширину до глубины depth и возвращает их информацию по айди.
+        На каждый уровень вложенности - два запроса (графы уровня и их связи с заметками)
+        независимо от числа подграфов. Каждый граф попадает в ответ один раз,
+        поэтому циклические ссылки между графами не зацикливают обход
+        """
+        subgraphs = dict()
+        visited = {graph.graph_id}
+        frontier = [graph]
+
+        for _ in range(depth):
+            graph_ids = {
+                attrs['subgraph']
+                for g in frontier for attrs in g.nodes_metadata.values() if attrs.get('subgraph')
+            } - visited
+            if not graph_ids:
+                break
+            visited |= graph_ids
+
+            frontier = list(Graph.objects.filter(graph_id__in=graph_ids).order_by('graph_id'))
+            notes = collections.defaultdict(list)
+            for nnr in NodesNotesRelation.objects.filter(graph_id__in=graph_ids):
+                notes[nnr.graph_id_id].append(nnr)
+
+            for g in frontier:
+                self.check_object_permissions(self.request, g)
+                subgraphs[str(g.graph_id)] = self._graph_detail(g, notes[g.graph_id])
+
+        return subgraphs
 
     def update(self, request, *args, **kwargs):
         partial = kwargs.pop('partial', False)
 
         graph = self.get_object()
-        title_serializer, metadata_serializer, levels_serializer = \
+        revision = self._get_if_match_revision()
+        if revision is not None:
+            graph.expect_revision(revision)
+
+        title_serializer, metadata_serializer, levels_serializer, operations_serializer, restore_serializer = \
             self.get_serializer(graph, data=request.data, partial=partial)
 
         if 'title' in request.data and title_serializer.is_valid(raise_exception=True):
@@ -105,17 +202,48 @@ class GraphDetail(generics.RetrieveAPIView,
             serializer = metadata_serializer
         elif 'levels' in request.data and levels_serializer.is_valid(raise_exception=True):
             serializer = levels_serializer
+        elif 'operations' in request.data and operations_serializer.is_valid(raise_exception=True):
+            # точечные изменения структуры графа, см. core.graph_operations
+            serializer = operations_serializer
+        elif 'restore_version' in request.data and restore_serializer.is_valid(raise_exception=True):
+            # откат к одной из прежних версий графа, см. GraphVersion
+            serializer = restore_serializer
         else:
             raise BadRequest()
 
-        super().perform_update(serializer)
+        try:
+            super().perform_update(serializer)
+        except GraphRevisionConflict:
+            # граф изменили после того, как клиент (или этот запрос) его прочитал
+            current_revision = Graph.objects.filter(pk=graph.pk).values_list('revision', flat=True).first()
+            if current_revision is None:
+                # граф удалили
+                raise Http404()
+            response = Response({'detail': 'graph was modified by another request', 'revision': current_revision},
+                                status=status.HTTP_409_CONFLICT)
+            response['ETag'] = f'"{current_revision}"'
+            return response
 
         if getattr(graph, '_prefetched_objects_cache', None):
             # If 'prefetch_related' has been applied to a queryset, we need to
             # forcibly invalidate the prefetch cache on the instance.
             graph._prefetched_objects_cache = {}
 
-        return Response(serializer.data)
+        response = Response(serializer.data)
+        response['ETag'] = f'"{graph.revision}"'
+        return response
+
+    def _get_if_match_revision(self) -> Optional[int]:
+        """
+        Ревизия графа из заголовка If-Match (ETag из ответа GET), None - если заголовка нет
+        """
+        if_match = self.request.headers.get('If-Match', '').strip()
+        if not if_match or if_match == '*':
+            return None
+        try:
+            return int(if_match.removeprefix('W/').strip('"'))
+        except ValueError:
+            raise BadRequest()
 
     @transaction.atomic()
     def delete(self, request, *args, **kwargs):
@@ -123,6 +251,230 @@ class GraphDetail(generics.RetrieveAPIView,
         return super().delete(request, *args, **kwargs)
 
 
-class CreateGraph(generics.CreateAPIView):
+class GraphList(generics.CreateAPIView,
+                generics.ListAPIView):
+    """
+    GET - информация сразу о нескольких графах (?ids=1,2,3 или все графы исследования ?rsrch_id=)
+    в том же формате, что и GraphDetail. Графы и их связи с заметками загружаются двумя запросами
+    независимо от числа графов. POST - создание графа
+    """
     serializer_class = serializers.graph.GraphSerializer
     permission_classes = [permissions.IsAuthenticated, IsOwnerObjectOrIsProfessorOrReadOnly]
+
+    def get_queryset(self):
+        queryset = Graph.objects.order_by('graph_id')
+
+        if 'ids' in self.request.query_params:
+            try:
+                ids = {int(graph_id) for graph_id in self.request.query_params['ids'].split(',') if graph_id}
+            except ValueError:
+                raise BadRequest()
+            if not ids or len(ids) > MAX_BULK_GRAPHS:
+                raise BadRequest()
+            queryset = queryset.filter(graph_id__in=ids)
+        elif 'rsrch_id' in self.request.query_params:
+            queryset = queryset.filter(rsrch_id=self.request.query_params['rsrch_id'])
+        else:
+            raise BadRequest()
+
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        graphs = list(self.get_queryset())
+
+        notes = collections.defaultdict(list)
+        for nnr in NodesNotesRelation.objects.filter(graph_id__in=[g.graph_id for g in graphs]):
+            notes[nnr.graph_id_id].append(nnr)
+
+        # права на все графы исследования одинаковые, поэтому проверяются по одному графу на исследование
+        checked_researches = set()
+        for g in graphs:
+            if g.rsrch_id_id not in checked_researches:
+                self.check_object_permissions(self.request, g)
+                checked_researches.add(g.rsrch_id_id)
+
+        context = self.get_serializer_context()
+        return Response([graph_detail(g, notes[g.graph_id], context) for g in graphs])
+
+
+class GraphSubgraphs(generics.RetrieveAPIView):
+    """
+    Графы, в которые граф встроен как подграф (parents), и подграфы, на которые ссылаются его узлы (children).
+    Ответ строится по таблице SubgraphRelation, без разбора data графов
+    """
+    lookup_url_kwarg = 'graph_id'
+    lookup_field = 'graph_id'
+    permission_classes = [permissions.IsAuthenticated, IsOwnerObjectOrIsProfessorOrReadOnly]
+
+    def get_object(self):
+        try:
+            graph_id = int(self.kwargs.get(self.lookup_url_kwarg, 0))
+            graph = Graph.objects.only('graph_id', 'rsrch_id').get(graph_id=graph_id)
+        except Graph.DoesNotExist:
+            raise Http404()
+
+        self.check_object_permissions(self.request, graph)
+        return graph
+
+    def retrieve(self, request, *args, **kwargs):
+        graph = self.get_object()
+
+        parents = SubgraphRelation.objects. \
+            filter(child_graph_id=graph.graph_id). \
+            order_by('parent_graph_id', 'node_id'). \
+            values('node_id', 'parent_graph_id', 'parent_graph__title')
+
+        # подграф мог быть удален, поэтому название берется подзапросом, а не через join
+        children = SubgraphRelation.objects. \
+            filter(parent_graph_id=graph.graph_id). \
+            order_by('node_id'). \
+            annotate(child_title=Subquery(Graph.objects.filter(graph_id=OuterRef('child_graph_id')).values('title'))). \
+            values('node_id', 'child_graph_id', 'child_title')
+
+        return Response({
+            'graph_id': graph.graph_id,
+            'parents': [
+                {'graph_id': rel['parent_graph_id'], 'title': rel['parent_graph__title'], 'node_id': rel['node_id']}
+                for rel in parents
+            ],
+            'children': [
+                {
+                    'node_id': rel['node_id'],
+                    'graph_id': rel['child_graph_id'],
+                    'title': rel['child_title'] or '',
+                    'exists': rel['child_title'] is not None,
+                }
+                for rel in children
+            ],
+        })
+
+
+class GraphVersionList(generics.ListAPIView):
+    """
+    История версий графа, от последней к первой. Содержимое версии - GET graph/<айди>/?version=N
+    """
+    serializer_class = serializers.graph.GraphVersionSerializer
+    pagination_class = StandardResultsSetPagination
+    permission_classes = [permissions.IsAuthenticated, ]
+
+    def get_queryset(self):
+        graph_id = int(self.kwargs.get('graph_id', 0))
+        if not Graph.objects.filter(graph_id=graph_id).exists():
+            raise Http404()
+
+        return GraphVersion.objects. \
+            filter(graph_id=graph_id). \
+            defer('snapshot'). \
+            order_by('-version')
+
+
+class GraphNodeSearch(generics.ListAPIView):
+    """
+    Поиск узлов по названию во всех графах исследования (?title=<подстрока>), по таблице GraphNode
+    """
+    serializer_class = serializers.graph.GraphNodeSerializer
+    pagination_class = StandardResultsSetPagination
+    permission_classes = [permissions.IsAuthenticated, ]
+
+    def get_queryset(self):
+        rsrch_id = self.kwargs.get('rsrch_id', '')
+        queryset = GraphNode.objects. \
+            filter(graph__rsrch_id=rsrch_id). \
+            select_related('graph'). \
+            only('node_id', 'title', 'subgraph', 'graph__graph_id', 'graph__title'). \
+            order_by('graph_id', 'node_id')
+
+        title = self.request.query_params.get('title', '').strip()
+        if title:
+            queryset = queryset.filter(title__icontains=title)
+
+        return queryset
+
+
+class GraphNodeReachability(generics.RetrieveAPIView):
+    """
+    Все предки (direction='ancestors') или все потомки (direction='descendants') узла графа.
+    Ответ строится по индексу достижимости в GraphNode, без обхода графа
+    """
+    permission_classes = [permissions.IsAuthenticated, ]
+    direction = 'descendants'
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            node = GraphNode.objects. \
+                only('graph', 'node_id', self.direction). \
+                get(graph_id=int(self.kwargs.get('graph_id', 0)), node_id=self.kwargs.get('node_id', ''))
+        except GraphNode.DoesNotExist:
+            raise Http404()
+
+        if self.direction == 'ancestors':
+            node_ids = node.get_ancestor_ids()
+        else:
+            node_ids = node.get_descendant_ids()
+
+        return Response({'graph_id': node.graph_id, 'node_id': node.node_id, self.direction: node_ids})
+
+
+class GraphNodePath(generics.RetrieveAPIView):
+    """
+    Есть ли путь между узлами графа (?src=<айди узла>&dst=<айди узла>)
+    и какие узлы лежат на путях между ними, по индексу достижимости в GraphNode
+    """
+    permission_classes = [permissions.IsAuthenticated, ]
+
+    def retrieve(self, request, *args, **kwargs):
+        graph_id = int(self.kwargs.get('graph_id', 0))
+        src = self.request.query_params.get('src', '')
+        dst = self.request.query_params.get('dst', '')
+        if not src or not dst:
+            raise BadRequest()
+
+        try:
+            node_ids = GraphNode.get_path_node_ids(graph_id, src, dst)
+        except GraphNode.DoesNotExist:
+            raise Http404()
+
+        return Response({
+            'graph_id': graph_id,
+            'src': src,
+            'dst': dst,
+            'exists': node_ids is not None,
+            'nodes': node_ids or [],
+        })
+
+
+class GraphRender(generics.RetrieveAPIView):
+    """
+    Изображение графа (graph/<айди>/render.svg или render.png), отрисованное программой dot.
+    Изображения кешируются на диске по хешу содержимого графа, он же - ETag ответа:
+    если If-None-Match совпадает с ним, изображение не отрисовывается и не передается (304)
+    """
+    permission_classes = [permissions.IsAuthenticated, ]
+
+    def retrieve(self, request, *args, **kwargs):
+        fmt = self.kwargs.get('fmt', '')
+        if fmt not in RENDER_FORMATS:
+            raise Http404()
+
+        try:
+            graph = Graph.objects.only('graph_id', 'data').get(graph_id=int(self.kwargs.get('graph_id', 0)))
+        except Graph.DoesNotExist:
+            raise Http404()
+
+        etag = f'"{graph.get_data_hash()}"'
+        if_none_match = [tag.removeprefix('W/') for tag in parse_etags(request.headers.get('If-None-Match', ''))]
+        if etag in if_none_match or '*' in if_none_match:
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+            response['ETag'] = etag
+            return response
+
+        try:
+            content = graph.render(fmt)
+        except GraphRenderBusy as e:
+            return Response({'detail': str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        except GraphRenderError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        response = HttpResponse(content, content_type=RENDER_FORMATS[fmt])
+        response['ETag'] = etag
+        return response
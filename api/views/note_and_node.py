@@ -1,6 +1,7 @@
 from django.core.exceptions import BadRequest
 from django.db import transaction
 from django.http import Http404
+from django.utils.cache import add_never_cache_headers
 from django.utils.decorators import method_decorator
 from django.views.decorators.cache import cache_page
 from rest_framework import generics, permissions, status
@@ -10,7 +11,7 @@ from rest_framework.response import Response
 from api import serializers
 from api.pagination import StandardResultsSetPagination
 from auth_wrapper.license import IsOwnerObjectOrIsProfessorOrReadOnly
-from core.models import Note, Graph, NodesNotesRelation
+from core.models import Note, GraphNode, NodesNotesRelation
 from gitlab_client.client import GLClient, GitlabError
 from gitlab_client.parse_url import parse_note_type_from_url
 from latex2html.models import RemakeItem
@@ -66,17 +67,26 @@ class NoteDetail(generics.RetrieveAPIView,
         data['author'].pop('last_name', '')
 
         try:
-            note_raw_text = self.get_note_raw_text_by_url(data['url'])
+            note_raw_text, _, stale = self.get_note_text_or_stale(data['url'])
         except GitlabError as e:
             data['text'] = f'Не удалось получить текст заметки :(<br/>Проблемы с Gitlab: {e}'
+            data['stale'] = False
+            cacheable = False
         else:
             if REMAKE_LATEX2HTML_ENABLE:
                 html_text = RemakeItem.objects.remake_latex_text(note_raw_text)
                 data['text'] = html_text
             else:
                 data['text'] = note_raw_text
+            # текст взят из сохраненных, пока гитлаб недоступен, и мог устареть
+            data['stale'] = stale
+            cacheable = not stale
 
-        return Response(data)
+        response = Response(data)
+        if not cacheable:
+            # ошибку и устаревший текст не кешируем, чтобы после восстановления гитлаба сразу отдать актуальный
+            add_never_cache_headers(response)
+        return response
 
     @transaction.atomic
     def destroy(self, request, *args, **kwargs):
@@ -116,8 +126,7 @@ class NoteCreate(generics.CreateAPIView):
             nodes_notes_rel_serializer.is_valid(raise_exception=True)
             nnr = nodes_notes_rel_serializer.data
 
-            graph = Graph.objects.get(graph_id=nnr['graph_id'])
-            if not graph.node_with_node_id_exists(str(nnr['node_id'])):
+            if not GraphNode.objects.filter(graph_id=nnr['graph_id'], node_id=str(nnr['node_id'])).exists():
                 raise ValidationError({"node_id": [f"Invalid pk {str(nnr['node_id'])} - object does not exist."]})
 
             notes_nodes_rel_data = NodesNotesRelation(
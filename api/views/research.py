@@ -41,6 +41,7 @@ class ResearchDetail(generics.RetrieveAPIView,
                     get(pk=rsrch_id)
                 graphs = Graph.objects. \
                     filter(rsrch_id=rsrch_id). \
+                    only('graph_id', 'title'). \
                     order_by('title')
                 notes_without_graph = Note.objects. \
                     filter(rsrch_id=rsrch_id, nodesnotesrelation__graph_id_id__isnull=True)
@@ -0,0 +1,78 @@
+import datetime
+from unittest import mock
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from core.models import Graph, Research, User
+
+
+class TestGraphDetail_revision(TestCase):
+    def setUp(self):
+        today = datetime.date.today()
+        user = User.objects.create(username='user')
+        research = Research.objects.create(rsrch_id='1', title='research', start_date=today, end_date=today)
+        research.researchers.add(user)
+        self.graph = Graph(data='digraph{A;1;B;A->1;1->B;}', title='graph', rsrch_id=research)
+        self.graph.save()
+
+        self.client = APIClient(HTTP_HOST='localhost')
+        self.client.force_authenticate(user)
+        self.url = f'/api/graph/{self.graph.pk}/'
+
+    def test_if_match(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response['ETag'], '"1"')
+
+        response = self.client.patch(self.url, {'title': 'first'}, format='json', HTTP_IF_MATCH='"1"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['ETag'], '"2"')
+
+        # второй клиент правит граф по устаревшей ревизии
+        response = self.client.patch(self.url, {'operations': [
+            {'op': 'insert_between', 'src': '1', 'dst': 'B', 'node_id': '2'},
+        ]}, format='json', HTTP_IF_MATCH='"1"')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['revision'], 2)
+        self.assertEqual(response['ETag'], '"2"')
+
+        graph = Graph.objects.get(pk=self.graph.pk)
+        self.assertEqual((graph.title, graph.revision), ('first', 2))
+        self.assertFalse(graph.node_with_node_id_exists('2'))
+
+    def test_without_if_match(self):
+        response = self.client.patch(self.url, {'title': 'new title'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['ETag'], '"2"')
+
+    def test_invalid_if_match(self):
+        response = self.client.patch(self.url, {'title': 'new title'}, format='json', HTTP_IF_MATCH='"abc"')
+        self.assertEqual(response.status_code, 400)
+
+
+class TestGraphRender_etag(TestCase):
+    def setUp(self):
+        today = datetime.date.today()
+        user = User.objects.create(username='user')
+        research = Research.objects.create(rsrch_id='1', title='research', start_date=today, end_date=today)
+        graph = Graph(data='digraph{A;B;A->B;}', title='graph', rsrch_id=research)
+        graph.save()
+
+        self.client = APIClient(HTTP_HOST='localhost')
+        self.client.force_authenticate(user)
+        self.url = f'/api/graph/{graph.pk}/render.svg'
+
+    def test_if_none_match(self):
+        with mock.patch.object(Graph, 'render', return_value=b'<svg/>') as render:
+            response = self.client.get(self.url)
+            self.assertEqual(response.status_code, 200)
+            etag = response['ETag']
+
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=f'"other", W/{etag}')
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response['ETag'], etag)
+            self.assertEqual(response.content, b'')
+
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH='"other"')
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(render.call_count, 2, msg='при совпадении ETag граф не отрисовывается')
@@ -2,7 +2,7 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django.utils.translation import gettext_lazy as _  # обеспечивает локализацию
 
-from core.models import NodesNotesRelation, Note, Graph, Research, User
+from core.models import NodesNotesRelation, Note, Graph, GraphNode, GraphVersion, Research, User, SubgraphRelation
 
 
 @admin.register(User)
@@ -55,3 +55,20 @@ class NoteAdmin(admin.ModelAdmin):
 @admin.register(NodesNotesRelation)
 class NodesNotesRelationAdmin(admin.ModelAdmin):
     list_display = ['id', 'node_id', 'note_id', 'graph_id']
+
+
+@admin.register(SubgraphRelation)
+class SubgraphRelationAdmin(admin.ModelAdmin):
+    list_display = ['id', 'parent_graph', 'node_id', 'child_graph_id']  # подграф может быть уже удален
+
+
+@admin.register(GraphNode)
+class GraphNodeAdmin(admin.ModelAdmin):
+    list_display = ['id', 'graph', 'node_id', 'title', 'subgraph']
+    search_fields = ['title']
+
+
+@admin.register(GraphVersion)
+class GraphVersionAdmin(admin.ModelAdmin):
+    list_display = ['id', 'graph', 'version', 'is_snapshot', 'created_at']
+    list_filter = ('graph',)
@@ -0,0 +1,108 @@
+"""
+Генераторы синтетических графов исследований для замеров производительности.
+
+Все графы начинаются в узле A и заканчиваются в узле B, не содержат циклов и
+проходят валидацию Graph.valid_graph. Внутренние узлы нумеруются с 1.
+"""
+import math
+import random
+from typing import Callable, Dict, List, Tuple
+
+Edges = List[Tuple[str, str]]
+
+
+def _deep(size: int, rng: random.Random) -> Edges:
+    """
+    Длинная цепочка узлов с редкими связями "через уровень"
+    """
+    edges = [('A', '1')]
+    for i in range(1, size):
+        edges.append((str(i), str(i + 1)))
+        if rng.random() < 0.2 and i + 2 <= size:
+            edges.append((str(i), str(rng.randint(i + 2, min(size, i + 10)))))
+    edges.append((str(size), 'B'))
+    return edges
+
+
+def _wide(size: int, rng: random.Random) -> Edges:
+    """
+    Широкие уровни, каждый узел связан с одним-двумя узлами предыдущего уровня
+    """
+    width = max(1, int(math.sqrt(size) * 2))
+    layers = [[str(i) for i in range(start, min(start + width, size + 1))] for start in range(1, size + 1, width)]
+
+    edges = [('A', node_id) for node_id in layers[0]]
+    has_children = set()
+    for prev_layer, layer in zip(layers, layers[1:]):
+        for node_id in layer:
+            for parent in rng.sample(prev_layer, min(len(prev_layer), rng.randint(1, 2))):
+                edges.append((parent, node_id))
+                has_children.add(parent)
+
+    for layer in layers:
+        for node_id in layer:
+            if node_id not in has_children:
+                edges.append((node_id, 'B'))
+    return edges
+
+
+def _diamond(size: int, rng: random.Random) -> Edges:
+    """
+    Последовательность "ромбов": узел расходится на несколько параллельных веток,
+    которые снова сходятся в один узел. Число путей растет экспоненциально с глубиной
+    """
+    edges = list()
+    current = 'A'
+    next_id = 1
+    while next_id + 2 <= size:
+        branches = min(rng.randint(2, 4), size - next_id)
+        merge = str(next_id + branches)
+        for i in range(next_id, next_id + branches):
+            edges.append((current, str(i)))
+            edges.append((str(i), merge))
+        current = merge
+        next_id += branches + 1
+
+    # оставшиеся узлы вытягиваем в цепочку
+    while next_id <= size:
+        edges.append((current, str(next_id)))
+        current = str(next_id)
+        next_id += 1
+    edges.append((current, 'B'))
+    return edges
+
+
+SHAPES: Dict[str, Callable[[int, random.Random], Edges]] = {
+    'deep': _deep,
+    'wide': _wide,
+    'diamond': _diamond,
+}
+
+
+def generate_dag(shape: str, size: int, seed: int = 0) -> Edges:
+    """
+    Возвращает связи графа формы shape с size внутренними узлами
+    """
+    return SHAPES[shape](max(1, size), random.Random(seed))
+
+
+def edges_to_dot(edges: Edges, titles: Dict[str, str] = None) -> str:
+    """
+    Записывает связи в DOT в том виде, в котором Graph хранит data
+    """
+    titles = titles or dict()
+
+    node_ids = ['A']
+    seen = {'A'}
+    for src, dst in edges:
+        for node_id in (src, dst):
+            if node_id not in seen:
+                seen.add(node_id)
+                node_ids.append(node_id)
+
+    nodes = [f'{node_id}[title={titles[node_id]}];' if node_id in titles else f'{node_id};' for node_id in node_ids]
+    return f"digraph{{{''.join(nodes)}{''.join(f'{src}->{dst};' for src, dst in edges)}}}"
+
+
+def generate_dot(shape: str, size: int, seed: int = 0) -> str:
+    return edges_to_dot(generate_dag(shape, size, seed))
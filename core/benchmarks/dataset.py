@@ -0,0 +1,135 @@
+"""
+Генератор синтетической базы для нагрузочных замеров: пользователи, исследования, графы
+заданных форм (см. core.benchmarks.dags), заметки и их связи с узлами.
+
+Все записи создаются через bulk_create, поэтому Graph.save не вызывается: производные поля графа
+(levels, nodes_metadata) и строки GraphNode рассчитываются здесь же. При одинаковых параметрах и seed
+получается одна и та же база.
+"""
+import datetime
+import random
+from typing import Dict, List, Sequence
+
+from django.db import transaction
+
+from core.benchmarks.dags import edges_to_dot, generate_dag
+from core.models import Graph, GraphNode, NodesNotesRelation, Note, Research, User
+
+# node_id в NodesNotesRelation ограничен тремя символами, к узлам с более длинными айди заметки не привязываются
+NNR_NODE_ID_MAX_LENGTH = NodesNotesRelation._meta.get_field('node_id').max_length
+
+
+def _graph_dot(shape: str, size: int, seed: int, rng: random.Random) -> str:
+    edges = generate_dag(shape, size, seed)
+    node_ids = {node_id for edge in edges for node_id in edge} - {'A', 'B'}
+    titles = {node_id: f'step_{node_id}' for node_id in node_ids if rng.random() < 0.5}
+    return edges_to_dot(edges, titles)
+
+
+def _create_graphs(graphs: List[Graph], batch_size: int) -> int:
+    """
+    Создает графы вместе с их строками GraphNode, возвращает число созданных узлов
+    """
+    Graph.objects.bulk_create(graphs, batch_size=batch_size)
+
+    nodes = list()
+    for graph in graphs:
+        for node_id, (title, subgraph, ordinal, ancestors, descendants) in graph.get_graph_node_values().items():
+            nodes.append(GraphNode(graph=graph, node_id=node_id, title=title, subgraph=subgraph,
+                                   ordinal=ordinal, ancestors=ancestors, descendants=descendants))
+    GraphNode.objects.bulk_create(nodes, batch_size=batch_size)
+    return len(nodes)
+
+
+@transaction.atomic
+def generate_dataset(prefix: str = 'bench', users: int = 50, researches: int = 200, graphs_per_research: int = 5,
+                     nodes: int = 1000, shapes: Sequence[str] = ('deep', 'wide', 'diamond'),
+                     notes_per_graph: int = 20, seed: int = 0, batch_size: int = 500) -> Dict[str, int]:
+    """
+    Создает синтетическую базу и возвращает число созданных записей каждого вида.
+    Размер графа выбирается случайно от nodes / 2 до nodes внутренних узлов.
+    prefix входит в логины и айди исследований, чтобы можно было создать несколько наборов в одной базе
+    """
+    rng = random.Random(seed)
+    today = datetime.date(2024, 1, 1)
+
+    created_users = list()
+    for i in range(users):
+        user = User(username=f'{prefix}_user_{i}', first_name=f'Name{i}', last_name=f'{prefix.capitalize()}{i}')
+        user.set_unusable_password()
+        created_users.append(user)
+    created_users = User.objects.bulk_create(created_users, batch_size=batch_size)
+
+    created_researches = Research.objects.bulk_create([
+        Research(rsrch_id=f'{prefix}-{i}', title=f'{prefix} research {i}', description='',
+                 start_date=today, end_date=today + datetime.timedelta(days=365))
+        for i in range(researches)
+    ], batch_size=batch_size)
+
+    owners = dict()
+    research_users = list()
+    for research in created_researches:
+        owners[research.rsrch_id] = rng.sample(created_users, min(len(created_users), rng.randint(1, 3)))
+        for user in owners[research.rsrch_id]:
+            research_users.append(Research.researchers.through(research_id=research.rsrch_id, user_id=user.id))
+    Research.researchers.through.objects.bulk_create(research_users, batch_size=batch_size)
+
+    counts = {'users': len(created_users), 'researches': len(created_researches),
+              'graphs': 0, 'graph_nodes': 0, 'notes': 0, 'nodes_notes_relations': 0}
+
+    # графы и заметки создаются порциями, чтобы не держать в памяти всю базу
+    graphs = list()
+    for research in created_researches:
+        for i in range(graphs_per_research):
+            shape = shapes[rng.randrange(len(shapes))]
+            size = rng.randint(max(1, nodes // 2), max(1, nodes))
+            graph = Graph(data=_graph_dot(shape, size, rng.randrange(2 ** 32), rng),
+                          title=f'{shape} {size} #{i}', rsrch_id=research)
+            graph._clean_data()
+            graph.update_derived_fields()
+            graphs.append(graph)
+
+        if len(graphs) >= batch_size:
+            _flush_graphs(graphs, owners, notes_per_graph, rng, batch_size, counts)
+            graphs = list()
+    _flush_graphs(graphs, owners, notes_per_graph, rng, batch_size, counts)
+
+    return counts
+
+
+def _flush_graphs(graphs: List[Graph], owners: Dict[str, List[User]], notes_per_graph: int,
+                  rng: random.Random, batch_size: int, counts: Dict[str, int]):
+    if not graphs:
+        return
+    counts['graph_nodes'] += _create_graphs(graphs, batch_size)
+    counts['graphs'] += len(graphs)
+    notes = _create_notes(graphs, owners, notes_per_graph, rng, batch_size)
+    counts['notes'] += notes
+    counts['nodes_notes_relations'] += notes
+
+
+def _create_notes(graphs: List[Graph], owners: Dict[str, List[User]], notes_per_graph: int,
+                  rng: random.Random, batch_size: int) -> int:
+    """
+    Создает заметки и привязывает каждую к случайному узлу графа, возвращает число заметок
+    """
+    notes = list()
+    node_ids = list()
+    for graph in graphs:
+        candidates = [node_id for node_id in graph.nodes_metadata if len(node_id) <= NNR_NODE_ID_MAX_LENGTH]
+        for node_id in rng.sample(candidates, min(len(candidates), notes_per_graph)):
+            author = rng.choice(owners[graph.rsrch_id_id])
+            notes.append(Note(
+                url=f'https://gitlab.example.com/{graph.rsrch_id_id}/notes/-/blob/main/'
+                    f'{author.username}_not_dev_{len(notes)}.tex',
+                note_type='dev', rsrch_id_id=graph.rsrch_id_id, user_id=author,
+            ))
+            node_ids.append((graph, node_id))
+    Note.objects.bulk_create(notes, batch_size=batch_size)
+
+    NodesNotesRelation.objects.bulk_create([
+        NodesNotesRelation(node_id=node_id, note_id=note, graph_id=graph)
+        for note, (graph, node_id) in zip(notes, node_ids)
+    ], batch_size=batch_size)
+
+    return len(notes)
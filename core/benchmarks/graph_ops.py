@@ -0,0 +1,134 @@
+"""
+Замеры основных операций Graph на синтетических графах (см. core.benchmarks.dags):
+время выполнения и пиковая память по tracemalloc, а также сравнение с сохраненными ранее результатами.
+
+Каждая операция выполняется на свежем экземпляре Graph, подготовка экземпляра (setup) в замер не входит.
+"""
+import gc
+import platform
+import statistics
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+
+from core.benchmarks.dags import generate_dot
+from core.models import Graph
+
+# увеличивать при изменении набора или смысла замеров, результаты разных версий не сравниваются
+BENCHMARK_VERSION = 1
+
+NODE_METADATA = {'is_subgraph': False, 'subgraph_graph_id': 0, 'title': 'new title', 'notes_ids': []}
+
+
+def _new(data: str) -> Graph:
+    return Graph(data=data)
+
+
+def _parsed(data: str) -> Graph:
+    graph = Graph(data=data)
+    graph._get_dot()
+    return graph
+
+
+def _parsed_with_levels(data: str) -> Tuple[Graph, Dict[int, Dict[str, List[str]]]]:
+    graph = _parsed(data)
+    return graph, Graph(data=data)._dot_to_dict_levels()
+
+
+# операция -> (подготовка экземпляра по data, замеряемое действие)
+CASES: Dict[str, Tuple[Callable[[str], Any], Callable[[Any], Any]]] = {
+    'parse': (_new, lambda graph: graph._get_dot()),
+    'valid_graph': (_parsed, lambda graph: graph.valid_graph()),
+    'dot_to_dict_levels': (_parsed, lambda graph: graph._dot_to_dict_levels()),
+    'get_nodes_metadata_json': (_parsed, lambda graph: graph.get_nodes_metadata_json()),
+    'rewrite_graph_schema': (_parsed_with_levels, lambda state: state[0].rewrite_graph_schema(state[1])),
+    'rewrite_node_metadata': (_parsed, lambda graph: graph.rewrite_node_metadata('1', NODE_METADATA)),
+}
+
+
+def _time(setup: Callable, run: Callable, data: str, repeats: int, max_time: float) -> List[float]:
+    """
+    Времена repeats запусков в секундах. Запуски прекращаются раньше, если суммарно заняли больше max_time
+    """
+    times = list()
+    while len(times) < repeats and sum(times) <= max_time:
+        state = setup(data)
+        gc.collect()
+        start = time.perf_counter()
+        run(state)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def _peak_memory(setup: Callable, run: Callable, data: str) -> int:
+    """
+    Пиковый объем памяти в байтах, выделенной за время действия. Считается отдельным запуском,
+    тк tracemalloc сильно замедляет выполнение
+    """
+    state = setup(data)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        run(state)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def run_benchmarks(cases: List[str], shapes: List[str], sizes: List[int], seed: int = 0,
+                   repeats: int = 5, max_time: float = 2.0) -> Dict[str, Any]:
+    results = list()
+    for shape in shapes:
+        for size in sizes:
+            data = generate_dot(shape, size, seed)
+            nodes = len(Graph(data=data)._get_nodes_dict())
+            for case in cases:
+                setup, run = CASES[case]
+                times = _time(setup, run, data, repeats, max_time)
+                results.append({
+                    'case': case,
+                    'shape': shape,
+                    'size': size,
+                    'nodes': nodes,
+                    'repeats': len(times),
+                    'time_min': min(times),
+                    'time_median': statistics.median(times),
+                    'peak_memory': _peak_memory(setup, run, data),
+                })
+
+    return {
+        'version': BENCHMARK_VERSION,
+        'python': platform.python_version(),
+        'seed': seed,
+        'results': results,
+    }
+
+
+def _result_key(result: Dict[str, Any]) -> Tuple[str, str, int]:
+    return result['case'], result['shape'], result['size']
+
+
+def find_regressions(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float,
+                     min_time: float = 0.001) -> List[str]:
+    """
+    Описания замеров, в которых время (time_min) или пиковая память выросли больше чем в (1 + threshold) раз
+    по сравнению с baseline. Замеры быстрее min_time секунд по времени не сравниваются, тк слишком шумные
+    """
+    if baseline.get('version') != current.get('version'):
+        raise ValueError(f"baseline version {baseline.get('version')} != {current.get('version')}")
+
+    baseline_results = {_result_key(result): result for result in baseline['results']}
+    regressions = list()
+    for result in current['results']:
+        old = baseline_results.get(_result_key(result))
+        if old is None:
+            continue
+
+        name = '{} {} {}'.format(*_result_key(result))
+        if max(old['time_min'], result['time_min']) >= min_time and \
+                result['time_min'] > old['time_min'] * (1 + threshold):
+            regressions.append(f"{name}: time {old['time_min'] * 1000:.2f} ms -> {result['time_min'] * 1000:.2f} ms")
+        if result['peak_memory'] > old['peak_memory'] * (1 + threshold):
+            regressions.append(f"{name}: peak memory {old['peak_memory']} B -> {result['peak_memory']} B")
+    return regressions
@@ -0,0 +1,95 @@
+"""
+Сравнение расчета уровней графа (Graph._dot_to_dict_levels) с прежней рекурсивной реализацией
+"""
+import collections
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.models import Graph
+
+
+def legacy_dot_to_dict_levels(graph: Graph) -> Dict[int, Dict[str, List[str]]]:
+    """
+    Прежняя реализация Graph._dot_to_dict_levels: рекурсивный обход, который
+    заходит в вершину столько раз, сколько путей к ней ведет от A
+    """
+    dict_edges = graph._get_edges_dict()
+
+    edges_levels = collections.defaultdict(int)
+
+    def breadth_first_traversal(edge_index: str, level: int):
+        edges_levels[edge_index] = max(level, edges_levels[edge_index])
+        if edge_index not in dict_edges:
+            return
+        for next_edge in dict_edges[edge_index]:
+            breadth_first_traversal(next_edge['points'][1], level + 1)
+
+    breadth_first_traversal('A', 0)
+    for edge, level in edges_levels.items():
+        if edge == 'B':
+            continue
+        if level >= edges_levels['B']:
+            edges_levels['B'] += 1
+
+    prev = graph._get_parents()
+
+    raw_result = collections.defaultdict(dict)
+    for edge_index, edge_level in edges_levels.items():
+        raw_result[edge_level][edge_index] = prev[edge_index]
+
+    return dict(raw_result)
+
+
+def legacy_visits(graph: Graph) -> int:
+    """
+    Число заходов в вершины, которое сделает прежняя реализация: сумма по всем вершинам
+    количества путей к ним от A. Позволяет не запускать ее там, где она не завершится за разумное время
+    """
+    levels = graph._dot_to_dict_levels()
+    children = graph._get_children()
+
+    order = [node_id for _, nodes in sorted(levels.items()) for node_id in nodes]
+    paths = collections.defaultdict(int)
+    paths['A'] = 1
+    for node_id in order:
+        for next_index in children.get(node_id, ()):
+            paths[next_index] += paths[node_id]
+
+    return sum(paths.values())
+
+
+def measure(func, *args) -> Tuple[float, Any]:
+    """
+    Время выполнения func в секундах и ее результат
+    """
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def compare(data: str, legacy_max_visits: int) -> Dict[str, Optional[float]]:
+    """
+    Замеряет новую и прежнюю реализацию на одном графе.
+    Разбор DOT выполняется заранее, чтобы в замер попал только расчет уровней.
+    Прежняя реализация запускается, только если ей потребуется не больше legacy_max_visits заходов в вершины
+    """
+    graph = Graph(data=data)
+    graph._get_dot()
+
+    current_time, levels = measure(graph._dot_to_dict_levels)
+    result = {
+        'nodes': len(graph._get_nodes_dict()),
+        'current': current_time,
+        'legacy': None,
+        'legacy_visits': legacy_visits(graph),
+        'same_result': None,
+    }
+
+    if result['legacy_visits'] <= legacy_max_visits:
+        try:
+            result['legacy'], legacy_levels = measure(legacy_dot_to_dict_levels, graph)
+        except RecursionError:
+            return result
+        result['same_result'] = legacy_levels == levels
+
+    return result
@@ -0,0 +1,39 @@
+from unittest import TestCase
+
+from core.benchmarks.graph_ops import BENCHMARK_VERSION, find_regressions
+
+
+def _result(case: str, time_min: float, peak_memory: int, size: int = 100) -> dict:
+    return {'case': case, 'shape': 'deep', 'size': size, 'nodes': size + 2, 'repeats': 5,
+            'time_min': time_min, 'time_median': time_min, 'peak_memory': peak_memory}
+
+
+def _run(*results: dict) -> dict:
+    return {'version': BENCHMARK_VERSION, 'python': '3.11.0', 'seed': 0, 'results': list(results)}
+
+
+class TestFindRegressions(TestCase):
+    def test_threshold(self):
+        baseline = _run(_result('parse', 0.010, 1000), _result('valid_graph', 0.010, 1000))
+        current = _run(_result('parse', 0.0124, 1240), _result('valid_graph', 0.0126, 1260))
+
+        regressions = find_regressions(baseline, current, threshold=0.25)
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(regressions[0].startswith('valid_graph deep 100: time 10.00 ms -> 12.60 ms'))
+        self.assertTrue(regressions[1].startswith('valid_graph deep 100: peak memory 1000 B -> 1260 B'))
+
+        self.assertEqual(find_regressions(baseline, current, threshold=0.3), [])
+
+    def test_fast_cases_not_compared_by_time(self):
+        baseline = _run(_result('parse', 0.0001, 1000))
+        current = _run(_result('parse', 0.0005, 1000))
+        self.assertEqual(find_regressions(baseline, current, threshold=0.25), [])
+
+    def test_missing_baseline(self):
+        baseline = _run(_result('parse', 0.010, 1000))
+        current = _run(_result('parse', 0.010, 1000), _result('parse', 1.0, 10 ** 6, size=1000))
+        self.assertEqual(find_regressions(baseline, current, threshold=0.25), [],
+                         msg='замеры без пары в baseline не сравниваются')
+
+        with self.assertRaises(ValueError):
+            find_regressions({**baseline, 'version': BENCHMARK_VERSION - 1}, current, threshold=0.25)
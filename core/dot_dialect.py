@@ -0,0 +1,317 @@
+"""
+Быстрый разбор и сериализация ограниченного диалекта DOT, в котором хранится Graph.data.
+
+В Graph.data бывает только текст вида digraph{...} с объявлениями узлов, связями "->"
+и несколькими атрибутами узлов (title, subgraph). Для такого подмножества грамматика pydot
+(pyparsing) избыточна и очень медленная, поэтому здесь разбор делается одним проходом
+по токенам, а результат собирается сразу в структуру pydot.Dot - такую же, какую построил бы pydot.
+
+Если текст выходит за рамки диалекта, parse_dot возвращает None, и нужно использовать pydot.
+"""
+import collections
+import re
+from typing import Dict, List, Optional, Tuple
+
+import pydot
+
+from core.graph_index import NODE_ID_MAX_LENGTH
+
+# типы токенов
+_T_ARROW = 'arrow'
+_T_ID = 'id'
+_T_QUOTED = 'quoted'
+_T_PUNCT = 'punct'
+
+# pyparsing в pydot берет подряд идущие не-ASCII символы отдельным ID (alphastring_), склеивая их
+# с запятыми и пробелами; такие значения (title=Методологии) принимаются, только если за ними сразу идет "]",
+# в остальных случаях разбор отдается pydot
+_TOKEN_RE = re.compile(r'''
+    \s*(?:
+        (?P<arrow>->)
+        |(?P<id>[A-Za-z0-9_.]+|[^\x00-\x7f\s]+(?=\]))
+        |(?P<quoted>"(?:[^"\\]|\\.)*")
+        |(?P<punct>[{}\[\];,=])
+    )
+''', re.VERBOSE | re.DOTALL)
+_TRAILING_SPACE_RE = re.compile(r'\s*')
+
+# ключевые слова DOT, которые не могут быть айди узла в диалекте
+_KEYWORDS = ('graph', 'digraph', 'subgraph', 'node', 'edge', 'strict')
+
+# значения, которые pydot выводит без кавычек (см. pydot.needs_quotes)
+_PLAIN_ID_RE = re.compile(r'^(?:[_a-zA-Z][a-zA-Z0-9_,]*|[0-9,]+)$')
+
+
+class _NotInDialect(Exception):
+    """
+    Текст не относится к поддерживаемому диалекту DOT
+    """
+
+
+def _tokenize(text: str) -> List[Tuple[str, str]]:
+    tokens = list()
+    pos = 0
+    end = len(text)
+    match = _TOKEN_RE.match
+    while True:
+        m = match(text, pos)
+        if m is None:
+            if _TRAILING_SPACE_RE.match(text, pos).end() != end:
+                raise _NotInDialect()
+            return tokens
+        tokens.append((m.lastgroup, m.group(m.lastgroup)))
+        pos = m.end()
+
+
+class _Parser:
+    """
+    Разбор списка токенов в pydot.Dot без промежуточных объектов pydot.Node/pydot.Edge
+    """
+
+    def __init__(self, tokens: List[Tuple[str, str]]):
+        self.tokens = tokens
+        self.pos = 0
+        self.dot = pydot.Dot()
+        self.nodes = self.dot.obj_dict['nodes']
+        self.edges = self.dot.obj_dict['edges']
+        self.sequence = 1
+
+    def peek(self) -> Tuple[Optional[str], Optional[str]]:
+        if self.pos < len(self.tokens):
+            return self.tokens[self.pos]
+        return None, None
+
+    def take(self, kind: str, value: str = None) -> str:
+        t_kind, t_value = self.peek()
+        if t_kind != kind or (value is not None and t_value != value):
+            raise _NotInDialect()
+        self.pos += 1
+        return t_value
+
+    def take_node_id(self) -> str:
+        node_id = self.take(_T_ID)
+        # айди, которые pydot взял бы в кавычки, разбираются самим pydot
+        if not _is_plain_point(node_id):
+            raise _NotInDialect()
+        return node_id
+
+    def next_sequence(self) -> int:
+        seq = self.sequence
+        self.sequence += 1
+        return seq
+
+    def parse(self) -> pydot.Dot:
+        header = self.take(_T_ID)
+        # после очистки пробелов заголовок "digraph G {" превращается в "digraphG{"
+        if header[:7].lower() != 'digraph':
+            raise _NotInDialect()
+        name = header[7:]
+        if not name and self.peek()[0] == _T_ID:
+            name = self.take(_T_ID)
+        if name:
+            self.dot.set_name(name)
+
+        self.take(_T_PUNCT, '{')
+        while self.peek() != (_T_PUNCT, '}'):
+            self.parse_stmt()
+        self.take(_T_PUNCT, '}')
+        if self.peek() == (_T_PUNCT, ';'):
+            self.pos += 1
+
+        if self.pos != len(self.tokens):
+            raise _NotInDialect()
+
+        # чтобы узлы и связи, добавленные после разбора, вставали в конец, как и у pydot
+        self.dot.obj_dict['current_child_sequence'] = self.sequence
+        return self.dot
+
+    def parse_stmt(self):
+        points = [self.take_node_id()]
+        while self.peek()[0] == _T_ARROW:
+            self.pos += 1
+            points.append(self.take_node_id())
+
+        attrs = self.parse_attr_lists()
+        if self.peek() == (_T_PUNCT, ';'):
+            self.pos += 1
+
+        if len(points) == 1:
+            self.add_node(points[0], attrs)
+        else:
+            for src, dst in zip(points, points[1:]):
+                self.add_edge(src, dst, dict(attrs))
+
+    def parse_attr_lists(self) -> Dict[str, Optional[str]]:
+        attrs = dict()
+        while self.peek() == (_T_PUNCT, '['):
+            self.pos += 1
+            while self.peek() != (_T_PUNCT, ']'):
+                key = self.take(_T_ID)
+                value = None
+                if self.peek() == (_T_PUNCT, '='):
+                    self.pos += 1
+                    kind, value = self.peek()
+                    if kind not in (_T_ID, _T_QUOTED):
+                        raise _NotInDialect()
+                    self.pos += 1
+                attrs[key] = value
+                if self.peek() == (_T_PUNCT, ','):
+                    self.pos += 1
+            self.pos += 1
+        return attrs
+
+    def add_node(self, name: str, attrs: Dict[str, Optional[str]]):
+        obj_dict = {
+            'attributes': attrs,
+            'type': 'node',
+            'parent_graph': None,
+            'parent_node_list': None,
+            'sequence': self.next_sequence(),
+            'name': name,
+            'port': None,
+        }
+        # как и pydot, родительский граф проставляется только первому объявлению узла
+        if name in self.nodes:
+            self.nodes[name].append(obj_dict)
+        else:
+            obj_dict['parent_graph'] = self.dot
+            self.nodes[name] = [obj_dict]
+
+    def add_edge(self, src: str, dst: str, attrs: Dict[str, Optional[str]]):
+        obj_dict = {
+            'points': (src, dst),
+            'attributes': attrs,
+            'type': 'edge',
+            'parent_graph': self.dot,
+            'parent_edge_list': None,
+            'sequence': self.next_sequence(),
+        }
+        self.edges.setdefault((src, dst), list()).append(obj_dict)
+
+
+def parse_dot(text: str) -> Optional[pydot.Dot]:
+    """
+    Разбирает текст в диалекте Graph.data и возвращает тот же pydot.Dot, что и pydot.graph_from_dot_data.
+    Если текст не относится к диалекту - возвращает None.
+    """
+    try:
+        return _Parser(_tokenize(text)).parse()
+    except _NotInDialect:
+        return None
+
+
+def _quote(value) -> str:
+    if isinstance(value, str) and _PLAIN_ID_RE.match(value):
+        return value
+    return pydot.quote_if_necessary(value)
+
+
+def _attrs_to_string(attributes: Dict[str, any]) -> str:
+    attrs = list()
+    for key in sorted(attributes):
+        value = attributes[key]
+        if value == '':
+            value = '""'
+        if value is not None:
+            attrs.append(f'{key}={_quote(value)}')
+        else:
+            attrs.append(key)
+    return ', '.join(attrs)
+
+
+def _is_plain_point(point) -> bool:
+    return isinstance(point, str) and bool(_PLAIN_ID_RE.match(point)) and point.lower() not in _KEYWORDS
+
+
+def is_node_id(text: str) -> bool:
+    """
+    Проверяет, что строка может быть айди узла в диалекте Graph.data
+    """
+    return _is_plain_point(text) and len(text) <= NODE_ID_MAX_LENGTH
+
+
+def _in_dialect(dot: pydot.Dot) -> bool:
+    obj_dict = dot.obj_dict
+    if obj_dict.get('type') != 'digraph' or obj_dict.get('strict') or obj_dict.get('suppress_disconnected'):
+        return False
+    if obj_dict['attributes'] or obj_dict['subgraphs']:
+        return False
+    if not all(_is_plain_point(name) for name in obj_dict['nodes']):
+        return False
+    return all(_is_plain_point(src) and _is_plain_point(dst) for src, dst in obj_dict['edges'])
+
+
+def dump_dot(dot: pydot.Dot) -> str:
+    """
+    Сериализует граф в текст DOT. Результат совпадает с pydot.Dot.to_string(),
+    для графов вне диалекта используется сам pydot.
+    """
+    if not _in_dialect(dot):
+        return dot.to_string()
+
+    objs = list()
+    for obj_dicts in dot.obj_dict['nodes'].values():
+        objs.extend(obj_dicts)
+    for obj_dicts in dot.obj_dict['edges'].values():
+        objs.extend(obj_dicts)
+    objs.sort(key=lambda obj: obj['sequence'])
+
+    lines = [f"digraph {dot.obj_dict['name']} {{\n"]
+    for obj in objs:
+        attrs = _attrs_to_string(obj['attributes'])
+        if obj['type'] == 'node':
+            line = obj['name']
+            if attrs:
+                line += f' [{attrs}]'
+        else:
+            line = f"{obj['points'][0]} -> {obj['points'][1]}"
+            if attrs:
+                line += f'  [{attrs}]'
+        lines.append(line + ';\n')
+    lines.append('}\n')
+
+    return ''.join(lines)
+
+
+def dot_statements(dot: pydot.Dot) -> Optional[List[Tuple[str, Dict[str, Optional[str]]]]]:
+    """
+    Объявления узлов и связей графа в порядке их следования в тексте: (ключ, атрибуты).
+    Ключ узла - его айди, ключ связи - "откуда->куда", повторные объявления получают суффикс "#<номер повтора>".
+    Если граф не относится к диалекту - возвращает None.
+    """
+    if not _in_dialect(dot):
+        return None
+
+    objs = list()
+    for obj_dicts in dot.obj_dict['nodes'].values():
+        objs.extend(obj_dicts)
+    for obj_dicts in dot.obj_dict['edges'].values():
+        objs.extend(obj_dicts)
+    objs.sort(key=lambda obj: obj['sequence'])
+
+    statements = list()
+    repeats = collections.defaultdict(int)
+    for obj in objs:
+        key = obj['name'] if obj['type'] == 'node' else '->'.join(obj['points'])
+        if repeats[key]:
+            statements.append((f'{key}#{repeats[key]}', dict(obj['attributes'])))
+        else:
+            statements.append((key, dict(obj['attributes'])))
+        repeats[key] += 1
+    return statements
+
+
+def dump_statements(name: str, statements: List[Tuple[str, Dict[str, Optional[str]]]]) -> str:
+    """
+    Сериализует объявления в формате dot_statements в текст без пробельных символов,
+    как он хранится в Graph.data (совпадает с очищенным результатом dump_dot)
+    """
+    lines = [f'digraph{name}{{']
+    for key, attributes in statements:
+        line = key.split('#', 1)[0]
+        if attributes:
+            line += f'[{_attrs_to_string(attributes)}]'
+        lines.append(line + ';')
+    lines.append('}')
+
+    return re.sub(r'\s', '', ''.join(lines))
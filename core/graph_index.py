@@ -0,0 +1,332 @@
+"""
+Компактный индекс структуры графа для алгоритмов над Graph.
+
+Айди узлов заменяются порядковыми номерами, а связи хранятся в формате CSR:
+для каждого узла i его дочерние узлы лежат в child_targets[child_offsets[i]:child_offsets[i + 1]],
+родительские - в parent_targets[parent_offsets[i]:parent_offsets[i + 1]].
+Вместо словарей строк с множествами obj_dict pydot это несколько плоских массивов чисел,
+что в разы компактнее и быстрее обходится на графах из тысяч узлов.
+"""
+import collections
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pydot
+
+START_NODE_ID = 'A'
+FINISH_NODE_ID = 'B'
+
+# максимальная длина айди узла, по размеру колонок GraphNode.node_id и SubgraphRelation.node_id
+NODE_ID_MAX_LENGTH = 50
+
+# для графов больше этого размера транзитивное замыкание не строится: его размер растет квадратично
+CLOSURE_MAX_NODES = 5000
+
+
+class GraphValidationReport:
+    """
+    Отчет о проверке графа: для каждого нарушенного правила указаны узлы, на которых оно нарушено
+    """
+
+    MISSING_A_OR_B = 'missing_a_or_b'
+    DUPLICATE_NODES = 'duplicate_nodes'
+    UNDECLARED_NODES = 'undeclared_nodes'
+    CYCLE = 'cycle'
+    UNREACHABLE_NODES = 'unreachable_nodes'
+    LONG_NODE_IDS = 'long_node_ids'
+
+    DESCRIPTIONS = {
+        MISSING_A_OR_B: 'в графе нет начального или конечного узла',
+        DUPLICATE_NODES: 'узлы объявлены несколько раз',
+        UNDECLARED_NODES: 'в связях участвуют не объявленные узлы',
+        CYCLE: 'в графе есть цикл',
+        UNREACHABLE_NODES: 'узлы не достижимы из A',
+        LONG_NODE_IDS: f'айди узлов длиннее {NODE_ID_MAX_LENGTH} символов',
+    }
+
+    def __init__(self):
+        self.errors: Dict[str, List[str]] = dict()
+
+    def add(self, rule: str, node_ids: List[str]):
+        if node_ids:
+            self.errors[rule] = list(node_ids)
+
+    @property
+    def is_valid(self) -> bool:
+        return not self.errors
+
+    def get_messages(self) -> List[str]:
+        return [f'{self.DESCRIPTIONS[rule]}: {", ".join(node_ids)}' for rule, node_ids in self.errors.items()]
+
+
+def pack_bitset(bits: int, size: int) -> bytes:
+    """
+    Битовое множество из size элементов в виде байтов (младший бит первого байта - элемент 0)
+    """
+    return bits.to_bytes((size + 7) // 8, 'little')
+
+
+def unpack_bitset(data: bytes) -> int:
+    return int.from_bytes(data, 'little')
+
+
+def bitset_positions(bits: int) -> List[int]:
+    """
+    Номера элементов битового множества по возрастанию
+    """
+    result = list()
+    while bits:
+        lowest = bits & -bits
+        result.append(lowest.bit_length() - 1)
+        bits ^= lowest
+    return result
+
+
+def _csr(n: int, pairs: List[Tuple[int, int]]) -> Tuple[array, array]:
+    """
+    Раскладывает пары (откуда, куда) в массивы смещений и целей с сохранением порядка пар
+    """
+    offsets = array('l', bytes(array('l').itemsize * (n + 1)))
+    for src, _ in pairs:
+        offsets[src + 1] += 1
+    for i in range(n):
+        offsets[i + 1] += offsets[i]
+
+    targets = array('l', bytes(array('l').itemsize * len(pairs)))
+    fill = offsets[:-1]
+    for src, dst in pairs:
+        targets[fill[src]] = dst
+        fill[src] += 1
+
+    return offsets, targets
+
+
+class GraphIndex:
+    """
+    Неизменяемый индекс структуры графа. Узлы с номерами меньше declared_count объявлены в графе,
+    остальные встречаются только в связях
+    """
+
+    __slots__ = ('node_ids', 'positions', 'declared_count', 'duplicates',
+                 'child_offsets', 'child_targets', 'parent_offsets', 'parent_targets')
+
+    def __init__(self, declared: Iterable[str], edges: Iterable[Tuple[str, str]], duplicates: List[str] = ()):
+        self.node_ids: List[str] = list(declared)
+        self.positions: Dict[str, int] = {node_id: i for i, node_id in enumerate(self.node_ids)}
+        self.declared_count = len(self.node_ids)
+        self.duplicates: List[str] = list(duplicates)
+
+        pairs = list()
+        for src, dst in edges:
+            pairs.append((self._intern(src), self._intern(dst)))
+
+        n = len(self.node_ids)
+        self.child_offsets, self.child_targets = _csr(n, pairs)
+        self.parent_offsets, self.parent_targets = _csr(n, [(dst, src) for src, dst in pairs])
+
+    def _intern(self, node_id: str) -> int:
+        i = self.positions.get(node_id)
+        if i is None:
+            i = self.positions[node_id] = len(self.node_ids)
+            self.node_ids.append(node_id)
+        return i
+
+    @classmethod
+    def from_dot(cls, dot: pydot.Dot) -> 'GraphIndex':
+        nodes = dot.obj_dict['nodes']
+        return cls(
+            declared=nodes,
+            edges=(e['points'] for edges in dot.obj_dict['edges'].values() for e in edges),
+            duplicates=[node_id for node_id, objs in nodes.items() if len(objs) > 1],
+        )
+
+    # ДОСТУП К СТРУКТУРЕ
+
+    def __len__(self) -> int:
+        return len(self.node_ids)
+
+    def position(self, node_id: str) -> Optional[int]:
+        return self.positions.get(node_id)
+
+    def has_node(self, node_id: str) -> bool:
+        """
+        Проверяет, что узел объявлен в графе
+        """
+        i = self.positions.get(node_id)
+        return i is not None and i < self.declared_count
+
+    def children(self, i: int) -> array:
+        return self.child_targets[self.child_offsets[i]:self.child_offsets[i + 1]]
+
+    def parents(self, i: int) -> array:
+        return self.parent_targets[self.parent_offsets[i]:self.parent_offsets[i + 1]]
+
+    def get_children_dict(self) -> Dict[str, set]:
+        return {node_id: {self.node_ids[j] for j in self.children(i)} for i, node_id in enumerate(self.node_ids)}
+
+    def get_parents_dict(self) -> Dict[str, List[str]]:
+        return {node_id: self.parent_ids(i) for i, node_id in enumerate(self.node_ids)}
+
+    def parent_ids(self, i: int) -> List[str]:
+        return sorted({self.node_ids[j] for j in self.parents(i)})
+
+    # АЛГОРИТМЫ
+
+    def reachable_from(self, i: int, reverse: bool = False) -> bytearray:
+        """
+        Отметки узлов, достижимых из узла i (включая его самого).
+        При reverse=True обход идет по связям в обратную сторону, то есть отмечаются предки узла
+        """
+        if reverse:
+            offsets, targets = self.parent_offsets, self.parent_targets
+        else:
+            offsets, targets = self.child_offsets, self.child_targets
+        seen = bytearray(len(self.node_ids))
+        seen[i] = 1
+        stack = [i]
+        while stack:
+            u = stack.pop()
+            for k in range(offsets[u], offsets[u + 1]):
+                v = targets[k]
+                if not seen[v]:
+                    seen[v] = 1
+                    stack.append(v)
+        return seen
+
+    def topological_levels(self) -> Tuple[List[int], List[int]]:
+        """
+        Возвращает порядок обхода достижимых из A узлов (топологический, алгоритм Кана)
+        и уровни узлов - длину самого длинного пути до узла от A (-1 для недостижимых).
+        Каждая связь просматривается один раз
+        """
+        n = len(self.node_ids)
+        level = [-1] * n
+        a = self.positions.get(START_NODE_ID)
+        if a is None:
+            return [], level
+
+        offsets, targets = self.child_offsets, self.child_targets
+        reachable = self.reachable_from(a)
+        in_degree = [0] * n
+        for u in range(n):
+            if reachable[u]:
+                for k in range(offsets[u], offsets[u + 1]):
+                    in_degree[targets[k]] += 1
+
+        order = list()
+        level[a] = 0
+        queue = collections.deque([a])
+        while queue:
+            u = queue.popleft()
+            order.append(u)
+            next_level = level[u] + 1
+            for k in range(offsets[u], offsets[u + 1]):
+                v = targets[k]
+                if level[v] < next_level:
+                    level[v] = next_level
+                in_degree[v] -= 1
+                if in_degree[v] == 0:
+                    queue.append(v)
+
+        return order, level
+
+    def transitive_closure(self) -> Tuple[List[int], List[int], List[int]]:
+        """
+        Транзитивное замыкание графа: порядок обхода order (см. topological_levels) и для каждого узла
+        битовые множества его предков и потомков. Номер бита - позиция узла в order,
+        узлы, недостижимые из A, в множества не попадают
+        """
+        n = len(self.node_ids)
+        order, _ = self.topological_levels()
+        rank = [-1] * n
+        for k, u in enumerate(order):
+            rank[u] = k
+
+        descendants = [0] * n
+        for u in reversed(order):
+            bits = 0
+            for v in self.children(u):
+                bits |= descendants[v] | (1 << rank[v])
+            descendants[u] = bits
+
+        ancestors = [0] * n
+        for u in order:
+            bits = 0
+            for v in self.parents(u):
+                if rank[v] >= 0:
+                    bits |= ancestors[v] | (1 << rank[v])
+            ancestors[u] = bits
+
+        return order, ancestors, descendants
+
+    def levels(self) -> Dict[int, Dict[str, List[str]]]:
+        """
+        Уровни графа в формате Graph._dot_to_dict_levels
+        """
+        order, level = self.topological_levels()
+
+        # B всегда должна быть на последнем уровне
+        b = self.positions.get(FINISH_NODE_ID)
+        if b is not None and level[b] >= 0:
+            max_level = max((level[u] for u in order if u != b), default=-1)
+            if max_level >= level[b]:
+                level[b] = max_level + 1
+
+        raw_result = collections.defaultdict(dict)
+        for u in order:
+            raw_result[level[u]][self.node_ids[u]] = self.parent_ids(u)
+
+        return dict(sorted(raw_result.items()))
+
+    def validate(self) -> GraphValidationReport:
+        """
+        Проверка графа за один итеративный обход в глубину от A, см. Graph.validate_graph
+        """
+        report = GraphValidationReport()
+        node_ids = self.node_ids
+
+        report.add(GraphValidationReport.DUPLICATE_NODES, self.duplicates)
+        report.add(GraphValidationReport.LONG_NODE_IDS,
+                   [node_id for node_id in node_ids if len(node_id) > NODE_ID_MAX_LENGTH])
+        report.add(GraphValidationReport.UNDECLARED_NODES, node_ids[self.declared_count:])
+        report.add(GraphValidationReport.MISSING_A_OR_B,
+                   [i for i in (START_NODE_ID, FINISH_NODE_ID) if not self.has_node(i)])
+
+        a = self.positions.get(START_NODE_ID)
+        if a is None:
+            return report
+
+        # обход в глубину с раскраской вершин для поиска цикла
+        # см https://neerc.ifmo.ru/wiki/index.php?title=%D0%98%D1%81%D0%BF%D0%BE%D0%BB%D1%8C%D0%B7%D0%BE%D0%B2%D0%B0%D0%BD%D0%B8%D0%B5_%D0%BE%D0%B1%D1%85%D0%BE%D0%B4%D0%B0_%D0%B2_%D0%B3%D0%BB%D1%83%D0%B1%D0%B8%D0%BD%D1%83_%D0%B4%D0%BB%D1%8F_%D0%BF%D0%BE%D0%B8%D1%81%D0%BA%D0%B0_%D1%86%D0%B8%D0%BA%D0%BB%D0%B0
+        # вместо рекурсии - стек из вершин и позиций в списках их дочерних вершин
+        WHITE = 0
+        GRAY = 1
+        BLACK = 2
+        offsets, targets = self.child_offsets, self.child_targets
+        color = bytearray(len(node_ids))
+
+        color[a] = GRAY
+        path = [a]
+        cursor = [offsets[a]]
+        while path:
+            u = path[-1]
+            k = cursor[-1]
+            if k == offsets[u + 1]:
+                color[u] = BLACK
+                path.pop()
+                cursor.pop()
+                continue
+
+            cursor[-1] = k + 1
+            v = targets[k]
+            if color[v] == WHITE:
+                color[v] = GRAY
+                path.append(v)
+                cursor.append(offsets[v])
+            elif color[v] == GRAY and GraphValidationReport.CYCLE not in report.errors:
+                report.add(GraphValidationReport.CYCLE, [node_ids[i] for i in path[path.index(v):]])
+
+        report.add(GraphValidationReport.UNREACHABLE_NODES,
+                   [node_id for i, node_id in enumerate(node_ids) if color[i] == WHITE])
+
+        return report
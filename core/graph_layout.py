@@ -0,0 +1,124 @@
+"""
+Послойная укладка графа для отрисовки (схема Сугиямы).
+
+Слои - уровни графа (см. Graph._dot_to_dict_levels), внутри слоя узлы упорядочиваются
+методом барицентров так, чтобы связи между соседними слоями пересекались как можно реже.
+Связи, перескакивающие через слои, разбиваются фиктивными узлами на каждом промежуточном слое.
+"""
+from typing import Dict, List, Tuple
+
+# увеличивать при изменении алгоритма, чтобы не отдавать закешированную старую укладку
+LAYOUT_VERSION = 1
+
+DEFAULT_SWEEPS = 8
+
+
+def _layer_key(node) -> Tuple:
+    """
+    Начальный порядок в слое, не зависящий от порядка ключей в levels: сначала узлы по айди, затем фиктивные
+    """
+    if isinstance(node, tuple):
+        src, dst, _ = node
+        return 1, len(src), src, len(dst), dst
+    return 0, len(node), node
+
+
+def _count_crossings(upper: List, lower: List, down_edges: Dict[any, List[any]]) -> int:
+    """
+    Число пересечений связей между двумя соседними слоями - число инверсий в списке нижних концов связей,
+    упорядоченных по позиции верхнего конца. Инверсии считаются деревом Фенвика
+    """
+    lower_pos = {node: i for i, node in enumerate(lower)}
+    tree = [0] * (len(lower) + 1)
+
+    crossings = 0
+    seen = 0
+    for u in upper:
+        ends = sorted(lower_pos[v] for v in down_edges.get(u, ()))
+        for end in ends:
+            # сколько уже учтенных концов лежит не правее end
+            i, not_greater = end + 1, 0
+            while i > 0:
+                not_greater += tree[i]
+                i -= i & -i
+            crossings += seen - not_greater
+        for end in ends:
+            i = end + 1
+            while i <= len(lower):
+                tree[i] += 1
+                i += i & -i
+            seen += 1
+    return crossings
+
+
+def _reorder(layer: List, neighbors: Dict[any, List[any]], neighbor_pos: Dict[any, int]) -> List:
+    """
+    Сортирует слой по барицентрам соседей в соседнем слое.
+    Узлы без соседей остаются на своих местах
+    """
+    keys = dict()
+    for i, node in enumerate(layer):
+        positions = [neighbor_pos[n] for n in neighbors.get(node, ())]
+        keys[node] = sum(positions) / len(positions) if positions else float(i)
+    return sorted(layer, key=lambda node: keys[node])
+
+
+def layered_layout(levels: Dict[any, Dict[str, List[str]]],
+                   sweeps: int = DEFAULT_SWEEPS) -> Dict[str, Dict[str, int]]:
+    """
+    Координаты узлов {айди_узла: {'level': номер_уровня, 'order': позиция_в_уровне}} по уровням графа
+    (в формате Graph._dot_to_dict_levels, ключи уровней могут быть строками, как в Graph.levels)
+    """
+    level_numbers = sorted(int(level) for level in levels)
+    node_levels = {node_id: int(level) for level, nodes in levels.items() for node_id in nodes}
+    layer_index = {level: i for i, level in enumerate(level_numbers)}
+
+    # слои с фиктивными узлами, фиктивный узел - кортеж (откуда, куда, слой)
+    layers: List[List] = [list() for _ in level_numbers]
+    for node_id, level in node_levels.items():
+        layers[layer_index[level]].append(node_id)
+    down_edges: Dict[any, List[any]] = dict()
+    up_edges: Dict[any, List[any]] = dict()
+
+    for level, nodes in levels.items():
+        for node_id, parents in nodes.items():
+            for parent in parents:
+                if parent not in node_levels:
+                    continue
+                chain = [parent]
+                for i in range(layer_index[node_levels[parent]] + 1, layer_index[int(level)]):
+                    dummy = (parent, node_id, i)
+                    layers[i].append(dummy)
+                    chain.append(dummy)
+                chain.append(node_id)
+                for u, v in zip(chain, chain[1:]):
+                    down_edges.setdefault(u, list()).append(v)
+                    up_edges.setdefault(v, list()).append(u)
+    layers = [sorted(layer, key=_layer_key) for layer in layers]
+
+    def total_crossings() -> int:
+        return sum(_count_crossings(layers[i], layers[i + 1], down_edges) for i in range(len(layers) - 1))
+
+    best_layers = [list(layer) for layer in layers]
+    best_crossings = total_crossings()
+    for sweep in range(sweeps):
+        if best_crossings == 0:
+            break
+        if sweep % 2 == 0:
+            for i in range(1, len(layers)):
+                layers[i] = _reorder(layers[i], up_edges, {n: k for k, n in enumerate(layers[i - 1])})
+        else:
+            for i in range(len(layers) - 2, -1, -1):
+                layers[i] = _reorder(layers[i], down_edges, {n: k for k, n in enumerate(layers[i + 1])})
+
+        crossings = total_crossings()
+        if crossings < best_crossings:
+            best_crossings = crossings
+            best_layers = [list(layer) for layer in layers]
+
+    layout = dict()
+    for level, layer in zip(level_numbers, best_layers):
+        real_nodes = [node for node in layer if not isinstance(node, tuple)]
+        for order, node_id in enumerate(real_nodes):
+            layout[node_id] = {'level': level, 'order': order}
+    return layout
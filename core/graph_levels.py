@@ -0,0 +1,119 @@
+"""
+Поддержка уровней графа (см. Graph._dot_to_dict_levels) при точечных изменениях структуры.
+
+Хранятся "сырые" уровни узлов - длина самого длинного пути от A (-1 для недостижимых),
+правило "B всегда на последнем уровне" применяется только при выдаче результата.
+После изменения связи пересчитываются только узлы ниже по течению от ее конца.
+"""
+import collections
+from typing import Dict, List, Set
+
+from core.graph_index import GraphIndex, START_NODE_ID, FINISH_NODE_ID
+
+
+class IncrementalLevels:
+    """
+    Уровни графа, которые обновляются вместе с изменениями связей.
+    parents и children - списки смежности графа, их обновляет владелец (см. GraphEditor),
+    после чего сообщает об изменении методами edge_added/edge_removed/node_added/node_removed
+    """
+
+    def __init__(self, level: Dict[str, int], parents: Dict[str, Set[str]], children: Dict[str, Set[str]]):
+        self.level = level
+        self.parents = parents
+        self.children = children
+
+    @classmethod
+    def from_index(cls, index: GraphIndex, parents: Dict[str, Set[str]],
+                   children: Dict[str, Set[str]]) -> 'IncrementalLevels':
+        """
+        Полный расчет уровней по индексу графа
+        """
+        _, level = index.topological_levels()
+        return cls(dict(zip(index.node_ids, level)), parents, children)
+
+    @classmethod
+    def from_levels(cls, levels: Dict[any, Dict[str, List[str]]], parents: Dict[str, Set[str]],
+                    children: Dict[str, Set[str]]) -> 'IncrementalLevels':
+        """
+        Восстановление из уже рассчитанных уровней (например, сохраненных в Graph.levels)
+        """
+        level = collections.defaultdict(lambda: -1)
+        for number, nodes in levels.items():
+            for node_id in nodes:
+                level[node_id] = int(number)
+
+        result = cls(level, parents, children)
+        # уровень B в levels мог быть сдвинут, сырой уровень восстанавливается по родителям
+        if FINISH_NODE_ID in level:
+            level[FINISH_NODE_ID] = result._level_from_parents(FINISH_NODE_ID)
+        return result
+
+    def _level_from_parents(self, node_id: str) -> int:
+        if node_id == START_NODE_ID:
+            return 0
+        return max((self.level[p] + 1 for p in self.parents.get(node_id, ()) if self.level[p] >= 0), default=-1)
+
+    def _update_downstream(self, start: str):
+        """
+        Пересчитывает уровни start и всех его потомков в топологическом порядке (алгоритм Кана внутри области)
+        """
+        region = {start}
+        stack = [start]
+        while stack:
+            for child in self.children.get(stack.pop(), ()):
+                if child not in region:
+                    region.add(child)
+                    stack.append(child)
+
+        in_degree = {node_id: 0 for node_id in region}
+        for node_id in region:
+            for child in self.children.get(node_id, ()):
+                in_degree[child] += 1
+
+        queue = collections.deque(node_id for node_id, degree in in_degree.items() if degree == 0)
+        while queue:
+            node_id = queue.popleft()
+            self.level[node_id] = self._level_from_parents(node_id)
+            for child in self.children.get(node_id, ()):
+                in_degree[child] -= 1
+                if in_degree[child] == 0:
+                    queue.append(child)
+
+    # ИЗМЕНЕНИЯ ГРАФА
+
+    def node_added(self, node_id: str):
+        self.level[node_id] = -1
+
+    def node_removed(self, node_id: str):
+        # связи узла к этому моменту уже удалены
+        self.level.pop(node_id, None)
+
+    def edge_added(self, src: str, dst: str):
+        if self.level[src] >= 0 and self.level[src] + 1 > self.level[dst]:
+            self._update_downstream(dst)
+
+    def edge_removed(self, src: str, dst: str):
+        if self.level[src] >= 0 and self.level[src] + 1 == self.level[dst]:
+            self._update_downstream(dst)
+
+    # РЕЗУЛЬТАТ
+
+    def levels(self) -> Dict[int, Dict[str, List[str]]]:
+        """
+        Уровни графа в формате Graph._dot_to_dict_levels
+        """
+        level = dict(self.level)
+
+        # B всегда должна быть на последнем уровне
+        if level.get(FINISH_NODE_ID, -1) >= 0:
+            max_level = max((lvl for node_id, lvl in level.items() if node_id != FINISH_NODE_ID), default=-1)
+            if max_level >= level[FINISH_NODE_ID]:
+                level[FINISH_NODE_ID] = max_level + 1
+
+        raw_result = collections.defaultdict(dict)
+        for node_id, lvl in level.items():
+            if lvl >= 0:
+                raw_result[lvl][node_id] = sorted(self.parents.get(node_id, ()))
+
+        return dict(sorted(raw_result.items()))
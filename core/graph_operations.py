@@ -0,0 +1,199 @@
+"""
+Точечные изменения структуры графа.
+
+Операции применяются прямо к obj_dict разобранного pydot.Dot и проверяются по одной:
+для каждой проверяется только то, что она затрагивает (существование узлов и связей,
+отсутствие цикла для новой связи), без пересборки графа.
+Итоговая связность графа проверяется как обычно - при сохранении (см. Graph.validate_graph).
+"""
+import collections
+from typing import Dict, List, Optional, Set
+
+import pydot
+
+from core.dot_dialect import is_node_id
+from core.graph_index import START_NODE_ID, FINISH_NODE_ID
+
+ADD_NODE = 'add_node'
+REMOVE_NODE = 'remove_node'
+ADD_EDGE = 'add_edge'
+REMOVE_EDGE = 'remove_edge'
+INSERT_BETWEEN = 'insert_between'
+SET_ATTR = 'set_attr'
+
+# обязательные поля каждой операции
+OPERATION_FIELDS = {
+    ADD_NODE: ('node_id',),
+    REMOVE_NODE: ('node_id',),
+    ADD_EDGE: ('src', 'dst'),
+    REMOVE_EDGE: ('src', 'dst'),
+    INSERT_BETWEEN: ('src', 'dst', 'node_id'),
+    SET_ATTR: ('node_id', 'key'),
+}
+
+# метаданные узла, которые можно менять операциями
+EDITABLE_ATTRS = ('title', 'subgraph')
+
+
+class GraphOperationError(ValueError):
+    pass
+
+
+class GraphEditor:
+    """
+    Применяет операции к графу на месте. Для проверки циклов держит
+    списки смежности, которые обновляются вместе с графом
+    """
+
+    def __init__(self, dot: pydot.Dot):
+        self.dot = dot
+        self.nodes = dot.obj_dict['nodes']
+        self.edges = dot.obj_dict['edges']
+        self.children: Dict[str, Set[str]] = collections.defaultdict(set)
+        self.parents: Dict[str, Set[str]] = collections.defaultdict(set)
+        for src, dst in self.edges:
+            self.children[src].add(dst)
+            self.parents[dst].add(src)
+
+        self.removed_nodes: Set[str] = set()
+        # уровни графа, которые обновляются вместе с ним (см. core.graph_levels), подключаются владельцем
+        self.levels = None
+
+    def apply(self, operations: List[Dict[str, any]]):
+        handlers = {
+            ADD_NODE: lambda op: self.add_node(op['node_id'], op.get('attrs')),
+            REMOVE_NODE: lambda op: self.remove_node(op['node_id']),
+            ADD_EDGE: lambda op: self.add_edge(op['src'], op['dst']),
+            REMOVE_EDGE: lambda op: self.remove_edge(op['src'], op['dst']),
+            INSERT_BETWEEN: lambda op: self.insert_between(op['src'], op['dst'], op['node_id'], op.get('attrs')),
+            SET_ATTR: lambda op: self.set_attr(op['node_id'], op['key'], op.get('value')),
+        }
+
+        for i, op in enumerate(operations):
+            try:
+                handlers[op['op']](op)
+            except GraphOperationError as e:
+                raise GraphOperationError(f'operation {i} ({op["op"]}): {e}')
+
+    # ПРОВЕРКИ
+
+    def _check_node_exists(self, node_id: str):
+        if node_id not in self.nodes:
+            raise GraphOperationError(f'node {node_id} is not in the graph')
+
+    def _check_edge_exists(self, src: str, dst: str):
+        if (src, dst) not in self.edges:
+            raise GraphOperationError(f'edge {src}->{dst} is not in the graph')
+
+    def _reachable(self, src: str, dst: str) -> bool:
+        """
+        Есть ли путь из src в dst. Обходятся только узлы, достижимые из src
+        """
+        seen = {src}
+        stack = [src]
+        while stack:
+            node_id = stack.pop()
+            if node_id == dst:
+                return True
+            for next_id in self.children.get(node_id, ()):
+                if next_id not in seen:
+                    seen.add(next_id)
+                    stack.append(next_id)
+        return False
+
+    # ОПЕРАЦИИ
+
+    def add_node(self, node_id: str, attrs: Optional[Dict[str, str]] = None):
+        if not is_node_id(node_id):
+            raise GraphOperationError(f'invalid node id {node_id}')
+        if node_id in self.nodes:
+            raise GraphOperationError(f'node {node_id} is already in the graph')
+
+        self.nodes[node_id] = [{
+            'attributes': dict(),
+            'type': 'node',
+            'parent_graph': self.dot,
+            'parent_node_list': None,
+            'sequence': self.dot.get_next_sequence_number(),
+            'name': node_id,
+            'port': None,
+        }]
+        self.removed_nodes.discard(node_id)
+        if self.levels is not None:
+            self.levels.node_added(node_id)
+        for key, value in (attrs or dict()).items():
+            self.set_attr(node_id, key, value)
+
+    def remove_node(self, node_id: str):
+        if node_id in (START_NODE_ID, FINISH_NODE_ID):
+            raise GraphOperationError(f'node {node_id} cannot be removed')
+        self._check_node_exists(node_id)
+
+        for dst in list(self.children.get(node_id, ())):
+            self.remove_edge(node_id, dst)
+        for src in list(self.parents.get(node_id, ())):
+            self.remove_edge(src, node_id)
+        del self.nodes[node_id]
+        self.removed_nodes.add(node_id)
+        if self.levels is not None:
+            self.levels.node_removed(node_id)
+
+    def add_edge(self, src: str, dst: str):
+        self._check_node_exists(src)
+        self._check_node_exists(dst)
+        if (src, dst) in self.edges:
+            raise GraphOperationError(f'edge {src}->{dst} is already in the graph')
+        if self._reachable(dst, src):
+            raise GraphOperationError(f'edge {src}->{dst} creates a cycle')
+
+        self.edges[(src, dst)] = [{
+            'points': (src, dst),
+            'attributes': dict(),
+            'type': 'edge',
+            'parent_graph': self.dot,
+            'parent_edge_list': None,
+            'sequence': self.dot.get_next_sequence_number(),
+        }]
+        self.children[src].add(dst)
+        self.parents[dst].add(src)
+        if self.levels is not None:
+            self.levels.edge_added(src, dst)
+
+    def remove_edge(self, src: str, dst: str):
+        self._check_edge_exists(src, dst)
+
+        del self.edges[(src, dst)]
+        self.children[src].discard(dst)
+        self.parents[dst].discard(src)
+        if self.levels is not None:
+            self.levels.edge_removed(src, dst)
+
+    def insert_between(self, src: str, dst: str, node_id: str, attrs: Optional[Dict[str, str]] = None):
+        """
+        Заменяет связь src->dst на src->node_id->dst
+        """
+        self._check_edge_exists(src, dst)
+
+        self.add_node(node_id, attrs)
+        self.remove_edge(src, dst)
+        self.add_edge(src, node_id)
+        self.add_edge(node_id, dst)
+
+    def set_attr(self, node_id: str, key: str, value: Optional[str]):
+        """
+        Устанавливает метаданные узла, пустое значение удаляет их
+        """
+        if key not in EDITABLE_ATTRS:
+            raise GraphOperationError(f'attribute {key} cannot be changed')
+        self._check_node_exists(node_id)
+
+        attributes = self.nodes[node_id][0]['attributes']
+        value = '' if value is None else str(value).strip()
+        if not value:
+            attributes.pop(key, None)
+        elif key == 'subgraph':
+            if not value.isdigit():
+                raise GraphOperationError('subgraph id must be a non-negative integer')
+            attributes[key] = value
+        else:
+            attributes[key] = value.replace(' ', '_')
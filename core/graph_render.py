@@ -0,0 +1,68 @@
+"""
+Отрисовка графов в SVG/PNG программой dot из Graphviz.
+
+Одновременно запускается не больше GRAPH_RENDER_CONCURRENCY процессов dot, каждый ограничен по времени.
+Результат кладется в кеш на диске по хешу DOT, поэтому один и тот же граф рисуется один раз.
+"""
+import subprocess
+import threading
+from typing import Callable
+
+from sci_activity_doc.disk_cache import DiskCache
+from sci_activity_doc.settings import GRAPH_RENDER_CACHE_DIR, GRAPH_RENDER_CACHE_MAX_SIZE, \
+    GRAPH_RENDER_CONCURRENCY, GRAPH_RENDER_DOT_BINARY, GRAPH_RENDER_TIMEOUT
+
+# формат -> content type ответа
+RENDER_FORMATS = {
+    'svg': 'image/svg+xml',
+    'png': 'image/png',
+}
+
+
+class GraphRenderError(Exception):
+    pass
+
+
+class GraphRenderBusy(GraphRenderError):
+    """
+    Все процессы dot заняты дольше, чем GRAPH_RENDER_TIMEOUT
+    """
+    pass
+
+
+render_cache = DiskCache(GRAPH_RENDER_CACHE_DIR, GRAPH_RENDER_CACHE_MAX_SIZE)
+_render_slots = threading.BoundedSemaphore(GRAPH_RENDER_CONCURRENCY)
+
+
+def _run_dot(data: str, fmt: str) -> bytes:
+    if not _render_slots.acquire(timeout=GRAPH_RENDER_TIMEOUT):
+        raise GraphRenderBusy('все процессы отрисовки заняты')
+    try:
+        proc = subprocess.run([GRAPH_RENDER_DOT_BINARY, f'-T{fmt}'], input=data.encode(),
+                              capture_output=True, timeout=GRAPH_RENDER_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        raise GraphRenderError(f'отрисовка не уложилась в {GRAPH_RENDER_TIMEOUT} с')
+    except OSError as e:
+        raise GraphRenderError(f'не удалось запустить {GRAPH_RENDER_DOT_BINARY}: {e}')
+    finally:
+        _render_slots.release()
+
+    if proc.returncode != 0:
+        raise GraphRenderError(proc.stderr.decode(errors='replace').strip())
+    return proc.stdout
+
+
+def render_graph(get_data: Callable[[], str], data_hash: str, fmt: str) -> bytes:
+    """
+    Отрисовка графа в формате fmt (см. RENDER_FORMATS). data_hash - хеш графа, ключ кеша.
+    get_data возвращает текст DOT для dot и вызывается, только если изображения нет в кеше
+    """
+    if fmt not in RENDER_FORMATS:
+        raise ValueError(f'unsupported format {fmt}')
+
+    key = f'{data_hash}.{fmt}'
+    content = render_cache.get(key)
+    if content is None:
+        content = _run_dot(get_data(), fmt)
+        render_cache.set(key, content)
+    return content
@@ -0,0 +1,72 @@
+"""
+Структурные изменения (дельты) между версиями Graph.data для истории версий графа (см. GraphVersion).
+
+Дельта перечисляет удаленные объявления узлов и связей, объявления с измененными атрибутами
+и добавленные объявления (в порядке следования, они дописываются в конец):
+
+    {
+        'removed': [<ключ>, ...],
+        'changed': [[<ключ>, {<атрибуты>}], ...],
+        'added': [[<ключ>, {<атрибуты>}], ...],
+    }
+
+Ключи - как в core.dot_dialect.dot_statements: "1" для узла, "1->2" для связи.
+Дельта строится только если ее применение к прежнему тексту дает в точности новый текст,
+иначе (граф вне диалекта, порядок объявлений переставлен) нужно сохранять полный текст.
+"""
+from typing import Dict, List, Optional, Tuple
+
+import pydot
+
+from core.dot_dialect import dot_statements, dump_statements, parse_dot
+
+Statements = List[Tuple[str, Dict[str, Optional[str]]]]
+
+
+def _parse(data: str) -> Tuple[Optional[str], Optional[Statements]]:
+    return _statements(parse_dot(data))
+
+
+def _statements(dot: Optional[pydot.Dot]) -> Tuple[Optional[str], Optional[Statements]]:
+    if dot is None:
+        return None, None
+    return dot.obj_dict['name'], dot_statements(dot)
+
+
+def _apply(statements: Statements, delta: dict) -> Statements:
+    removed = set(delta['removed'])
+    changed = dict((key, attrs) for key, attrs in delta['changed'])
+
+    result = [(key, changed.get(key, attrs)) for key, attrs in statements if key not in removed]
+    result.extend((key, attrs) for key, attrs in delta['added'])
+    return result
+
+
+def make_delta(old_data: str, new_data: str, new_dot: pydot.Dot = None) -> Optional[dict]:
+    """
+    Дельта, переводящая old_data в new_data, или None, если такой дельтой new_data не восстановить.
+    new_dot - уже разобранный new_data, если он есть, тогда new_data заново не разбирается
+    """
+    old_name, old_statements = _parse(old_data)
+    new_name, new_statements = _parse(new_data) if new_dot is None else _statements(new_dot)
+    if old_statements is None or new_statements is None or old_name != new_name:
+        return None
+
+    old = dict(old_statements)
+    new = dict(new_statements)
+    delta = {
+        'removed': [key for key in old if key not in new],
+        'changed': [[key, new[key]] for key in old if key in new and old[key] != new[key]],
+        'added': [[key, attrs] for key, attrs in new_statements if key not in old],
+    }
+
+    if dump_statements(new_name, _apply(old_statements, delta)) != new_data:
+        return None
+    return delta
+
+
+def apply_delta(data: str, delta: dict) -> str:
+    name, statements = _parse(data)
+    if statements is None:
+        raise ValueError('graph data is not in the supported DOT dialect')
+    return dump_statements(name, _apply(statements, delta))
@@ -0,0 +1,53 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmarks.dags import SHAPES
+from core.benchmarks.graph_ops import CASES, find_regressions, run_benchmarks
+
+
+class Command(BaseCommand):
+    help = 'Замеряет время и пиковую память основных операций Graph на синтетических графах разного размера. ' \
+           'Результат выводится в JSON, с --compare сравнивается с сохраненным ранее результатом'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cases', nargs='+', choices=sorted(CASES), default=list(CASES),
+                            help='замеряемые операции')
+        parser.add_argument('--shapes', nargs='+', choices=sorted(SHAPES), default=sorted(SHAPES),
+                            help='формы графов')
+        parser.add_argument('--sizes', nargs='+', type=int, default=[10, 100, 1000, 10000],
+                            help='число внутренних узлов графа')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--repeats', type=int, default=5,
+                            help='число запусков каждой операции')
+        parser.add_argument('--max-time', type=float, default=2.0,
+                            help='запуски операции прекращаются, когда суммарно заняли больше этого числа секунд')
+        parser.add_argument('--output', help='файл для результата, по умолчанию вывод в stdout')
+        parser.add_argument('--compare', metavar='BASELINE',
+                            help='файл с сохраненным ранее результатом, команда завершается ошибкой при регрессиях')
+        parser.add_argument('--threshold', type=float, default=0.25,
+                            help='допустимый относительный рост времени и памяти при --compare')
+
+    def handle(self, *args, **options):
+        result = run_benchmarks(options['cases'], options['shapes'], sorted(options['sizes']),
+                                options['seed'], max(options['repeats'], 1), options['max_time'])
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(result, f, indent=2)
+        else:
+            self.stdout.write(json.dumps(result, indent=2))
+
+        if options['compare']:
+            with open(options['compare']) as f:
+                baseline = json.load(f)
+            try:
+                regressions = find_regressions(baseline, result, options['threshold'])
+            except ValueError as e:
+                raise CommandError(str(e))
+
+            if regressions:
+                for regression in regressions:
+                    self.stderr.write(regression)
+                raise CommandError(f'регрессий: {len(regressions)}')
+            self.stderr.write(self.style.SUCCESS('регрессий нет'))
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from core.benchmarks.dags import SHAPES, generate_dot
+from core.benchmarks.levels import compare
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает время расчета уровней графа с прежней рекурсивной реализацией ' \
+           'на синтетических графах разной формы'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--shapes', nargs='+', choices=sorted(SHAPES), default=sorted(SHAPES),
+                            help='формы графов')
+        parser.add_argument('--sizes', nargs='+', type=int, default=[10, 20, 40, 60, 100, 500, 2000],
+                            help='число внутренних узлов графа')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--legacy-max-visits', type=int, default=2_000_000,
+                            help='прежняя реализация не запускается, если ей придется зайти в вершины '
+                                 'больше этого числа раз (число растет экспоненциально с глубиной графа)')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'shape':<8} {'size':>6} {'nodes':>6} {'legacy visits':>14} {'current, ms':>12} "
+                          f"{'legacy, ms':>12} {'speed-up':>9}  same")
+
+        for shape in options['shapes']:
+            for size in sorted(options['sizes']):
+                result = compare(generate_dot(shape, size, options['seed']), options['legacy_max_visits'])
+
+                if result['legacy'] is not None:
+                    legacy = f"{result['legacy'] * 1000:.2f}"
+                    speed_up = f"{result['legacy'] / max(result['current'], 1e-9):.1f}x"
+                elif result['legacy_visits'] > options['legacy_max_visits']:
+                    legacy, speed_up = 'skipped', '-'
+                else:
+                    legacy, speed_up = 'recursion', '-'
+
+                visits = f"{result['legacy_visits']:.3g}"
+                same = '-' if result['same_result'] is None else str(result['same_result'])
+                self.stdout.write(f"{shape:<8} {size:>6} {result['nodes']:>6} {visits:>14} "
+                                  f"{result['current'] * 1000:>12.2f} {legacy:>12} {speed_up:>9}  {same}")
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from core.benchmarks.dags import SHAPES
+from core.benchmarks.dataset import generate_dataset
+
+
+class Command(BaseCommand):
+    help = 'Заполняет базу синтетическими пользователями, исследованиями, графами и заметками ' \
+           'для нагрузочных замеров. При одинаковых параметрах создается одна и та же база'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prefix', default='bench',
+                            help='префикс логинов и айди исследований, должен быть уникальным в базе')
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--researches', type=int, default=200)
+        parser.add_argument('--graphs-per-research', type=int, default=5)
+        parser.add_argument('--nodes', type=int, default=1000,
+                            help='наибольшее число внутренних узлов графа, наименьшее - вдвое меньше')
+        parser.add_argument('--shapes', nargs='+', choices=sorted(SHAPES), default=sorted(SHAPES),
+                            help='формы графов')
+        parser.add_argument('--notes-per-graph', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        counts = generate_dataset(
+            prefix=options['prefix'],
+            users=options['users'],
+            researches=options['researches'],
+            graphs_per_research=options['graphs_per_research'],
+            nodes=options['nodes'],
+            shapes=options['shapes'],
+            notes_per_graph=options['notes_per_graph'],
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+        )
+        self.stdout.write(', '.join(f'{name}: {count}' for name, count in counts.items()))
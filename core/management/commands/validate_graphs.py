@@ -0,0 +1,110 @@
+import multiprocessing
+import os
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.models import Graph
+
+
+def _init_worker():
+    # при запуске процессов через spawn Django в дочернем процессе еще не настроен
+    django.setup()
+
+
+def _check_graph(row: Tuple[int, str, dict, dict]) -> Tuple[int, List[str], Optional[Tuple[dict, dict]]]:
+    """
+    Проверка одного графа в процессе пула. Возвращает айди графа, список нарушенных правил
+    и пересчитанные (levels, nodes_metadata), если сохраненные устарели
+    """
+    graph_id, data, levels, nodes_metadata = row
+    graph = Graph(graph_id=graph_id, data=data)
+    try:
+        report = graph.validate_graph()
+        if not report.is_valid:
+            return graph_id, report.get_messages(), None
+
+        graph.update_derived_fields()
+    except Exception as e:
+        return graph_id, [f'граф не разбирается: {e}'], None
+
+    if graph.levels == levels and graph.nodes_metadata == nodes_metadata:
+        return graph_id, [], None
+    return graph_id, [], (graph.levels, graph.nodes_metadata)
+
+
+def _batches(iterable: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class Command(BaseCommand):
+    help = 'Проверяет все графы в базе по правилам Graph.validate_graph и сверяет сохраненные ' \
+           'levels и nodes_metadata с пересчитанными по data. Графы проверяются параллельно в пуле процессов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='число процессов, при 1 проверка идет в текущем процессе')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='сколько графов читается из базы и отдается в пул за раз')
+        parser.add_argument('--repair', action='store_true',
+                            help='записать пересчитанные levels и nodes_metadata там, где они устарели, '
+                                 'и привести в соответствие строки GraphNode и SubgraphRelation этих графов')
+
+    def handle(self, *args, **options):
+        batch_size = max(options['batch_size'], 1)
+        workers = max(options['workers'], 1)
+
+        # iterator() читает строки порциями через курсор на стороне сервера, не загружая всю таблицу в память
+        rows = Graph.objects. \
+            order_by('graph_id'). \
+            values_list('graph_id', 'data', 'levels', 'nodes_metadata'). \
+            iterator(chunk_size=batch_size)
+
+        checked = invalid = stale = 0
+        pool = multiprocessing.Pool(workers, initializer=_init_worker) if workers > 1 else None
+        try:
+            for batch in _batches(rows, batch_size):
+                if pool is None:
+                    results = map(_check_graph, batch)
+                else:
+                    results = pool.imap_unordered(_check_graph, batch, chunksize=max(len(batch) // (workers * 4), 1))
+
+                data = {graph_id: graph_data for graph_id, graph_data, _, _ in batch}
+                to_update = list()
+                for graph_id, errors, derived in results:
+                    checked += 1
+                    if errors:
+                        invalid += 1
+                        self.stdout.write(self.style.ERROR(f'граф {graph_id}: {"; ".join(errors)}'))
+                    elif derived is not None:
+                        stale += 1
+                        self.stdout.write(self.style.WARNING(f'граф {graph_id}: устарели levels или nodes_metadata'))
+                        levels, nodes_metadata = derived
+                        to_update.append(Graph(graph_id=graph_id, data=data[graph_id], levels=levels,
+                                               nodes_metadata=nodes_metadata))
+
+                if options['repair'] and to_update:
+                    self._repair(to_update)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+        summary = f'проверено графов: {checked}, с ошибками: {invalid}, с устаревшими производными полями: {stale}'
+        if options['repair']:
+            summary += f', исправлено: {stale}'
+        self.stdout.write(summary)
+
+    @staticmethod
+    @transaction.atomic
+    def _repair(graphs: List[Graph]):
+        Graph.objects.bulk_update(graphs, ['levels', 'nodes_metadata'])
+        # таблицы, построенные по устаревшим метаданным, тоже могут быть устаревшими
+        for graph in graphs:
+            graph._sync_graph_nodes()
+            graph._sync_subgraph_relations()
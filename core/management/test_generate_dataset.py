@@ -0,0 +1,27 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from core.models import Graph, GraphNode, NodesNotesRelation, Note, Research, User
+
+
+class TestGenerateDataset(TestCase):
+    def test_counts(self):
+        out = StringIO()
+        call_command('generate_dataset', prefix='t', users=3, researches=4, graphs_per_research=2, nodes=10,
+                     notes_per_graph=2, batch_size=3, stdout=out)
+
+        self.assertEqual(User.objects.filter(username__startswith='t_user_').count(), 3)
+        self.assertEqual(Research.objects.filter(rsrch_id__startswith='t-').count(), 4)
+        self.assertEqual(Graph.objects.count(), 8)
+        self.assertEqual(Note.objects.count(), 16)
+        self.assertEqual(NodesNotesRelation.objects.count(), 16)
+
+        graph_nodes = GraphNode.objects.count()
+        self.assertEqual(graph_nodes, sum(len(graph.nodes_metadata) for graph in Graph.objects.all()))
+        self.assertIn(f'graphs: 8, graph_nodes: {graph_nodes}, notes: 16', out.getvalue())
+
+        graph = Graph.objects.first()
+        self.assertTrue(graph.valid_graph())
+        self.assertEqual(graph.levels, Graph._levels_to_json_dict(Graph(data=graph.data)._dot_to_dict_levels()))
@@ -0,0 +1,48 @@
+import datetime
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from core.models import Graph, GraphNode, Research, SubgraphRelation
+
+
+class TestValidateGraphs(TestCase):
+    def setUp(self):
+        today = datetime.date.today()
+        research = Research.objects.create(rsrch_id='1', title='research', start_date=today, end_date=today)
+
+        self.valid = Graph(data='digraph{A;1[title=First_node];B;A->1;1->B;}', title='valid', rsrch_id=research)
+        self.valid.save()
+        self.stale = Graph(data=f'digraph{{A;1[subgraph={self.valid.pk}];2;B;A->1;1->2;2->B;}}',
+                           title='stale', rsrch_id=research)
+        self.stale.save()
+        self.invalid = Graph(data='digraph{A;1;B;A->1;1->B;}', title='invalid', rsrch_id=research)
+        self.invalid.save()
+
+        # запись в обход save, как после изменения правил проверки или данных напрямую в базе
+        Graph.objects.filter(pk=self.stale.pk).update(levels={}, nodes_metadata={})
+        GraphNode.objects.filter(graph=self.stale).delete()
+        SubgraphRelation.objects.filter(parent_graph=self.stale).delete()
+        Graph.objects.filter(pk=self.invalid.pk).update(data='digraph{A;1;B;A->1;1->A;}')
+
+    def test_report_and_repair(self):
+        out = StringIO()
+        call_command('validate_graphs', '--repair', workers=1, stdout=out, no_color=True)
+        output = out.getvalue()
+
+        self.assertIn(f'граф {self.invalid.pk}: в графе есть цикл', output)
+        self.assertIn(f'граф {self.stale.pk}: устарели levels или nodes_metadata', output)
+        self.assertNotIn(f'граф {self.valid.pk}:', output)
+        self.assertIn('проверено графов: 3, с ошибками: 1, с устаревшими производными полями: 1', output)
+
+        stale = Graph.objects.get(pk=self.stale.pk)
+        self.assertEqual(stale.levels, {'0': {'A': []}, '1': {'1': ['A']}, '2': {'2': ['1']}, '3': {'B': ['2']}})
+        self.assertEqual(set(stale.nodes_metadata), {'A', '1', '2', 'B'})
+        self.assertEqual(GraphNode.objects.get(graph=stale, node_id='1').get_descendant_ids(), ['2', 'B'])
+        relations = SubgraphRelation.objects.filter(parent_graph=stale).values_list('node_id', 'child_graph_id')
+        self.assertEqual(list(relations), [('1', self.valid.pk)])
+
+        out = StringIO()
+        call_command('validate_graphs', workers=2, stdout=out, no_color=True)
+        self.assertIn('с ошибками: 1, с устаревшими производными полями: 0', out.getvalue())
@@ -0,0 +1,145 @@
+# Generated by Django 4.2 on 2026-10-18 07:31
+
+import collections
+import logging
+import re
+
+import pydot
+from django.db import migrations, models
+
+logger = logging.getLogger(__name__)
+
+# айди начального и конечного узлов графа
+START_NODE_ID = 'A'
+FINISH_NODE_ID = 'B'
+
+
+# Разбор графа и расчет уровней зафиксированы здесь в том виде, в каком они были на момент миграции
+# (core.graph_index, Graph._dot_to_dict_levels), чтобы их дальнейшие изменения не меняли результат миграции
+
+def _parse(data: str) -> pydot.Dot:
+    return pydot.graph_from_dot_data(re.sub(r'\s', '', data))[0]
+
+
+def _children_and_parents(dot: pydot.Dot):
+    """
+    Дочерние и родительские узлы каждого узла графа. Сначала идут объявленные узлы,
+    затем встреченные только в связях
+    """
+    children = {node_id: list() for node_id in dot.obj_dict['nodes']}
+    parents = {node_id: list() for node_id in dot.obj_dict['nodes']}
+    for edges in dot.obj_dict['edges'].values():
+        for edge in edges:
+            src, dst = edge['points']
+            for node_id in (src, dst):
+                children.setdefault(node_id, list())
+                parents.setdefault(node_id, list())
+            children[src].append(dst)
+            parents[dst].append(src)
+    return children, parents
+
+
+def _levels(dot: pydot.Dot) -> dict:
+    """
+    Уровни графа: для каждого уровня (длина самого длинного пути от A) узлы и их родители.
+    B всегда на последнем уровне
+    """
+    children, parents = _children_and_parents(dot)
+    if START_NODE_ID not in children:
+        return dict()
+
+    reachable = {START_NODE_ID}
+    stack = [START_NODE_ID]
+    while stack:
+        for v in children[stack.pop()]:
+            if v not in reachable:
+                reachable.add(v)
+                stack.append(v)
+
+    in_degree = dict.fromkeys(reachable, 0)
+    for u in reachable:
+        for v in children[u]:
+            in_degree[v] += 1
+
+    # топологический обход (алгоритм Кана)
+    order = list()
+    level = {START_NODE_ID: 0}
+    queue = collections.deque([START_NODE_ID])
+    while queue:
+        u = queue.popleft()
+        order.append(u)
+        for v in children[u]:
+            level[v] = max(level.get(v, -1), level[u] + 1)
+            in_degree[v] -= 1
+            if in_degree[v] == 0:
+                queue.append(v)
+
+    if FINISH_NODE_ID in level:
+        max_level = max((level[u] for u in order if u != FINISH_NODE_ID), default=-1)
+        if max_level >= level[FINISH_NODE_ID]:
+            level[FINISH_NODE_ID] = max_level + 1
+
+    raw_result = collections.defaultdict(dict)
+    for u in order:
+        raw_result[level[u]][u] = sorted(set(parents[u]))
+    return {str(k): nodes for k, nodes in sorted(raw_result.items())}
+
+
+def _nodes_metadata(dot: pydot.Dot) -> dict:
+    metadata = dict()
+    for node_id, nodes in dot.obj_dict['nodes'].items():
+        for node in nodes:
+            metadata[node_id] = {
+                'subgraph': int(node['attributes'].get('subgraph', 0)),
+                'title': node['attributes'].get('title', '').replace('_', ' ').replace('"', ''),
+            }
+    return metadata
+
+
+def fill_derived_fields(apps, schema_editor):
+    """
+    Рассчитывает levels и nodes_metadata для уже существующих графов.
+    Графы, которые не удалось разобрать, пропускаются (их производные поля пересчитает validate_graphs --repair)
+    """
+    Graph = apps.get_model('core', 'Graph')
+
+    batch = list()
+    skipped = list()
+    for graph in Graph.objects.only('graph_id', 'data').iterator(chunk_size=500):
+        try:
+            dot = _parse(graph.data)
+            graph.levels = _levels(dot)
+            graph.nodes_metadata = _nodes_metadata(dot)
+        except Exception:
+            skipped.append(graph.graph_id)
+            continue
+        batch.append(graph)
+
+        if len(batch) >= 500:
+            Graph.objects.bulk_update(batch, ['levels', 'nodes_metadata'])
+            batch = list()
+
+    Graph.objects.bulk_update(batch, ['levels', 'nodes_metadata'])
+    if skipped:
+        logger.warning('graphs with unparsable data skipped: %s', ', '.join(map(str, skipped)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_alter_note_note_type'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='graph',
+            name='levels',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='levels'),
+        ),
+        migrations.AddField(
+            model_name='graph',
+            name='nodes_metadata',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='nodes_metadata'),
+        ),
+        migrations.RunPython(fill_derived_fields, migrations.RunPython.noop),
+    ]
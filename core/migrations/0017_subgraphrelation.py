@@ -0,0 +1,53 @@
+# Generated by Django 4.2 on 2026-10-18 07:35
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_subgraph_relations(apps, schema_editor):
+    """
+    Заполняет таблицу ссылок на подграфы по сохраненным метаданным узлов (см. 0016)
+    """
+    Graph = apps.get_model('core', 'Graph')
+    SubgraphRelation = apps.get_model('core', 'SubgraphRelation')
+
+    batch = list()
+    for graph_id, nodes_metadata in Graph.objects.values_list('graph_id', 'nodes_metadata').iterator(chunk_size=500):
+        for node_id, attrs in nodes_metadata.items():
+            if attrs.get('subgraph'):
+                batch.append(SubgraphRelation(parent_graph_id=graph_id, node_id=node_id,
+                                              child_graph_id=attrs['subgraph']))
+
+        if len(batch) >= 500:
+            SubgraphRelation.objects.bulk_create(batch)
+            batch = list()
+
+    SubgraphRelation.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_graph_levels_nodes_metadata'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubgraphRelation',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False, verbose_name='id')),
+                ('node_id', models.CharField(max_length=50, verbose_name='node_id')),
+                ('child_graph', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='parent_relations', to='core.graph')),
+                ('parent_graph', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subgraph_relations', to='core.graph')),
+            ],
+            options={
+                'verbose_name': 'Subgraph relation',
+                'verbose_name_plural': 'Subgraph relations',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='subgraphrelation',
+            constraint=models.UniqueConstraint(fields=('parent_graph', 'node_id'), name='unique subgraph node in graph'),
+        ),
+        migrations.RunPython(fill_subgraph_relations, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 4.2 on 2026-10-18 07:37
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_graph_nodes(apps, schema_editor):
+    """
+    Заполняет таблицу узлов по сохраненным метаданным узлов графов (см. 0016)
+    """
+    Graph = apps.get_model('core', 'Graph')
+    GraphNode = apps.get_model('core', 'GraphNode')
+
+    batch = list()
+    for graph_id, nodes_metadata in Graph.objects.values_list('graph_id', 'nodes_metadata').iterator(chunk_size=500):
+        for node_id, attrs in nodes_metadata.items():
+            batch.append(GraphNode(graph_id=graph_id, node_id=node_id, title=attrs.get('title', '')[:200],
+                                   subgraph=attrs.get('subgraph', 0)))
+
+        if len(batch) >= 1000:
+            GraphNode.objects.bulk_create(batch)
+            batch = list()
+
+    GraphNode.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_subgraphrelation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GraphNode',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False, verbose_name='id')),
+                ('node_id', models.CharField(max_length=50, verbose_name='node_id')),
+                ('title', models.CharField(blank=True, default='', max_length=200, verbose_name='title')),
+                ('subgraph', models.IntegerField(default=0, help_text='айди подграфа, 0 - не подграф', verbose_name='subgraph')),
+                ('graph', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='graph_nodes', to='core.graph')),
+            ],
+            options={
+                'verbose_name': 'Graph node',
+                'verbose_name_plural': 'Graph nodes',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='graphnode',
+            index=models.Index(fields=['title'], name='graph_node_title_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='graphnode',
+            constraint=models.UniqueConstraint(fields=('graph', 'node_id'), name='unique node in graph'),
+        ),
+        migrations.RunPython(fill_graph_nodes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,164 @@
+# Generated by Django 4.2 on 2026-10-18 07:39
+
+import collections
+import logging
+import re
+
+import pydot
+from django.db import migrations, models
+
+logger = logging.getLogger(__name__)
+
+# айди начального узла графа
+START_NODE_ID = 'A'
+
+# значение core.graph_index.CLOSURE_MAX_NODES на момент миграции: для больших графов замыкание не строится
+CLOSURE_MAX_NODES = 5000
+
+
+# Разбор графа и построение замыкания зафиксированы здесь в том виде, в каком они были на момент миграции
+# (core.graph_index.GraphIndex), чтобы их дальнейшие изменения не меняли результат миграции
+
+def _parse(data: str) -> pydot.Dot:
+    return pydot.graph_from_dot_data(re.sub(r'\s', '', data))[0]
+
+
+def _children_and_parents(dot: pydot.Dot):
+    """
+    Дочерние и родительские узлы каждого узла графа. Сначала идут объявленные узлы,
+    затем встреченные только в связях
+    """
+    children = {node_id: list() for node_id in dot.obj_dict['nodes']}
+    parents = {node_id: list() for node_id in dot.obj_dict['nodes']}
+    for edges in dot.obj_dict['edges'].values():
+        for edge in edges:
+            src, dst = edge['points']
+            for node_id in (src, dst):
+                children.setdefault(node_id, list())
+                parents.setdefault(node_id, list())
+            children[src].append(dst)
+            parents[dst].append(src)
+    return children, parents
+
+
+def _topological_order(children: dict) -> list:
+    """
+    Порядок обхода достижимых из A узлов (топологический, алгоритм Кана)
+    """
+    if START_NODE_ID not in children:
+        return list()
+
+    reachable = {START_NODE_ID}
+    stack = [START_NODE_ID]
+    while stack:
+        for v in children[stack.pop()]:
+            if v not in reachable:
+                reachable.add(v)
+                stack.append(v)
+
+    in_degree = dict.fromkeys(reachable, 0)
+    for u in reachable:
+        for v in children[u]:
+            in_degree[v] += 1
+
+    order = list()
+    queue = collections.deque([START_NODE_ID])
+    while queue:
+        u = queue.popleft()
+        order.append(u)
+        for v in children[u]:
+            in_degree[v] -= 1
+            if in_degree[v] == 0:
+                queue.append(v)
+    return order
+
+
+def _reachability(dot: pydot.Dot):
+    """
+    Для каждого узла - позиция в топологическом порядке (ordinal) и упакованные битовые множества ordinal
+    его предков и потомков. Для графов больше CLOSURE_MAX_NODES множества пустые
+    """
+    children, parents = _children_and_parents(dot)
+    order = _topological_order(children)
+    rank = {u: k for k, u in enumerate(order)}
+    size = (len(order) + 7) // 8
+
+    descendants = dict()
+    ancestors = dict()
+    if len(children) <= CLOSURE_MAX_NODES:
+        for u in reversed(order):
+            bits = 0
+            for v in children[u]:
+                bits |= descendants[v] | (1 << rank[v])
+            descendants[u] = bits
+        for u in order:
+            bits = 0
+            for v in parents[u]:
+                if v in rank:
+                    bits |= ancestors[v] | (1 << rank[v])
+            ancestors[u] = bits
+
+    return {
+        node_id: (
+            rank.get(node_id, -1),
+            ancestors.get(node_id, 0).to_bytes(size, 'little') if ancestors else b'',
+            descendants.get(node_id, 0).to_bytes(size, 'little') if descendants else b'',
+        )
+        for node_id in children
+    }
+
+
+def fill_reachability(apps, schema_editor):
+    """
+    Строит индекс достижимости для узлов уже существующих графов.
+    Графы, которые не удалось разобрать, пропускаются
+    """
+    Graph = apps.get_model('core', 'Graph')
+    GraphNode = apps.get_model('core', 'GraphNode')
+
+    skipped = list()
+    for graph in Graph.objects.only('graph_id', 'data').iterator(chunk_size=100):
+        try:
+            values = _reachability(_parse(graph.data))
+        except Exception:
+            skipped.append(graph.graph_id)
+            continue
+
+        nodes = list(GraphNode.objects.filter(graph_id=graph.graph_id))
+        for node in nodes:
+            if node.node_id in values:
+                node.ordinal, node.ancestors, node.descendants = values[node.node_id]
+        GraphNode.objects.bulk_update(nodes, ['ordinal', 'ancestors', 'descendants'], batch_size=500)
+
+    if skipped:
+        logger.warning('graphs with unparsable data skipped: %s', ', '.join(map(str, skipped)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_graphnode'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='graphnode',
+            name='ancestors',
+            field=models.BinaryField(default=b'', help_text='битовое множество ordinal предков узла', verbose_name='ancestors'),
+        ),
+        migrations.AddField(
+            model_name='graphnode',
+            name='descendants',
+            field=models.BinaryField(default=b'', help_text='битовое множество ordinal потомков узла', verbose_name='descendants'),
+        ),
+        migrations.AddField(
+            model_name='graphnode',
+            name='ordinal',
+            field=models.IntegerField(default=-1, help_text='позиция узла в топологическом порядке графа', verbose_name='ordinal'),
+        ),
+        migrations.AddIndex(
+            model_name='graphnode',
+            index=models.Index(fields=['graph', 'ordinal'], name='graph_node_ordinal_idx'),
+        ),
+        migrations.RunPython(fill_reachability, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 4.2 on 2026-10-18 07:56
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def fill_first_versions(apps, schema_editor):
+    """
+    Текущее состояние уже существующих графов становится их первой версией
+    """
+    Graph = apps.get_model('core', 'Graph')
+    GraphVersion = apps.get_model('core', 'GraphVersion')
+
+    batch = list()
+    for graph_id, data in Graph.objects.values_list('graph_id', 'data').iterator(chunk_size=500):
+        batch.append(GraphVersion(graph_id=graph_id, version=1, snapshot=data))
+
+        if len(batch) >= 500:
+            GraphVersion.objects.bulk_create(batch)
+            batch = list()
+
+    GraphVersion.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_graphnode_reachability'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GraphVersion',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False, verbose_name='id')),
+                ('version', models.PositiveIntegerField(help_text='номер версии графа, начиная с 1', verbose_name='version')),
+                ('snapshot', models.TextField(blank=True, help_text='полный текст графа, если версия хранится не дельтой', null=True, verbose_name='snapshot')),
+                ('delta', models.JSONField(blank=True, help_text='изменения относительно предыдущей версии', null=True, verbose_name='delta')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='created_at')),
+                ('graph', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='versions', to='core.graph')),
+            ],
+            options={
+                'verbose_name': 'Graph version',
+                'verbose_name_plural': 'Graph versions',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='graphversion',
+            constraint=models.UniqueConstraint(fields=('graph', 'version'), name='unique version of graph'),
+        ),
+        migrations.RunPython(fill_first_versions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-18 07:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_graphversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='graph',
+            name='revision',
+            field=models.PositiveIntegerField(default=1, editable=False, verbose_name='revision'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 4.2 on 2026-10-18 09:12
+
+from django.db import migrations
+
+TITLE_INDEX_NAME = 'graph_node_title_trgm_idx'
+
+
+def create_title_index(apps, schema_editor):
+    """
+    Триграммный GIN индекс для поиска узлов по подстроке названия (GraphNodeSearch, title__icontains).
+    Django строит для icontains условие UPPER("title"::text) LIKE UPPER('%...%'), поэтому индексируется
+    то же выражение. Есть только в PostgreSQL, в остальных базах поиск идет без индекса
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    GraphNode = apps.get_model('core', 'GraphNode')
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        f'CREATE INDEX {schema_editor.quote_name(TITLE_INDEX_NAME)} '
+        f'ON {schema_editor.quote_name(GraphNode._meta.db_table)} '
+        f'USING gin ((UPPER({schema_editor.quote_name("title")}::text)) gin_trgm_ops)'
+    )
+
+
+def drop_title_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute(f'DROP INDEX IF EXISTS {schema_editor.quote_name(TITLE_INDEX_NAME)}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_graph_revision'),
+    ]
+
+    operations = [
+        # b-tree индекс по title не подходит для поиска по подстроке
+        migrations.RemoveIndex(
+            model_name='graphnode',
+            name='graph_node_title_idx',
+        ),
+        migrations.RunPython(create_title_index, drop_title_index),
+    ]
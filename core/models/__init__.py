@@ -1,7 +1,10 @@
-from .graph import Graph
+from .graph import Graph, GraphRevisionConflict
+from .graph_node import GraphNode
+from .graph_version import GraphVersion
 from .nnr import NodesNotesRelation
 from .note import Note
 from .research import Research
+from .subgraph import SubgraphRelation
 from .user import User
 
 # Прим: ограничение max_length в типе models.TextField используется только тогда,
@@ -1,16 +1,34 @@
-import collections
+import hashlib
 import json
 import re
 from typing import Dict, List, Tuple, Set
 
 import pydot
+from django.core.cache import cache
 from django.core.exceptions import ValidationError, BadRequest
-from django.db import models
-
+from django.db import models, transaction
+
+from core.dot_dialect import parse_dot, dump_dot
+from core.graph_index import GraphIndex, GraphValidationReport, CLOSURE_MAX_NODES, pack_bitset
+from core.graph_layout import layered_layout, LAYOUT_VERSION
+from core.graph_levels import IncrementalLevels
+from core.graph_operations import GraphEditor
+from core.graph_render import render_graph
+from core.graph_versions import make_delta
 from core.models.research import Research
+from sci_activity_doc.settings import GRAPH_LAYOUT_CACHE_TIME, GRAPH_VERSION_SNAPSHOT_INTERVAL
 
 DEFAULT_GRAPH = 'digraph{A;B;A->B;}'
 
+_QUOTED_RE = re.compile(r'"(?:[^"\\]|\\.)*"')
+
+
+class GraphRevisionConflict(Exception):
+    """
+    Граф был изменен в базе после того, как его прочитали (или после ревизии, переданной в expect_revision)
+    """
+    pass
+
 
 class Graph(models.Model):
     """
@@ -24,7 +42,20 @@ class Graph(models.Model):
 
     rsrch_id = models.ForeignKey(Research, on_delete=models.CASCADE, blank=False)
 
+    # увеличивается при каждом сохранении, запись выполняется только если ревизия в базе не изменилась (см. save)
+    revision = models.PositiveIntegerField(verbose_name="revision", default=1, editable=False)
+
+    # производные от data данные, пересчитываются при каждом сохранении (см. update_derived_fields)
+    levels = models.JSONField(verbose_name="levels", default=dict, blank=True, editable=False)
+    nodes_metadata = models.JSONField(verbose_name="nodes_metadata", default=dict, blank=True, editable=False)
+
     _dot = pydot.Dot  # обращаться только через геттер _get_dot! Это гарантирует актуальность данных
+    _dot_data_hash = None  # хеш data, из которого был получен закешированный _dot
+    _index = GraphIndex  # обращаться только через геттер _get_index!
+    _index_data_hash = None  # хеш data, по которому был построен закешированный _index
+    _levels_data_hash = None  # хеш очищенного data, которому соответствует поле levels
+    _saved_data = None  # data, прочитанный из базы или записанный в нее последним save
+    _saved_revision = None  # ревизия, которая должна быть в базе, чтобы save перезаписал граф
 
     class Meta:
         permissions = (
@@ -51,20 +82,208 @@ class Graph(models.Model):
             self, force_insert=False, force_update=False, using=None, update_fields=None
     ):
         """
-        Переопределение метода safe
+        Переопределение метода safe.
+        Вместе с data сохраняются рассчитанные по нему уровни и метаданные узлов,
+        а при изменении data - новая версия графа (см. GraphVersion).
+
+        Перед записью существующего графа его ревизия в базе увеличивается запросом
+        UPDATE ... WHERE revision = <прочитанная ревизия> (см. _claim_revision).
+        Если граф успели изменить с момента чтения - GraphRevisionConflict
         """
         self.full_clean()
-        super().save(force_insert, force_update, using, update_fields)
+        self.update_derived_fields()
+        if update_fields is not None:
+            update_fields = {*update_fields, 'revision'}
+            if 'data' in update_fields:
+                update_fields |= {'levels', 'nodes_metadata'}
+
+        with transaction.atomic(using=using):
+            adding = self._state.adding
+            if not adding:
+                self.revision = (self.revision if self._saved_revision is None else self._saved_revision) + 1
+                if self._saved_revision is not None:
+                    self._claim_revision(using)
+            super().save(force_insert, force_update, using, update_fields)
+            self._saved_revision = self.revision
+            if update_fields is None or 'data' in update_fields:
+                # при сохранении без изменения data (например, только title) узлы графа и ссылки на подграфы
+                # не пересчитываются
+                if adding or self._saved_data != self.data:
+                    self._sync_graph_nodes(adding)
+                    self._sync_subgraph_relations(adding)
+                self._save_version(adding)
+
+    def _claim_revision(self, using=None):
+        """
+        Сравнение с заменой: ревизия в базе меняется на новую, только если она равна прочитанной.
+        Строка графа остается заблокированной до конца транзакции save, поэтому параллельный save
+        не перезапишет граф между этой проверкой и записью остальных полей.
+        Удаленный граф тоже считается конфликтом, иначе save вставил бы его заново под прежним pk
+        """
+        graphs = Graph.objects.using(using).filter(pk=self.pk, revision=self._saved_revision)
+        if not graphs.update(revision=self.revision):
+            raise GraphRevisionConflict(f'graph {self.pk} was modified or deleted, '
+                                        f'expected revision {self._saved_revision}')
+
+    def expect_revision(self, revision: int):
+        """
+        Следующий save перезапишет граф, только если в базе ревизия revision (например, из заголовка If-Match)
+        """
+        self._saved_revision = revision
+
+    def _save_version(self, adding: bool = False):
+        """
+        Записывает новую версию графа, если data изменился с последнего чтения из базы.
+        Версия хранится дельтой к предыдущей, кроме каждой GRAPH_VERSION_SNAPSHOT_INTERVAL-й версии
+        и случаев, когда дельту построить нельзя (тогда сохраняется полный текст).
+        Дельта строится к восстановленному тексту предыдущей версии, а не к прочитанному data:
+        data могли записать в обход save (QuerySet.update, generate_dataset)
+        """
+        if not adding and self._saved_data == self.data:
+            return
+
+        last_version = 0
+        if not adding:
+            last_version = self.versions.order_by('-version').values_list('version', flat=True).first() or 0
+        version = last_version + 1
+
+        delta = None
+        if last_version and (version - 1) % GRAPH_VERSION_SNAPSHOT_INTERVAL != 0:
+            version_model = self.versions.model
+            try:
+                delta = make_delta(version_model.get_data(self.pk, last_version), self.data, self._get_dot())
+            except version_model.DoesNotExist:
+                pass
+
+        self.versions.create(version=version, snapshot=self.data if delta is None else None, delta=delta)
+        self._saved_data = self.data
+
+    def _sync_graph_nodes(self, adding: bool = False):
+        """
+        Приводит таблицу GraphNode в соответствие с узлами графа.
+        Пишутся только добавленные, удаленные и изменившиеся узлы
+        """
+        actual = self.get_graph_node_values()
+        stored = dict() if adding else {
+            node_id: (title, subgraph, ordinal, bytes(ancestors), bytes(descendants))
+            for node_id, title, subgraph, ordinal, ancestors, descendants in self.graph_nodes.values_list(
+                'node_id', 'title', 'subgraph', 'ordinal', 'ancestors', 'descendants')
+        }
+        if actual == stored:
+            return
+
+        stale = [node_id for node_id, values in stored.items() if actual.get(node_id) != values]
+        if stale:
+            self.graph_nodes.filter(node_id__in=stale).delete()
+
+        node_model = self.graph_nodes.model
+        node_model.objects.bulk_create([
+            node_model(graph=self, node_id=node_id, title=title, subgraph=subgraph, ordinal=ordinal,
+                       ancestors=ancestors, descendants=descendants)
+            for node_id, (title, subgraph, ordinal, ancestors, descendants) in actual.items()
+            if stored.get(node_id) != (title, subgraph, ordinal, ancestors, descendants)
+        ])
+
+    def get_graph_node_values(self) -> Dict[str, tuple]:
+        """
+        Значения полей GraphNode для каждого узла графа: (title, subgraph, ordinal, ancestors, descendants).
+        ordinal - позиция узла в топологическом порядке, ancestors и descendants - упакованные битовые
+        множества ordinal предков и потомков узла. Для больших графов (см. CLOSURE_MAX_NODES)
+        замыкание не строится и битовые множества пустые
+        """
+        index = self._get_index()
+        if len(index) <= CLOSURE_MAX_NODES:
+            order, ancestors, descendants = index.transitive_closure()
+        else:
+            (order, _), ancestors, descendants = index.topological_levels(), None, None
+
+        rank = {index.node_ids[u]: k for k, u in enumerate(order)}
+        title_max_length = self.graph_nodes.model._meta.get_field('title').max_length
+
+        values = dict()
+        for node_id, attrs in self.nodes_metadata.items():
+            i = index.position(node_id)
+            values[node_id] = (
+                attrs['title'][:title_max_length],
+                attrs['subgraph'],
+                rank.get(node_id, -1),
+                pack_bitset(ancestors[i], len(order)) if ancestors else b'',
+                pack_bitset(descendants[i], len(order)) if descendants else b'',
+            )
+        return values
+
+    def get_reachable_node_ids(self, node_id: str, reverse: bool = False) -> List[str]:
+        """
+        Потомки узла (при reverse=True - предки) в топологическом порядке.
+        Считается обходом графа, используется, когда для графа нет замыкания в GraphNode
+        """
+        index = self._get_index()
+        i = index.position(node_id)
+        seen = index.reachable_from(i, reverse=reverse)
+        order, _ = index.topological_levels()
+        return [index.node_ids[u] for u in order if seen[u] and u != i]
+
+    def _sync_subgraph_relations(self, adding: bool = False):
+        """
+        Приводит таблицу SubgraphRelation в соответствие с атрибутами subgraph узлов графа.
+        Пишутся только изменившиеся строки
+        """
+        actual = {node_id: attrs['subgraph'] for node_id, attrs in self.nodes_metadata.items() if attrs['subgraph']}
+        if adding and not actual:
+            return
+
+        stored = dict() if adding else dict(self.subgraph_relations.values_list('node_id', 'child_graph_id'))
+        if actual == stored:
+            return
+
+        stale = [node_id for node_id, child_graph_id in stored.items() if actual.get(node_id) != child_graph_id]
+        if stale:
+            self.subgraph_relations.filter(node_id__in=stale).delete()
+
+        relation_model = self.subgraph_relations.model
+        relation_model.objects.bulk_create([
+            relation_model(parent_graph=self, node_id=node_id, child_graph_id=child_graph_id)
+            for node_id, child_graph_id in actual.items() if stored.get(node_id) != child_graph_id
+        ])
 
     def full_clean(self, exclude=None, validate_unique=True, validate_constraints=True):
         """
         Переопределение метода full_clean
         """
         self._clean_data()
-        if self.valid_graph():
+        report = self.validate_graph()
+        if report.is_valid:
             super().full_clean(exclude, validate_unique, validate_constraints)
         else:
-            raise ValidationError()
+            raise ValidationError({'data': report.get_messages()})
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # сохраненные levels рассчитаны по сохраненному data
+        if 'data' in field_names and 'levels' in field_names:
+            instance._levels_data_hash = hash(instance.data)
+        if 'data' in field_names:
+            # в базе может лежать неочищенный текст (фикстуры, старые записи), а save сравнивает с очищенным
+            instance._saved_data = re.sub(r'\s', '', instance.data)
+        if 'revision' in field_names:
+            instance._saved_revision = instance.revision
+        return instance
+
+    def update_derived_fields(self):
+        """
+        Пересчитывает по data поля levels и nodes_metadata.
+        Ключи уровней - строки, как после чтения JSON из базы.
+        Уровни не пересчитываются, если они уже поддержаны в актуальном состоянии (см. apply_operations)
+        """
+        if self._levels_data_hash != hash(self.data):
+            self.levels = self._levels_to_json_dict(self._dot_to_dict_levels())
+            self._levels_data_hash = hash(self.data)
+        self.nodes_metadata = self._get_nodes_metadata_dict()
+
+    @staticmethod
+    def _levels_to_json_dict(levels: Dict[int, Dict[str, List[str]]]) -> Dict[str, Dict[str, List[str]]]:
+        return {str(level): nodes for level, nodes in levels.items()}
 
     def _clean_data(self):
         """
@@ -79,41 +298,71 @@ class Graph(models.Model):
 
     def _data_to_dot(self):
         """
-        Записывает очищенный текст в переменную класса в формате pydot
+        Записывает очищенный текст в переменную класса в формате pydot.
+        Сначала пробует быстрый разбор диалекта Graph.data, иначе использует pydot
         """
         self._clean_data()
-        self._dot = pydot.graph_from_dot_data(self.data)[0]
+        self._dot = parse_dot(self.data) or pydot.graph_from_dot_data(self.data)[0]
+        self._dot_data_hash = hash(self.data)
 
     def _dot_to_data(self):
         """
-        Записывает данные из dot в текстовый формат
+        Записывает данные из dot в текстовый формат, сразу очищенный как в _clean_data,
+        чтобы при сохранении data не изменился и закешированный dot не пришлось разбирать заново
         """
-        self.data = self._dot.to_string()
+        text = dump_dot(self._dot)
+        self.data = re.sub(r'\s', '', text)
+        # пробелы внутри значений атрибутов при очистке теряются, тогда dot по очищенному тексту будет другим
+        has_quoted_spaces = any(re.search(r'\s', value) for value in _QUOTED_RE.findall(text))
+        self._dot_data_hash = None if has_quoted_spaces else hash(self.data)
 
     def _get_dot(self) -> pydot.Dot:
         """
-        Геттер для данных в формате dot
+        Геттер для данных в формате dot.
+
+        Разобранный граф кешируется на экземпляре и переиспользуется, пока не изменится data
+        (ключ кеша - хеш data), поэтому в рамках одного запроса граф парсится не больше одного раза.
         """
-        self._data_to_dot()
+        if self._dot_data_hash != hash(self.data):
+            self._data_to_dot()
         return self._dot
 
+    def _get_index(self) -> GraphIndex:
+        """
+        Геттер для индекса структуры графа, на котором работают обходы, расчет уровней и валидация.
+        Кешируется так же, как и _dot
+        """
+        self._get_dot()
+        if self._index_data_hash != self._dot_data_hash:
+            self._index = GraphIndex.from_dot(self._dot)
+            self._index_data_hash = self._dot_data_hash
+        return self._index
+
     def _get_node_metadata(self, node_id: str) -> Dict[str, any]:
         return self._get_nodes_dict()[node_id][0]['attributes']
 
     # МЕТОДЫ СВЯЗЕЙ
 
+    def _get_edges_list(self) -> List[dict]:
+        """
+        Возвращает obj_dict всех связей графа в порядке их объявления.
+        В отличие от pydot.Dot.get_edges не создает на каждую связь объект pydot.Edge,
+        что на больших графах занимает основное время.
+
+        Не предназначен для мутации!
+        """
+        return [e for edges in self._get_dot().obj_dict['edges'].values() for e in edges]
+
     def _get_edges_dict(self) -> Dict[str, List[pydot.Edge]]:
         """
         Возвращает связи в графе в формате словаря,
         где ключ - айди узла, из которого идет грань
         """
-        edges = self._get_dot().get_edges()
-
         dict_edges = dict()
-        for e in edges:
-            if e.obj_dict['points'][0] not in dict_edges:
-                dict_edges[e.obj_dict['points'][0]] = list()
-            dict_edges[e.obj_dict['points'][0]].append(e.obj_dict)
+        for e in self._get_edges_list():
+            if e['points'][0] not in dict_edges:
+                dict_edges[e['points'][0]] = list()
+            dict_edges[e['points'][0]].append(e)
 
         return dict_edges
 
@@ -129,43 +378,23 @@ class Graph(models.Model):
 
         return self._get_dot().obj_dict['nodes']
 
-    def _get_parents(self) -> Dict[str, Set[pydot.Node]]:
+    def _get_parents(self) -> Dict[str, List[str]]:
         """
         Возвращает словарь, в котором для каждого индекса вершины графа указаны
         индексы родительских узлов.
 
         Не предназначен для мутации!
         """
-        prev = dict()
-
-        prev['A'] = set()
-        for e in self._get_dot().get_edges():
-            i = e.obj_dict['points'][1]
-            if i not in prev:
-                prev[i] = set()
-            prev[i].add(e.obj_dict['points'][0])
-        for i in prev:
-            prev[i] = sorted(list(prev[i]))
-
-        return prev
+        return self._get_index().get_parents_dict()
 
-    def _get_children(self) -> Dict[str, Set[pydot.Node]]:
+    def _get_children(self) -> Dict[str, Set[str]]:
         """
         Возвращает словарь, в котором для каждого индекса вершины графа указаны
         индексы дочерних узлов.
 
         Не предназначен для мутации!
         """
-        next = dict()
-        for e in self._get_dot().get_edges():
-            i = e.obj_dict['points'][0]
-            if i not in next:
-                next[i] = set()
-            next[i].add(e.obj_dict['points'][1])
-            if e.obj_dict['points'][1] not in next:
-                next[e.obj_dict['points'][1]] = set()
-
-        return next
+        return self._get_index().get_children_dict()
 
     def rewrite_graph_schema(self, levels: Dict[int, Dict[str, List[str]]]):
         """
@@ -194,8 +423,39 @@ class Graph(models.Model):
         self._dot = new_dot
         self._dot_to_data()
 
+    def apply_operations(self, operations: List[Dict[str, any]]) -> Set[str]:
+        """
+        Применяет к графу список точечных операций (см. core.graph_operations) на месте,
+        без пересборки графа. Возвращает айди удаленных узлов.
+        Если какая-то операция не прошла проверку, бросает GraphOperationError и data не меняется.
+
+        Поле levels обновляется по ходу операций: пересчитываются только узлы ниже измененных связей
+        (см. core.graph_levels), поэтому при сохранении уровни заново не рассчитываются.
+
+        Не вызывает метод save!
+        """
+        self._clean_data()
+        editor = GraphEditor(self._get_dot())
+        if self.levels and self._levels_data_hash == hash(self.data):
+            editor.levels = IncrementalLevels.from_levels(self.levels, editor.parents, editor.children)
+        else:
+            editor.levels = IncrementalLevels.from_index(self._get_index(), editor.parents, editor.children)
+
+        try:
+            editor.apply(operations)
+        except Exception:
+            # закешированный граф мог быть частично изменен
+            self._dot_data_hash = None
+            raise
+
+        self._dot_to_data()
+        self.levels = self._levels_to_json_dict(editor.levels.levels())
+        self._levels_data_hash = hash(self.data)
+        return editor.removed_nodes
+
     def _rewrite_node_metadata(self, node_id: str, new_matadata: Dict[str, any]) -> Dict[str, any]:
-        old_metadata = self._get_nodes_dict()[node_id][0]['attributes']
+        # копия, чтобы не испортить закешированный граф, если изменение не будет применено
+        old_metadata = dict(self._get_nodes_dict()[node_id][0]['attributes'])
 
         def edit(key: str, new_val: str) -> dict:
             old_metadata[key] = new_val
@@ -229,7 +489,7 @@ class Graph(models.Model):
             raise BadRequest()
 
     def rewrite_node_metadata(self, node_id: str, req_matadata: Dict[str, any]):
-        self._data_to_dot()
+        self._get_dot()
         new_matadata = self._rewrite_node_metadata(node_id, req_matadata)
         self._dot.obj_dict['nodes'][node_id][0]['attributes'] = new_matadata
         self._dot_to_data()
@@ -238,18 +498,16 @@ class Graph(models.Model):
         """
         Проверяет, что в графе существует узел с переданным айди
         """
-        node_list = [i.get_name() for i in self._get_dot().get_nodes()]
-        return str(node_id) in node_list
+        return self._get_index().has_node(str(node_id))
 
     def _get_nodes_metadata_dict(self) -> dict:
-        nodes = self._get_dot().get_nodes()
-
         metadata = dict()
-        for node in nodes:
-            attrs = dict()
-            attrs['subgraph'] = int(node.obj_dict['attributes'].get('subgraph', 0))
-            attrs['title'] = node.obj_dict['attributes'].get('title', '').replace('_', ' ').replace('"', '')
-            metadata[node.obj_dict['name']] = attrs
+        for node_id, nodes in self._get_nodes_dict().items():
+            for node in nodes:
+                attrs = dict()
+                attrs['subgraph'] = int(node['attributes'].get('subgraph', 0))
+                attrs['title'] = node['attributes'].get('title', '').replace('_', ' ').replace('"', '')
+                metadata[node_id] = attrs
 
         return metadata
 
@@ -289,137 +547,69 @@ class Graph(models.Model):
         а узлы 4 и B на уровнях 3 и 5 соответсвенно.
         """
 
-        dict_edges = self._get_edges_dict()
-
-        # обход в глубину, получаем уровни для всех вершин
-        edges_levels = collections.defaultdict(int)
-
-        def breadth_first_traversal(edge_index: str, level: int):
-            edges_levels[edge_index] = max(level, edges_levels[edge_index])
-            if edge_index not in dict_edges:
-                return
-            for next_edge in dict_edges[edge_index]:
-                breadth_first_traversal(next_edge['points'][1], level + 1)
-
-        # B всегда должна быть на последнем уровне
-        breadth_first_traversal('A', 0)
-        for edge, level in edges_levels.items():
-            if edge == 'B':
-                continue
-            if level >= edges_levels['B']:
-                edges_levels['B'] += 1
-
-        # список родительских вершин для каждой вершины
-        prev = self._get_parents()
-
-        # формируем итоговую структуру
-        raw_result = collections.defaultdict(dict)
-        for edge_index, edge_level in edges_levels.items():
-            raw_result[edge_level][edge_index] = prev[edge_index]
-
-        return dict(raw_result)
+        return self._get_index().levels()
 
     def dot_to_json_levels(self) -> str:
         return json.dumps(self._dot_to_dict_levels())
 
-    # ВАЛИДАТОРЫ
-
-    def valid_graph(self) -> bool:
-        if not self._has_a_and_b_nodes():
-            return False
-
-        if self._has_cycle():
-            return False
-
-        if self._has_duplicate_nodes():
-            return False
+    def get_data_hash(self) -> str:
+        """
+        Хеш содержимого графа (sha256 очищенного data). В отличие от hash() стабилен между процессами,
+        поэтому годится для ключей общего кеша
+        """
+        self._clean_data()
+        return hashlib.sha256(self.data.encode()).hexdigest()
 
-        if not self._is_connected_graph():
-            return False
+    def get_layout(self) -> Dict[str, Dict[str, int]]:
+        """
+        Координаты узлов для отрисовки (см. core.graph_layout). Укладка кешируется по хешу содержимого графа,
+        поэтому считается один раз после каждого изменения графа, а не на каждый просмотр
+        """
+        key = f'graph_layout:{LAYOUT_VERSION}:{self.get_data_hash()}'
+        layout = cache.get(key)
+        if layout is None:
+            levels = self.levels if self._levels_data_hash == hash(self.data) else self._dot_to_dict_levels()
+            layout = layered_layout(levels)
+            cache.set(key, layout, GRAPH_LAYOUT_CACHE_TIME)
+        return layout
+
+    def render(self, fmt: str) -> bytes:
+        """
+        Изображение графа в формате fmt ('svg' или 'png', см. core.graph_render).
+        Готовые изображения лежат в кеше на диске по хешу содержимого графа
+        """
+        # в data текст хранится без пробелов ("digraphG{...}"), а Graphviz его так не разберет
+        return render_graph(lambda: dump_dot(self._get_dot()), self.get_data_hash(), fmt)
 
-        if not self._all_nodes_exists():
-            return False
+    # ВАЛИДАТОРЫ
 
-        return True
+    def valid_graph(self) -> bool:
+        return self.validate_graph().is_valid
 
-    class CycleDetectedError(Exception):
+    def validate_graph(self) -> 'GraphValidationReport':
         """
-        Найден цикл
+        Проверяет граф за один проход и возвращает отчет о нарушенных правилах:
+        - в графе есть узлы A и B;
+        - ни один узел не объявлен дважды;
+        - все узлы, участвующие в связях, объявлены;
+        - в графе нет циклов;
+        - все узлы достижимы из A.
+
+        Обход итеративный, поэтому размер графа не ограничен глубиной рекурсии.
         """
-
-        def __init__(self, graph_id: int):
-            self.graph_id = graph_id
-            self.message = f"Graph {self.graph_id} has cycle"
-            super().__init__(self.message)
+        return self._get_index().validate()
 
     def _has_a_and_b_nodes(self) -> bool:
-        return self.node_with_node_id_exists('A') and self.node_with_node_id_exists('B')
+        return GraphValidationReport.MISSING_A_OR_B not in self.validate_graph().errors
 
     def _has_cycle(self) -> bool:
-        # список дочерних вершин для каждой вершины
-        next = self._get_children()
-
-        # используем алгоритм обхода в глубину для поиска цикла
-        # см https://neerc.ifmo.ru/wiki/index.php?title=%D0%98%D1%81%D0%BF%D0%BE%D0%BB%D1%8C%D0%B7%D0%BE%D0%B2%D0%B0%D0%BD%D0%B8%D0%B5_%D0%BE%D0%B1%D1%85%D0%BE%D0%B4%D0%B0_%D0%B2_%D0%B3%D0%BB%D1%83%D0%B1%D0%B8%D0%BD%D1%83_%D0%B4%D0%BB%D1%8F_%D0%BF%D0%BE%D0%B8%D1%81%D0%BA%D0%B0_%D1%86%D0%B8%D0%BA%D0%BB%D0%B0
-        WHITE = 'w'
-        GRAY = 'g'
-        BLACK = 'b'
-        color = {i: WHITE for i in next}
-
-        def breadth_first_traversal(edge_index: str):
-            color[edge_index] = GRAY
-
-            for next_index in next[edge_index]:
-                if color[next_index] == WHITE:
-                    breadth_first_traversal(next_index)
-                if color[next_index] == GRAY:
-                    raise self.CycleDetectedError(graph_id=self.graph_id)
-
-            color[edge_index] = BLACK
-
-        try:
-            breadth_first_traversal('A')
-        except self.CycleDetectedError:
-            return True
-
-        return False
+        return GraphValidationReport.CYCLE in self.validate_graph().errors
 
     def _has_duplicate_nodes(self) -> bool:
-        nodes = self._get_dot().get_nodes()
-
-        nodes_list = list()
-        for n in nodes:
-            nodes_list.append(n.obj_dict['name'])
-        nodes_set = set(nodes_list)
-
-        return len(nodes_set) != len(nodes_list)
+        return GraphValidationReport.DUPLICATE_NODES in self.validate_graph().errors
 
     def _is_connected_graph(self) -> bool:
-        # список дочерних вершин для каждой вершины
-        next = self._get_children()
-
-        set_of_nodes = set()
-
-        def breadth_first_traversal(edge_index: str):
-            set_of_nodes.add(edge_index)
-            for next_index in next[edge_index]:
-                breadth_first_traversal(next_index)
-
-        breadth_first_traversal('A')
-
-        return len(set_of_nodes) == len(next)
+        return GraphValidationReport.UNREACHABLE_NODES not in self.validate_graph().errors
 
     def _all_nodes_exists(self) -> bool:
-        # список дочерних вершин для каждой вершины
-        next = self._get_children()
-
-        set_of_nodes = set()
-
-        def breadth_first_traversal(edge_index: str):
-            set_of_nodes.add(edge_index)
-            for next_index in next[edge_index]:
-                breadth_first_traversal(next_index)
-
-        breadth_first_traversal('A')
-
-        return len(set_of_nodes) == len(next)
+        return GraphValidationReport.UNDECLARED_NODES not in self.validate_graph().errors
@@ -0,0 +1,95 @@
+from typing import List, Optional
+
+from django.db import models
+
+from core.graph_index import NODE_ID_MAX_LENGTH, unpack_bitset, bitset_positions
+from core.models.graph import Graph
+
+
+class GraphNode(models.Model):
+    """
+    Узел графа. Копия узлов из data графа, поддерживается при сохранении графа (см. Graph.save)
+    и нужна для индексированных запросов по узлам без разбора DOT.
+    """
+
+    id = models.AutoField(verbose_name="id", primary_key=True)
+    graph = models.ForeignKey(Graph, on_delete=models.CASCADE, blank=False, related_name='graph_nodes')
+    node_id = models.CharField(verbose_name="node_id", blank=False, max_length=NODE_ID_MAX_LENGTH)
+    title = models.CharField(verbose_name="title", blank=True, max_length=200, default='')
+    subgraph = models.IntegerField(verbose_name="subgraph", default=0, help_text="айди подграфа, 0 - не подграф")
+
+    # индекс достижимости, см. Graph.get_graph_node_values
+    ordinal = models.IntegerField(verbose_name="ordinal", default=-1,
+                                  help_text="позиция узла в топологическом порядке графа")
+    ancestors = models.BinaryField(verbose_name="ancestors", default=b'', editable=False,
+                                   help_text="битовое множество ordinal предков узла")
+    descendants = models.BinaryField(verbose_name="descendants", default=b'', editable=False,
+                                     help_text="битовое множество ordinal потомков узла")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['graph', 'node_id'], name='unique node in graph'),
+        ]
+        # поиск по подстроке title обслуживает триграммный индекс PostgreSQL из миграции 0022
+        indexes = [
+            models.Index(fields=['graph', 'ordinal'], name='graph_node_ordinal_idx'),
+        ]
+        verbose_name = 'Graph node'
+        verbose_name_plural = 'Graph nodes'
+
+    graph.short_description = u'graph'
+
+    def __str__(self) -> str:
+        return f'({self.graph_id}) {self.node_id} {self.title}'
+
+    def get_ancestor_ids(self) -> List[str]:
+        """
+        Айди всех предков узла в топологическом порядке
+        """
+        return self._get_node_ids(self.ancestors, reverse=True)
+
+    def get_descendant_ids(self) -> List[str]:
+        """
+        Айди всех потомков узла в топологическом порядке
+        """
+        return self._get_node_ids(self.descendants, reverse=False)
+
+    def _get_node_ids(self, bitset: bytes, reverse: bool) -> List[str]:
+        if not bitset:
+            # замыкание для графа не построено
+            return Graph.objects.get(graph_id=self.graph_id).get_reachable_node_ids(self.node_id, reverse=reverse)
+        return self._ordinals_to_node_ids(self.graph_id, bitset_positions(unpack_bitset(bytes(bitset))))
+
+    @staticmethod
+    def _ordinals_to_node_ids(graph_id: int, ordinals: List[int]) -> List[str]:
+        return list(GraphNode.objects.
+                    filter(graph_id=graph_id, ordinal__in=ordinals).
+                    order_by('ordinal').
+                    values_list('node_id', flat=True))
+
+    @staticmethod
+    def get_path_node_ids(graph_id: int, src: str, dst: str) -> Optional[List[str]]:
+        """
+        Все узлы, лежащие на путях из src в dst, в топологическом порядке (включая src и dst).
+        None, если пути нет
+        """
+        nodes = {node.node_id: node for node in GraphNode.objects.filter(graph_id=graph_id, node_id__in=(src, dst))}
+        if src not in nodes or dst not in nodes:
+            raise GraphNode.DoesNotExist()
+        if src == dst:
+            return [src]
+
+        src_node, dst_node = nodes[src], nodes[dst]
+        if not src_node.descendants:
+            # замыкание для графа не построено
+            descendants = set(src_node.get_descendant_ids())
+            if dst not in descendants:
+                return None
+            return [src] + [node_id for node_id in dst_node.get_ancestor_ids() if node_id in descendants] + [dst]
+
+        descendants = unpack_bitset(bytes(src_node.descendants))
+        if not descendants >> dst_node.ordinal & 1:
+            return None
+
+        between = descendants & unpack_bitset(bytes(dst_node.ancestors))
+        return [src] + GraphNode._ordinals_to_node_ids(graph_id, bitset_positions(between)) + [dst]
@@ -0,0 +1,63 @@
+from django.db import models
+from django.utils import timezone
+
+from core.graph_versions import apply_delta
+from core.models.graph import Graph
+
+
+class GraphVersion(models.Model):
+    """
+    Версия data графа, создается при каждом сохранении графа с измененным data (см. Graph.save).
+
+    Версия хранит либо полный текст графа (snapshot), либо структурную дельту относительно предыдущей версии
+    (см. core.graph_versions). Полный текст сохраняется не реже, чем раз в GRAPH_VERSION_SNAPSHOT_INTERVAL версий,
+    поэтому для восстановления любой версии применяется меньше GRAPH_VERSION_SNAPSHOT_INTERVAL дельт.
+    """
+
+    id = models.AutoField(verbose_name="id", primary_key=True)
+    graph = models.ForeignKey(Graph, on_delete=models.CASCADE, blank=False, related_name='versions')
+    version = models.PositiveIntegerField(verbose_name="version", help_text="номер версии графа, начиная с 1")
+    snapshot = models.TextField(verbose_name="snapshot", null=True, blank=True,
+                                help_text="полный текст графа, если версия хранится не дельтой")
+    delta = models.JSONField(verbose_name="delta", null=True, blank=True,
+                             help_text="изменения относительно предыдущей версии")
+    created_at = models.DateTimeField(verbose_name='created_at', default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['graph', 'version'], name='unique version of graph'),
+        ]
+        verbose_name = 'Graph version'
+        verbose_name_plural = 'Graph versions'
+
+    graph.short_description = u'graph'
+
+    @property
+    def is_snapshot(self) -> bool:
+        return self.delta is None
+
+    @staticmethod
+    def get_data(graph_id: int, version: int) -> str:
+        """
+        Восстанавливает data графа в версии version: последний полный текст не позже version
+        и дельты после него. Если такой версии нет - GraphVersion.DoesNotExist
+        """
+        snapshot = GraphVersion.objects. \
+            filter(graph_id=graph_id, version__lte=version, delta__isnull=True). \
+            order_by('-version'). \
+            values_list('version', 'snapshot'). \
+            first()
+        if snapshot is None:
+            raise GraphVersion.DoesNotExist()
+
+        snapshot_version, data = snapshot
+        deltas = list(GraphVersion.objects.
+                      filter(graph_id=graph_id, version__gt=snapshot_version, version__lte=version).
+                      order_by('version').
+                      values_list('delta', flat=True))
+        if snapshot_version + len(deltas) != version:
+            raise GraphVersion.DoesNotExist()
+
+        for delta in deltas:
+            data = apply_delta(data, delta)
+        return data
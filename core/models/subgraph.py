@@ -0,0 +1,31 @@
+from django.db import models
+
+from core.graph_index import NODE_ID_MAX_LENGTH
+from core.models.graph import Graph
+
+
+class SubgraphRelation(models.Model):
+    """
+    Обратный индекс ссылок на подграфы: узел node_id графа parent_graph является подграфом child_graph.
+    Поддерживается при сохранении графа (см. Graph.save) по атрибутам subgraph его узлов.
+
+    Граф, на который ссылаются, может быть удален - строка при этом остается,
+    чтобы висячую ссылку можно было найти одним запросом.
+    """
+
+    id = models.AutoField(verbose_name="id", primary_key=True)
+    parent_graph = models.ForeignKey(Graph, on_delete=models.CASCADE, blank=False,
+                                     related_name='subgraph_relations')
+    node_id = models.CharField(verbose_name="node_id", blank=False, max_length=NODE_ID_MAX_LENGTH)
+    child_graph = models.ForeignKey(Graph, on_delete=models.DO_NOTHING, db_constraint=False, blank=False,
+                                    related_name='parent_relations')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['parent_graph', 'node_id'], name='unique subgraph node in graph'),
+        ]
+        verbose_name = 'Subgraph relation'
+        verbose_name_plural = 'Subgraph relations'
+
+    parent_graph.short_description = u'parent graph'
+    child_graph.short_description = u'child graph'
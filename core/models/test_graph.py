@@ -1,7 +1,13 @@
+import datetime
+from unittest import mock
+
 from django.core.exceptions import BadRequest
 from django.test import TestCase
 
-from .graph import Graph
+from . import graph as graph_module
+from .graph import Graph, GraphRevisionConflict, GraphValidationReport
+from .research import Research
+from core.graph_operations import GraphOperationError
 
 
 class TestGraph_dot_to_dict_levels(TestCase):
@@ -172,6 +178,18 @@ class TestGraph_dot_to_dict_levels(TestCase):
             msg='сложный граф',
         )
 
+    def test_graph_with_many_paths(self):
+        # 100 последовательных "ромбов": путей от A до B 2^100, каждая вершина должна обрабатываться один раз
+        edges = ['A -> 1;']
+        for i in range(1, 301, 3):
+            edges += [f'{i} -> {i + 1};', f'{i} -> {i + 2};', f'{i + 1} -> {i + 3};', f'{i + 2} -> {i + 3};']
+        edges.append('301 -> B;')
+        graph = Graph(data='digraph{A;B;' + ''.join(f'{i};' for i in range(1, 302)) + ''.join(edges) + '}')
+
+        levels = graph._dot_to_dict_levels()
+        self.assertEqual(levels[201], {'301': ['299', '300']})
+        self.assertEqual(levels[202], {'B': ['301']}, msg='B на последнем уровне')
+
 
 class TestGraph__has_a_and_b_nodes(TestCase):
     def test_has_a_and_b_nodes(self):
@@ -414,6 +432,75 @@ class TestGraph__all_nodes_exists(TestCase):
         )
 
 
+class TestGraph_validate_graph(TestCase):
+    def test_valid(self):
+        graph = Graph(
+            data='''
+                digraph { 
+                    A; 
+                    1; 
+                    2; 
+                    B; 
+                    A -> 1; 
+                    A -> 2; 
+                    1 -> B;
+                    2 -> B;
+                }
+            ''',
+        )
+        report = graph.validate_graph()
+        self.assertTrue(report.is_valid)
+        self.assertEqual(report.errors, {})
+
+    def test_report(self):
+        graph = Graph(
+            data='''
+                digraph { 
+                    A; 
+                    1; 
+                    2; 
+                    3; 
+                    4; 
+                    5; 
+                    B; 
+                    5; 
+                    A -> 1; 
+                    1 -> 2;
+                    2 -> 3; 
+                    3 -> 1; 
+                    3 -> B;
+                    4 -> 6;
+                }
+            ''',
+        )
+        report = graph.validate_graph()
+        self.assertFalse(report.is_valid)
+        self.assertEqual(
+            report.errors,
+            {
+                GraphValidationReport.DUPLICATE_NODES: ['5'],
+                GraphValidationReport.UNDECLARED_NODES: ['6'],
+                GraphValidationReport.CYCLE: ['1', '2', '3'],
+                GraphValidationReport.UNREACHABLE_NODES: ['4', '5', '6'],
+            },
+            msg='отчет содержит все нарушенные правила и узлы, на которых они нарушены',
+        )
+
+    def test_deep_graph(self):
+        n = 5000
+        graph = Graph(
+            data='digraph{A;B;' + ''.join(f'{i};' for i in range(1, n + 1)) +
+                 'A->1;' + ''.join(f'{i}->{i + 1};' for i in range(1, n)) + f'{n}->B;}}',
+        )
+        self.assertTrue(graph.valid_graph(), msg='глубина графа не ограничена глубиной рекурсии')
+
+    def test_long_node_id(self):
+        node_id = 'n' * 51
+        graph = Graph(data=f'digraph{{A;B;{node_id};A->{node_id};{node_id}->B;}}')
+        self.assertEqual(graph.validate_graph().errors, {GraphValidationReport.LONG_NODE_IDS: [node_id]},
+                         msg='айди узла не помещается в GraphNode.node_id')
+
+
 class TestGraph__get_nodes_metadata(TestCase):
     def test_ok(self):
         graph = Graph(
@@ -444,6 +531,21 @@ class TestGraph__get_nodes_metadata(TestCase):
         )
 
 
+class TestGraph_update_derived_fields(TestCase):
+    def test_ok(self):
+        graph = Graph(data='digraph{A;1[title=Cool_node];B;A->1;1->B;}')
+        graph.update_derived_fields()
+
+        self.assertEqual(graph.levels, {'0': {'A': []}, '1': {'1': ['A']}, '2': {'B': ['1']}},
+                         msg='ключи уровней - строки, как после чтения из базы')
+        self.assertEqual(graph.nodes_metadata['1'], {'subgraph': 0, 'title': 'Cool node'})
+
+        graph.rewrite_graph_schema({0: {'A': []}, 1: {'B': ['A']}})
+        graph.update_derived_fields()
+        self.assertEqual(graph.levels, {'0': {'A': []}, '1': {'B': ['A']}})
+        self.assertNotIn('1', graph.nodes_metadata)
+
+
 class TestGraph_rewrite_graph_schema(TestCase):
     def test_add_node_between(self):
         graph = Graph(
@@ -553,6 +655,40 @@ class TestGraph_rewrite_graph_schema(TestCase):
         )
 
 
+class TestGraph_apply_operations(TestCase):
+    def test_ok(self):
+        graph = Graph(data='digraph{A;B;A->B;}')
+        removed = graph.apply_operations([
+            {'op': 'insert_between', 'src': 'A', 'dst': 'B', 'node_id': '1'},
+            {'op': 'insert_between', 'src': '1', 'dst': 'B', 'node_id': '2'},
+            {'op': 'remove_node', 'node_id': '2'},
+            {'op': 'add_edge', 'src': '1', 'dst': 'B'},
+        ])
+        self.assertEqual(removed, {'2'})
+        self.assertEqual(graph.data, 'digraphG{A;B;1;A->1;1->B;}')
+        self.assertEqual(graph._dot_to_dict_levels(), {0: {'A': []}, 1: {'1': ['A']}, 2: {'B': ['1']}})
+
+    def test_levels_kept_incrementally(self):
+        graph = Graph(data='digraph{A;1;B;A->1;1->B;}')
+        graph.update_derived_fields()
+        with mock.patch.object(Graph, '_dot_to_dict_levels', wraps=graph._dot_to_dict_levels) as full_recompute:
+            graph.apply_operations([{'op': 'insert_between', 'src': '1', 'dst': 'B', 'node_id': '2'}])
+            graph._clean_data()  # как при сохранении
+            graph.update_derived_fields()
+        full_recompute.assert_not_called()
+        self.assertEqual(graph.levels, {'0': {'A': []}, '1': {'1': ['A']}, '2': {'2': ['1']}, '3': {'B': ['2']}})
+
+    def test_failed_operation_keeps_data(self):
+        graph = Graph(data='digraph{A;B;A->B;}')
+        with self.assertRaises(GraphOperationError):
+            graph.apply_operations([
+                {'op': 'add_node', 'node_id': '1'},
+                {'op': 'remove_edge', 'src': 'A', 'dst': '1'},
+            ])
+        self.assertEqual(graph.data, 'digraph{A;B;A->B;}')
+        self.assertFalse(graph.node_with_node_id_exists('1'), msg='частично измененный граф не остается в кеше')
+
+
 class TestGraph_rewrite_node_metadata(TestCase):
     def test_edit_subgraph_id(self):
         graph = Graph(
@@ -681,3 +817,111 @@ class TestGraph_node_with_node_id_exists(TestCase):
             ''',
         )
         self.assertFalse(graph.node_with_node_id_exists('1'))
+
+
+class TestGraph__get_dot(TestCase):
+    def test_parse_once(self):
+        graph = Graph(
+            data='''
+                digraph { 
+                    A; 
+                    1; 
+                    B; 
+                    A -> 1; 
+                    1 -> B; 
+                }
+            ''',
+        )
+        with mock.patch.object(graph_module, 'parse_dot', wraps=graph_module.parse_dot) as parse:
+            self.assertTrue(graph.valid_graph())
+            graph._dot_to_dict_levels()
+            graph.get_nodes_metadata_json()
+            self.assertEqual(parse.call_count, 1, msg='граф разбирается один раз, пока не изменится data')
+
+    def test_invalidate_on_data_change(self):
+        graph = Graph(data='digraph{A;B;A->B;}')
+        self.assertFalse(graph.node_with_node_id_exists('1'))
+
+        graph.data = 'digraph{A;1;B;A->1;1->B;}'
+        self.assertTrue(graph.node_with_node_id_exists('1'), msg='после изменения data граф разбирается заново')
+
+    def test_invalidate_on_rewrite(self):
+        graph = Graph(data='digraph{A;B;A->B;}')
+        graph.rewrite_graph_schema({
+            0: {"A": []},
+            1: {"1": ["A"]},
+            2: {"B": ["1"]},
+        })
+        self.assertTrue(graph.node_with_node_id_exists('1'))
+        self.assertEqual(
+            graph._dot_to_dict_levels(),
+            {0: {"A": []}, 1: {"1": ["A"]}, 2: {"B": ["1"]}},
+        )
+
+    def test_not_reparsed_after_edit(self):
+        graph = Graph(data='digraph{A;1;B;A->1;1->B;}')
+        with mock.patch.object(graph_module, 'parse_dot', wraps=graph_module.parse_dot) as parse:
+            graph.rewrite_node_metadata('1', {'is_subgraph': False, 'title': 'new title', 'notes_ids': []})
+            graph.apply_operations([{'op': 'insert_between', 'src': '1', 'dst': 'B', 'node_id': '2'}])
+            graph._clean_data()  # как при сохранении
+            graph.update_derived_fields()
+            self.assertEqual(parse.call_count, 1, msg='граф разобран один раз, до изменений')
+
+
+class TestGraph_get_layout(TestCase):
+    def test_cached_by_content(self):
+        graph = Graph(data='digraph{A;1;B;A->1;1->B;}')
+        with mock.patch.object(graph_module, 'layered_layout', wraps=graph_module.layered_layout) as layout:
+            expected = {'A': {'level': 0, 'order': 0}, '1': {'level': 1, 'order': 0}, 'B': {'level': 2, 'order': 0}}
+            self.assertEqual(graph.get_layout(), expected)
+            self.assertEqual(Graph(data='digraph {A; 1; B; A -> 1; 1 -> B;}').get_layout(), expected,
+                             msg='тот же граф с другими пробелами')
+            self.assertEqual(layout.call_count, 1)
+
+            graph.data = 'digraph{A;B;A->B;}'
+            graph.get_layout()
+            self.assertEqual(layout.call_count, 2)
+
+
+class TestGraph_revision(TestCase):
+    def setUp(self):
+        today = datetime.date.today()
+        research = Research.objects.create(rsrch_id='1', title='research', start_date=today, end_date=today)
+        self.graph = Graph(data='digraph{A;1;B;A->1;1->B;}', title='graph', rsrch_id=research)
+        self.graph.save()
+
+    def test_concurrent_save(self):
+        first = Graph.objects.get(pk=self.graph.pk)
+        second = Graph.objects.get(pk=self.graph.pk)
+
+        first.title = 'first'
+        first.save()
+        self.assertEqual(first.revision, 2)
+
+        second.apply_operations([{'op': 'insert_between', 'src': '1', 'dst': 'B', 'node_id': '2'}])
+        with self.assertRaises(GraphRevisionConflict):
+            second.save()
+
+        graph = Graph.objects.get(pk=self.graph.pk)
+        self.assertEqual((graph.title, graph.revision), ('first', 2))
+        self.assertFalse(graph.node_with_node_id_exists('2'))
+
+    def test_expect_revision(self):
+        graph = Graph.objects.get(pk=self.graph.pk)
+        graph.expect_revision(5)
+        graph.title = 'new title'
+        with self.assertRaises(GraphRevisionConflict):
+            graph.save(update_fields=['title'])
+
+        graph.expect_revision(1)
+        graph.save(update_fields=['title'])
+        self.assertEqual(Graph.objects.get(pk=self.graph.pk).revision, 2)
+
+    def test_concurrent_delete(self):
+        graph = Graph.objects.get(pk=self.graph.pk)
+        Graph.objects.filter(pk=self.graph.pk).delete()
+
+        graph.title = 'new title'
+        with self.assertRaises(GraphRevisionConflict):
+            graph.save()
+        self.assertFalse(Graph.objects.filter(pk=self.graph.pk).exists(), msg='удаленный граф не вставляется заново')
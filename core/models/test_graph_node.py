@@ -0,0 +1,61 @@
+import datetime
+from unittest import mock
+
+from django.test import TestCase
+
+from . import graph as graph_module
+from .graph import Graph
+from .graph_node import GraphNode
+from .research import Research
+
+
+class TestGraphNode(TestCase):
+    def setUp(self):
+        today = datetime.date.today()
+        self.research = Research.objects.create(rsrch_id='1', title='research', start_date=today, end_date=today)
+
+    def nodes(self):
+        return list(GraphNode.objects.order_by('node_id').values_list('node_id', 'title', 'subgraph'))
+
+    def test_sync_on_save(self):
+        graph = Graph(data='digraph{A;1[title=First_node];2[subgraph=5];B;A->1;1->2;2->B;}',
+                      title='graph', rsrch_id=self.research)
+        graph.save()
+        self.assertEqual(self.nodes(), [('1', 'First node', 0), ('2', '', 5), ('A', '', 0), ('B', '', 0)])
+
+        graph.apply_operations([
+            {'op': 'set_attr', 'node_id': '1', 'key': 'title', 'value': 'Renamed'},
+            {'op': 'remove_node', 'node_id': '2'},
+            {'op': 'add_edge', 'src': '1', 'dst': 'B'},
+        ])
+        graph.save()
+        self.assertEqual(self.nodes(), [('1', 'Renamed', 0), ('A', '', 0), ('B', '', 0)])
+
+        graph.title = 'new title'
+        graph.save(update_fields=['title'])
+        self.assertEqual(len(self.nodes()), 3)
+
+        with mock.patch.object(Graph, 'get_graph_node_values') as node_values:
+            graph.title = 'other title'
+            graph.save()
+            Graph.objects.get(pk=graph.pk).save()
+        node_values.assert_not_called()
+
+        graph.delete()
+        self.assertEqual(self.nodes(), [])
+
+    def test_reachability(self):
+        data = 'digraph{A;1;2;3;4;B;A->1;1->2;1->3;2->4;3->4;4->B;A->B;}'
+        graph = Graph(data=data, title='graph', rsrch_id=self.research)
+        graph.save()
+        # для больших графов замыкание не строится и запросы отвечаются обходом графа
+        with mock.patch.object(graph_module, 'CLOSURE_MAX_NODES', 3):
+            large_graph = Graph(data=data, title='large graph', rsrch_id=self.research)
+            large_graph.save()
+
+        for g in (graph, large_graph):
+            self.assertEqual(GraphNode.objects.get(graph=g, node_id='1').get_descendant_ids(), ['2', '3', '4', 'B'])
+            self.assertEqual(GraphNode.objects.get(graph=g, node_id='4').get_ancestor_ids(), ['A', '1', '2', '3'])
+            self.assertEqual(GraphNode.get_path_node_ids(g.pk, '1', '4'), ['1', '2', '3', '4'])
+            self.assertEqual(GraphNode.get_path_node_ids(g.pk, 'A', 'B'), ['A', '1', '2', '3', '4', 'B'])
+            self.assertIsNone(GraphNode.get_path_node_ids(g.pk, '2', '3'))
@@ -0,0 +1,97 @@
+import datetime
+from unittest import mock
+
+from django.test import TestCase
+
+from core import graph_versions
+from core.dot_dialect import parse_dot
+from . import graph as graph_module
+from .graph import Graph
+from .graph_version import GraphVersion
+from .research import Research
+
+
+class TestGraphVersion(TestCase):
+    def setUp(self):
+        today = datetime.date.today()
+        self.research = Research.objects.create(rsrch_id='1', title='research', start_date=today, end_date=today)
+
+    def test_versions_restore_every_edit(self):
+        graph = Graph(data='digraph{A;1[title=First];B;A->1;1->B;}', title='graph', rsrch_id=self.research)
+        with mock.patch.object(graph_module, 'GRAPH_VERSION_SNAPSHOT_INTERVAL', 3):
+            graph.save()
+            history = [graph.data]
+            first = '1'
+            for step in range(6):
+                graph.apply_operations([
+                    {'op': 'insert_between', 'src': 'A', 'dst': first, 'node_id': str(10 + step)},
+                    {'op': 'set_attr', 'node_id': '1', 'key': 'title', 'value': f'Step_{step}'},
+                ])
+                graph.save()
+                history.append(graph.data)
+                first = str(10 + step)
+
+            # при сохранении без изменения data версия не создается
+            graph = Graph.objects.get(pk=graph.pk)
+            graph.title = 'new title'
+            graph.save()
+
+        versions = list(GraphVersion.objects.filter(graph=graph).order_by('version'))
+        self.assertEqual([v.version for v in versions], list(range(1, 8)))
+        self.assertEqual([v.is_snapshot for v in versions], [True, False, False, True, False, False, True])
+        self.assertEqual(versions[1].delta['added'], [['10', {}], ['A->10', {}], ['10->1', {}]])
+        self.assertEqual(versions[1].delta['removed'], ['A->1'])
+
+        for number, data in enumerate(history, start=1):
+            self.assertEqual(GraphVersion.get_data(graph.pk, number), data)
+        with self.assertRaises(GraphVersion.DoesNotExist):
+            GraphVersion.get_data(graph.pk, 8)
+
+    def test_snapshot_when_order_changes(self):
+        graph = Graph(data='digraph{A;1;2;B;A->1;A->2;1->B;2->B;}', title='graph', rsrch_id=self.research)
+        graph.save()
+        # объявления переставлены - дельтой с добавлением в конец такой текст не восстановить
+        graph.data = 'digraph{A;2;1;B;A->1;A->2;1->B;2->B;}'
+        graph.save()
+
+        version = GraphVersion.objects.get(graph=graph, version=2)
+        self.assertTrue(version.is_snapshot)
+        self.assertEqual(GraphVersion.get_data(graph.pk, 2), 'digraph{A;2;1;B;A->1;A->2;1->B;2->B;}')
+
+    def test_parses_on_edit(self):
+        graph = Graph(data='digraph{A;1;B;A->1;1->B;}', title='graph', rsrch_id=self.research)
+        graph.save()
+
+        graph = Graph.objects.get(pk=graph.pk)
+        with mock.patch.object(graph_module, 'parse_dot', wraps=parse_dot) as parse, \
+                mock.patch.object(graph_versions, 'parse_dot', wraps=parse_dot) as parse_for_delta:
+            graph.apply_operations([{'op': 'insert_between', 'src': '1', 'dst': 'B', 'node_id': '2'}])
+            graph.save()
+        self.assertEqual(parse.call_count, 1, msg='граф разобран один раз, до изменений')
+        self.assertEqual(parse_for_delta.call_count, 1, msg='для дельты разбирается только прежний текст')
+        self.assertFalse(GraphVersion.objects.get(graph=graph, version=2).is_snapshot)
+
+    def test_no_version_for_stored_whitespace(self):
+        graph = Graph(data='digraph{A;1;B;A->1;1->B;}', title='graph', rsrch_id=self.research)
+        graph.save()
+        # так хранятся графы из фикстур и старые записи
+        Graph.objects.filter(pk=graph.pk).update(data='digraph {\n  A;\n  1;\n  B;\n  A -> 1;\n  1 -> B;\n}\n')
+
+        graph = Graph.objects.get(pk=graph.pk)
+        graph.title = 'new title'
+        with mock.patch.object(Graph, '_sync_graph_nodes') as sync:
+            graph.save()
+        sync.assert_not_called()
+        self.assertEqual(GraphVersion.objects.filter(graph=graph).count(), 1)
+
+    def test_delta_from_last_version(self):
+        graph = Graph(data='digraph{A;1;B;A->1;1->B;}', title='graph', rsrch_id=self.research)
+        graph.save()
+        # data записан в обход save, версия для него не создана
+        Graph.objects.filter(pk=graph.pk).update(data='digraph{A;1;2;B;A->1;1->2;2->B;}')
+
+        graph = Graph.objects.get(pk=graph.pk)
+        graph.apply_operations([{'op': 'insert_between', 'src': '2', 'dst': 'B', 'node_id': '3'}])
+        graph.save()
+
+        self.assertEqual(GraphVersion.get_data(graph.pk, 2), graph.data)
@@ -0,0 +1,42 @@
+import datetime
+from unittest import mock
+
+from django.test import TestCase
+
+from .graph import Graph
+from .research import Research
+from .subgraph import SubgraphRelation
+
+
+class TestSubgraphRelation(TestCase):
+    def setUp(self):
+        today = datetime.date.today()
+        self.research = Research.objects.create(rsrch_id='1', title='research', start_date=today, end_date=today)
+        self.child = Graph(data='digraph{A;B;A->B;}', title='child', rsrch_id=self.research)
+        self.child.save()
+
+    def relations(self):
+        return list(SubgraphRelation.objects.order_by('node_id').values_list('parent_graph_id', 'node_id',
+                                                                             'child_graph_id'))
+
+    def test_sync_on_save(self):
+        graph = Graph(data=f'digraph{{A;1[subgraph={self.child.pk}];2[subgraph=999];B;A->1;1->2;2->B;}}',
+                      title='parent', rsrch_id=self.research)
+        graph.save()
+        self.assertEqual(self.relations(), [(graph.pk, '1', self.child.pk), (graph.pk, '2', 999)])
+
+        graph.rewrite_node_metadata('2', {'is_subgraph': False, 'title': '', 'notes_ids': []})
+        graph.save()
+        self.assertEqual(self.relations(), [(graph.pk, '1', self.child.pk)])
+
+        with mock.patch.object(Graph, '_sync_subgraph_relations') as sync:
+            graph.title = 'new title'
+            graph.save()
+        sync.assert_not_called()
+
+        child_pk = self.child.pk
+        self.child.delete()
+        self.assertEqual(self.relations(), [(graph.pk, '1', child_pk)], msg='ссылка на удаленный подграф остается')
+
+        graph.delete()
+        self.assertEqual(self.relations(), [])
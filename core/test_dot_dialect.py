@@ -0,0 +1,185 @@
+import re
+from unittest import TestCase
+
+import pydot
+
+from core.dot_dialect import parse_dot, dump_dot
+
+# графы из core/models/test_graph.py
+CASES = [
+    '''
+        digraph {
+            A;
+            B;
+            A -> B;
+        }
+    ''',
+    '''
+        digraph {
+            A;
+            1;
+            2;
+            3;
+            4;
+            5;
+            B;
+            A -> 1;
+            1 -> 2;
+            2 -> 3;
+            2 -> 4;
+            2 -> 5;
+            3 -> B;
+            4 -> B;
+            5 -> B;
+        }
+    ''',
+    '''
+        digraph {
+            A;
+            1;
+            2;
+            3;
+            4;
+            B;
+            A -> B;
+            A -> 1;
+            1 -> 2;
+            2 -> 3;
+            3 -> 4;
+            4 -> B;
+        }
+    ''',
+    '''
+        digraph {
+            A;
+            1;
+            2;
+            3;
+            4;
+            5;
+            B;
+            4;
+            A -> 1;
+            1 -> 2;
+            2 -> 3;
+            3 -> 4;
+            4 -> 5;
+            5 -> B;
+        }
+    ''',
+    '''
+        digraph {
+            A;
+            B;
+            A -> 1;
+            1 -> B;
+        }
+    ''',
+    '''
+        digraph {
+            A ;
+            1 [subgraph=123, title=Cool_node];
+            2 ;
+            3 [];
+            B [title="Finish"];
+            A -> 1;
+            1 -> 2;
+            2 -> 3;
+            3 -> B;
+        }
+    ''',
+    '''
+        digraph {
+            A [title="NODE_A"];
+            B;
+            1 [subgraph=123];
+            2;
+            A -> 1;
+            1 -> B;
+            A -> 2;
+            2 -> B;
+        }
+    ''',
+    # как в core/fixtures/dev/subjects.json
+    '''
+        digraph {
+            A;
+            B;
+            1 [title=Методологии];
+            2 [title=Проектирование];
+            3 [subgraph=4, title=API];
+            A -> 1;
+            A -> 2;
+            2 -> 3;
+            3 -> B;
+        }
+    ''',
+    'digraph G {\nA;\n1;\nA -> 1;\n2;\nA -> 2;\n3;\nA -> 3;\nB;\n1 -> B;\n2 -> B;\n3 -> B;\n}\n',
+    'digraph{A;B;A->1->B[weight=2];A->B}',
+]
+
+
+def _strip_parent(obj_dicts: dict) -> dict:
+    return {
+        key: [{k: v for k, v in obj.items() if k != 'parent_graph'} for obj in objs]
+        for key, objs in obj_dicts.items()
+    }
+
+
+class Test_parse_dot(TestCase):
+    def assertSameAsPydot(self, data: str):
+        expected = pydot.graph_from_dot_data(data)[0]
+        actual = parse_dot(data)
+
+        self.assertIsNotNone(actual, msg=data)
+        self.assertEqual(actual.get_name(), expected.get_name(), msg=data)
+        self.assertEqual(_strip_parent(actual.obj_dict['nodes']), _strip_parent(expected.obj_dict['nodes']), msg=data)
+        self.assertEqual(_strip_parent(actual.obj_dict['edges']), _strip_parent(expected.obj_dict['edges']), msg=data)
+        self.assertEqual(actual.to_string(), expected.to_string(), msg=data)
+        self.assertEqual(actual.obj_dict['current_child_sequence'], expected.obj_dict['current_child_sequence'],
+                         msg=data)
+
+    def test_same_as_pydot(self):
+        # граф разбирается только после очистки от пробельных символов (см. Graph._clean_data)
+        for data in CASES:
+            self.assertSameAsPydot(re.sub(r'\s', '', data))
+
+    def test_not_in_dialect(self):
+        for data in [
+            'graph{A;B;A--B;}',
+            'strict digraph{A;B;}',
+            'digraph{node[shape=box];A;B;A->B;}',
+            'digraph{rankdir=LR;A;B;A->B;}',
+            'digraph{subgraph cluster_1{A;}B;A->B;}',
+            'digraph{"A";B;"A"->B;}',
+            'digraph{A:p1->B;}',
+            'digraph{A;B;A->B;',
+            'digraph{A;B;A->B;}digraph{C;}',
+            'digraph{A[label=<b>x</b>];}',
+            'digraph{1a;A->1a;}',
+            'digraph{Узел;A->Узел;}',
+            'digraph{1[title=Мет1];}',
+            'digraph{1[title=Мет,subgraph=1];}',
+            'digraph{// comment\nA;}',
+        ]:
+            self.assertIsNone(parse_dot(data), msg=data)
+
+
+class Test_dump_dot(TestCase):
+    def test_same_as_pydot(self):
+        for data in CASES:
+            dot = pydot.graph_from_dot_data(re.sub(r'\s', '', data))[0]
+            self.assertEqual(dump_dot(dot), dot.to_string(), msg=data)
+
+    def test_built_graph(self):
+        dot = pydot.Dot()
+        dot.add_node(pydot.Node('A', title='"NODE A"'))
+        dot.add_node(pydot.Node('1', subgraph=345))
+        dot.add_node(pydot.Node('B', title=''))
+        dot.add_edge(pydot.Edge(src='A', dst='1'))
+        dot.add_edge(pydot.Edge(src='1', dst='B'))
+        self.assertEqual(dump_dot(dot), dot.to_string())
+
+    def test_not_in_dialect(self):
+        dot = pydot.graph_from_dot_data('digraph{rankdir=LR;A;B;A->B;}')[0]
+        self.assertEqual(dump_dot(dot), dot.to_string())
@@ -0,0 +1,53 @@
+from unittest import TestCase
+
+from core.dot_dialect import parse_dot
+from core.graph_index import GraphIndex, pack_bitset, unpack_bitset, bitset_positions
+
+
+class TestGraphIndex(TestCase):
+    def setUp(self):
+        self.index = GraphIndex.from_dot(parse_dot('digraph{A;1;2;B;A->1;A->2;1->B;2->B;A->B;2->3;}'))
+
+    def test_interning(self):
+        self.assertEqual(self.index.node_ids, ['A', '1', '2', 'B', '3'])
+        self.assertEqual(self.index.declared_count, 4)
+        self.assertTrue(self.index.has_node('2'))
+        self.assertFalse(self.index.has_node('3'), msg='узел 3 есть только в связях')
+        self.assertFalse(self.index.has_node('4'))
+
+    def test_csr(self):
+        self.assertEqual(list(self.index.child_offsets), [0, 3, 4, 6, 6, 6])
+        self.assertEqual(list(self.index.child_targets), [1, 2, 3, 3, 3, 4])
+        self.assertEqual(list(self.index.children(2)), [3, 4])
+        self.assertEqual(list(self.index.parents(3)), [1, 2, 0], msg='в порядке объявления связей')
+
+    def test_dicts(self):
+        self.assertEqual(self.index.get_children_dict()['A'], {'1', '2', 'B'})
+        self.assertEqual(self.index.get_parents_dict()['B'], ['1', '2', 'A'])
+        self.assertEqual(self.index.get_parents_dict()['A'], [])
+
+    def test_levels(self):
+        self.assertEqual(
+            self.index.levels(),
+            {
+                0: {'A': []},
+                1: {'1': ['A'], '2': ['A']},
+                2: {'3': ['2']},
+                3: {'B': ['1', '2', 'A']},
+            },
+        )
+
+    def test_transitive_closure(self):
+        index = GraphIndex.from_dot(parse_dot('digraph{A;1;2;B;A->1;A->2;1->B;2->B;}'))
+        order, ancestors, descendants = index.transitive_closure()
+        self.assertEqual([index.node_ids[u] for u in order], ['A', '1', '2', 'B'])
+
+        b = index.position('B')
+        self.assertEqual(bitset_positions(ancestors[b]), [0, 1, 2])
+        self.assertEqual(bitset_positions(descendants[index.position('1')]), [3])
+        self.assertEqual(descendants[b], 0)
+
+    def test_bitset(self):
+        data = pack_bitset(0b1000000101, 10)
+        self.assertEqual(len(data), 2)
+        self.assertEqual(bitset_positions(unpack_bitset(data)), [0, 2, 9])
@@ -0,0 +1,39 @@
+from unittest import TestCase
+
+from core.graph_layout import layered_layout, _count_crossings
+
+
+class Test_layered_layout(TestCase):
+    def test_removes_crossing(self):
+        # при начальном порядке по айди связи 1->4 и 2->3 пересекаются
+        levels = {
+            '0': {'A': []},
+            '1': {'1': ['A'], '2': ['A']},
+            '2': {'3': ['2'], '4': ['1']},
+            '3': {'B': ['3', '4']},
+        }
+        layout = layered_layout(levels)
+
+        self.assertEqual({node_id: c['level'] for node_id, c in layout.items()},
+                         {'A': 0, '1': 1, '2': 1, '3': 2, '4': 2, 'B': 3})
+        self.assertEqual(layout['1']['order'] < layout['2']['order'], layout['4']['order'] < layout['3']['order'])
+
+    def test_long_edges(self):
+        # связь A->B перескакивает через уровни и проходит через фиктивные узлы
+        levels = {0: {'A': []}, 1: {'1': ['A']}, 2: {'2': ['1']}, 3: {'B': ['2', 'A']}}
+        self.assertEqual(layered_layout(levels), {
+            'A': {'level': 0, 'order': 0},
+            '1': {'level': 1, 'order': 0},
+            '2': {'level': 2, 'order': 0},
+            'B': {'level': 3, 'order': 0},
+        })
+
+    def test_independent_of_key_order(self):
+        levels = {'0': {'A': []}, '1': {'1': ['A'], '2': ['A'], '3': ['A']}, '2': {'B': ['1', '2', '3']}}
+        shuffled = {'2': {'B': ['1', '2', '3']}, '1': {'3': ['A'], '1': ['A'], '2': ['A']}, '0': {'A': []}}
+        self.assertEqual(layered_layout(levels), layered_layout(shuffled))
+
+    def test_count_crossings(self):
+        self.assertEqual(_count_crossings(['a', 'b'], ['x', 'y'], {'a': ['y'], 'b': ['x']}), 1)
+        self.assertEqual(_count_crossings(['a', 'b'], ['x', 'y'], {'a': ['x'], 'b': ['y']}), 0)
+        self.assertEqual(_count_crossings(['a', 'b', 'c'], ['x', 'y', 'z'], {'a': ['z'], 'b': ['y'], 'c': ['x']}), 3)
@@ -0,0 +1,65 @@
+import random
+from unittest import TestCase
+
+from core.benchmarks.dags import SHAPES, generate_dot
+from core.dot_dialect import parse_dot, dump_dot
+from core.graph_index import GraphIndex
+from core.graph_levels import IncrementalLevels
+from core.graph_operations import GraphEditor, GraphOperationError
+from core.models import Graph
+
+
+def _random_operation(editor: GraphEditor, rng: random.Random, next_id: int) -> dict:
+    node_ids = list(editor.nodes)
+    edges = list(editor.edges)
+    kind = rng.choice(['add_node', 'add_edge', 'add_edge', 'remove_edge', 'remove_node', 'insert_between'])
+
+    if kind == 'add_node':
+        return {'op': 'add_node', 'node_id': str(next_id)}
+    if kind == 'add_edge':
+        return {'op': 'add_edge', 'src': rng.choice(node_ids), 'dst': rng.choice(node_ids)}
+    if kind == 'remove_node':
+        return {'op': 'remove_node', 'node_id': rng.choice(node_ids)}
+    if not edges:
+        return {'op': 'add_node', 'node_id': str(next_id)}
+
+    src, dst = rng.choice(edges)
+    if kind == 'remove_edge':
+        return {'op': 'remove_edge', 'src': src, 'dst': dst}
+    return {'op': 'insert_between', 'src': src, 'dst': dst, 'node_id': str(next_id)}
+
+
+class TestIncrementalLevels(TestCase):
+    def test_matches_full_recompute(self):
+        """
+        После каждой случайной операции уровни совпадают с полным пересчетом Graph._dot_to_dict_levels
+        """
+        rng = random.Random(12)
+        for shape in sorted(SHAPES):
+            for seed in range(5):
+                dot = parse_dot(generate_dot(shape, 30, seed))
+                editor = GraphEditor(dot)
+                editor.levels = IncrementalLevels.from_index(GraphIndex.from_dot(dot), editor.parents, editor.children)
+
+                for step in range(60):
+                    op = _random_operation(editor, rng, 1000 + step)
+                    try:
+                        editor.apply([op])
+                    except GraphOperationError:
+                        continue
+
+                    expected = Graph(data=dump_dot(dot))._dot_to_dict_levels()
+                    self.assertEqual(editor.levels.levels(), expected, msg=f'{shape}, seed={seed}, {op}')
+
+    def test_from_levels(self):
+        graph = Graph(data='digraph{A;1;2;B;A->1;1->2;A->B;2->B;}')
+        levels = graph._dot_to_dict_levels()
+        self.assertEqual(levels[3], {'B': ['2', 'A']})
+
+        dot = graph._get_dot()
+        editor = GraphEditor(dot)
+        editor.levels = IncrementalLevels.from_levels(
+            {str(level): nodes for level, nodes in levels.items()}, editor.parents, editor.children,
+        )
+        editor.apply([{'op': 'remove_node', 'node_id': '2'}, {'op': 'add_edge', 'src': '1', 'dst': 'B'}])
+        self.assertEqual(editor.levels.levels(), {0: {'A': []}, 1: {'1': ['A']}, 2: {'B': ['1', 'A']}})
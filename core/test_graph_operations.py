@@ -0,0 +1,51 @@
+from unittest import TestCase
+
+from core.dot_dialect import parse_dot, dump_dot
+from core.graph_operations import GraphEditor, GraphOperationError
+
+
+class TestGraphEditor(TestCase):
+    def setUp(self):
+        self.dot = parse_dot('digraph{A;1[title=First];B;A->1;1->B;}')
+        self.editor = GraphEditor(self.dot)
+
+    def test_insert_between_and_set_attr(self):
+        self.editor.apply([
+            {'op': 'insert_between', 'src': '1', 'dst': 'B', 'node_id': '2', 'attrs': {'title': 'Second node'}},
+            {'op': 'add_node', 'node_id': '3'},
+            {'op': 'add_edge', 'src': 'A', 'dst': '3'},
+            {'op': 'add_edge', 'src': '3', 'dst': 'B'},
+            {'op': 'set_attr', 'node_id': '1', 'key': 'title', 'value': None},
+            {'op': 'set_attr', 'node_id': '3', 'key': 'subgraph', 'value': '12'},
+        ])
+        self.assertEqual(
+            dump_dot(self.dot),
+            'digraph G {\nA;\n1;\nB;\nA -> 1;\n2 [title=Second_node];\n1 -> 2;\n2 -> B;\n3 [subgraph=12];\n'
+            'A -> 3;\n3 -> B;\n}\n',
+        )
+
+    def test_remove_node(self):
+        self.editor.apply([
+            {'op': 'add_edge', 'src': 'A', 'dst': 'B'},
+            {'op': 'remove_node', 'node_id': '1'},
+        ])
+        self.assertEqual(dump_dot(self.dot), 'digraph G {\nA;\nB;\nA -> B;\n}\n')
+        self.assertEqual(self.editor.removed_nodes, {'1'})
+
+    def test_errors(self):
+        cases = [
+            ({'op': 'add_edge', 'src': 'B', 'dst': 'A'}, 'creates a cycle'),
+            ({'op': 'add_edge', 'src': 'A', 'dst': '1'}, 'is already in the graph'),
+            ({'op': 'add_edge', 'src': 'A', 'dst': '5'}, 'is not in the graph'),
+            ({'op': 'remove_edge', 'src': 'A', 'dst': 'B'}, 'is not in the graph'),
+            ({'op': 'remove_node', 'node_id': 'A'}, 'cannot be removed'),
+            ({'op': 'add_node', 'node_id': '1'}, 'is already in the graph'),
+            ({'op': 'add_node', 'node_id': 'a b'}, 'invalid node id'),
+            ({'op': 'add_node', 'node_id': 'n' * 51}, 'invalid node id'),
+            ({'op': 'set_attr', 'node_id': '1', 'key': 'color', 'value': 'red'}, 'cannot be changed'),
+            ({'op': 'set_attr', 'node_id': '1', 'key': 'subgraph', 'value': '-1'}, 'subgraph id'),
+        ]
+        for op, message in cases:
+            with self.assertRaises(GraphOperationError, msg=op) as cm:
+                GraphEditor(parse_dot('digraph{A;1;B;A->1;1->B;}')).apply([op])
+            self.assertIn(message, str(cm.exception))
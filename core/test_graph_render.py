@@ -0,0 +1,72 @@
+import datetime
+import re
+import shutil
+import tempfile
+from unittest import TestCase, mock, skipUnless
+
+from django import test
+
+from core import graph_render
+from core.graph_render import render_graph
+from core.models import Graph, Research
+from sci_activity_doc.disk_cache import DiskCache
+
+
+class TestRenderGraph(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        patcher = mock.patch.object(graph_render, 'render_cache', DiskCache(tmp.name, 1024 * 1024))
+        self.cache = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_served_from_cache(self):
+        self.cache.set('0123.svg', b'<svg/>')
+        get_data = mock.Mock(return_value='digraph{A;B;A->B;}')
+        with mock.patch.object(graph_render, '_run_dot') as run_dot:
+            self.assertEqual(render_graph(get_data, '0123', 'svg'), b'<svg/>')
+        run_dot.assert_not_called()
+        get_data.assert_not_called()
+
+    def test_unsupported_format(self):
+        with self.assertRaises(ValueError):
+            render_graph(lambda: 'digraph{A;B;A->B;}', '0123', 'pdf')
+
+    @skipUnless(shutil.which('dot'), 'Graphviz не установлен')
+    def test_render_svg(self):
+        content = render_graph(lambda: 'digraph{A;B;A->B;}', '0123', 'svg')
+        self.assertIn(b'<svg', content)
+        self.assertEqual(self.cache.get('0123.svg'), content)
+
+
+class TestGraph_render(test.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        patcher = mock.patch.object(graph_render, 'render_cache', DiskCache(tmp.name, 1024 * 1024))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        today = datetime.date.today()
+        research = Research.objects.create(rsrch_id='1', title='research', start_date=today, end_date=today)
+        graph = Graph(data='digraph{A;B;A->B;}', title='graph', rsrch_id=research)
+        graph.save()
+        graph.apply_operations([
+            {'op': 'insert_between', 'src': 'A', 'dst': 'B', 'node_id': '1', 'attrs': {'title': 'Привет мир'}},
+        ])
+        graph.save()
+        self.graph = Graph.objects.get(pk=graph.pk)
+
+    def test_dot_source(self):
+        # сохраненный data очищен от пробелов и Graphviz его не разберет, отрисовывается текст с пробелами
+        self.assertTrue(self.graph.data.startswith('digraphG{'))
+        with mock.patch.object(graph_render, '_run_dot', return_value=b'<svg/>') as run_dot:
+            self.assertEqual(self.graph.render('svg'), b'<svg/>')
+
+        source = run_dot.call_args.args[0]
+        self.assertTrue(source.startswith('digraph G {'))
+        self.assertEqual(re.sub(r'\s', '', source), self.graph.data)
+
+    @skipUnless(shutil.which('dot'), 'Graphviz не установлен')
+    def test_render_saved_graph(self):
+        self.assertIn(b'<svg', self.graph.render('svg'))
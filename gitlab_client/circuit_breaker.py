@@ -0,0 +1,64 @@
+"""
+Автоматический выключатель (circuit breaker) запросов к гитлабу.
+
+После failure_threshold неудачных запросов подряд выключатель размыкается, и запросы к гитлабу
+не выполняются вовсе, пока не пройдет reset_timeout секунд. Затем один пробный запрос пропускается:
+при успехе выключатель замыкается, при неудаче снова размыкается на reset_timeout.
+Так во время недоступности гитлаба обработчики не ждут каждый раз таймаута запроса.
+"""
+import threading
+import time
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def allow(self) -> bool:
+        """
+        Можно ли выполнить запрос. После reset_timeout разомкнутого состояния True возвращается
+        только одному вызывающему (пробный запрос), остальные ждут его результата
+        """
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._state = HALF_OPEN
+                return True
+            return False
+
+    def record_success(self) -> bool:
+        """
+        Отмечает успешный запрос. Возвращает True, если выключатель был разомкнут и теперь замкнулся
+        """
+        with self._lock:
+            recovered = self._state != CLOSED
+            self._state = CLOSED
+            self._failures = 0
+            return recovered
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+
+    def reset(self):
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
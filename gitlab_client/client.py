@@ -1,11 +1,24 @@
-import requests
-from requests import Response
-from rest_framework.exceptions import AuthenticationFailed
+import threading
+import time
+from typing import Dict, Optional, Set, Tuple
 
-from gitlab_client.consts import NOTE_ATTR_REPO_ID, NOTE_ATTR_BRANCH_NAME, NOTE_ATTR_FILE_PATH, NOTE_ATTR_FILE_FORMAT
+from requests import RequestException, Response
+
+from gitlab_client.consts import NOTE_ATTR_REPO_ID, NOTE_ATTR_BRANCH_NAME, NOTE_ATTR_FILE_PATH, NOTE_ATTR_FILE_FORMAT, \
+    GITLAB_BLOB_ID_HEADER, ETAG_HEADER, IF_NONE_MATCH_HEADER
+from gitlab_client.note_store import note_store
 from gitlab_client.parse_url import _get_note_attributes
+from gitlab_client.session import breaker, get_session
 from sci_activity_doc.settings import GITLAB_API_ADDRESS, GITLAB_ACCESS_TOKEN, GITLAB_ACCESS_TOKEN_HEADER_KEY, \
-    GITLAB_TIMEOUT
+    GITLAB_AUTH_CHECK_TTL, GITLAB_CONNECT_TIMEOUT, GITLAB_READ_TIMEOUT
+
+# (адрес api, токен) -> время (time.monotonic) последней успешной проверки токена, общее для всех экземпляров GLClient
+_auth_checked_at: Dict[Tuple[str, str], float] = dict()
+_auth_lock = threading.Lock()
+
+# url заметок, отданных из сохраненных текстов, пока гитлаб был недоступен; обновляются в фоне после его восстановления
+_stale_note_urls: Set[str] = set()
+_stale_lock = threading.Lock()
 
 
 class GitlabError(Exception):
@@ -20,25 +33,67 @@ class GitlabError(Exception):
         super().__init__(self.message)
 
 
+class GitlabUnavailable(GitlabError):
+    """
+    Гитлаб не отвечает, или запросы к нему приостановлены выключателем
+    """
+
+    def __init__(self, content: str):
+        super().__init__(content, 503)
+
+
 class GLClient:
-    def __init__(self, ):
-        self._auth()
+    """
+    Клиент api гитлаба. Токен проверяется не при создании клиента, а перед первым обращением к гитлабу,
+    и успешная проверка запоминается на GITLAB_AUTH_CHECK_TTL секунд для всего процесса
+    """
 
     def _auth(self):
+        key = (GITLAB_API_ADDRESS, GITLAB_ACCESS_TOKEN)
+        with _auth_lock:
+            checked_at = _auth_checked_at.get(key)
+        if checked_at is not None and time.monotonic() - checked_at < GITLAB_AUTH_CHECK_TTL:
+            return
+
         resp = self._get_projects()
         if resp.status_code != 200:
-            raise AuthenticationFailed
+            raise GitlabError(str(resp.content), resp.status_code)
 
-    def _get(self, url: str, params: dict = None, headers: dict = None) -> Response:
-        resp = requests.get(
-            url=url,
-            params=params,
-            headers=headers,
-            timeout=GITLAB_TIMEOUT,
-        )
+        with _auth_lock:
+            _auth_checked_at[key] = time.monotonic()
+
+    def _request(self, method: str, url: str, params: dict = None, headers: dict = None) -> Response:
+        """
+        Запрос через выключатель: ошибки соединения, таймауты и ответы 5xx считаются отказами гитлаба
+        """
+        if not breaker.allow():
+            raise GitlabUnavailable('requests to Gitlab are suspended after repeated failures')
+
+        try:
+            resp = get_session(url).request(
+                method=method,
+                url=url,
+                params=params,
+                headers=headers,
+                timeout=(GITLAB_CONNECT_TIMEOUT, GITLAB_READ_TIMEOUT),
+            )
+        except RequestException as e:
+            breaker.record_failure()
+            raise GitlabUnavailable(str(e))
+
+        if resp.status_code >= 500:
+            breaker.record_failure()
+        elif breaker.record_success():
+            _start_stale_refresh()
 
         return resp
 
+    def _get(self, url: str, params: dict = None, headers: dict = None) -> Response:
+        return self._request('GET', url, params, headers)
+
+    def _head(self, url: str, params: dict = None, headers: dict = None) -> Response:
+        return self._request('HEAD', url, params, headers)
+
     def _get_projects(self):
         return self._get(
             url=f'{GITLAB_API_ADDRESS}/projects/',
@@ -47,9 +102,33 @@ class GLClient:
             },
         )
 
-    def _get_note_by_url(self, note_attrs: dict):
+    def _get_note_by_url(self, note_attrs: dict, etag: str = None):
+        """
+        Текст файла заметки. Если передан etag, запрос условный: при неизменившемся файле гитлаб
+        ответит 304 без содержимого
+        """
+        headers = {
+            GITLAB_ACCESS_TOKEN_HEADER_KEY: GITLAB_ACCESS_TOKEN,
+        }
+        if etag:
+            headers[IF_NONE_MATCH_HEADER] = etag
+
         resp = self._get(
             url=f'{GITLAB_API_ADDRESS}/projects/{note_attrs[NOTE_ATTR_REPO_ID]}/repository/files/{note_attrs[NOTE_ATTR_FILE_PATH]}/raw',
+            headers=headers,
+            params={
+                'ref': note_attrs[NOTE_ATTR_BRANCH_NAME],
+            },
+        )
+        return resp
+
+    def _get_note_blob_id(self, note_attrs: dict) -> Optional[str]:
+        """
+        Айди блоба файла заметки по запросу HEAD к api файлов (содержимое файла не передается).
+        None - если гитлаб его не вернул
+        """
+        resp = self._head(
+            url=f'{GITLAB_API_ADDRESS}/projects/{note_attrs[NOTE_ATTR_REPO_ID]}/repository/files/{note_attrs[NOTE_ATTR_FILE_PATH]}',
             headers={
                 GITLAB_ACCESS_TOKEN_HEADER_KEY: GITLAB_ACCESS_TOKEN,
             },
@@ -57,20 +136,111 @@ class GLClient:
                 'ref': note_attrs[NOTE_ATTR_BRANCH_NAME],
             },
         )
-        return resp
+        return resp.headers.get(GITLAB_BLOB_ID_HEADER) if resp.ok else None
 
     def get_note_raw_text_by_url(self, note_url: str) -> (str, str):
         """
         Получает из гитлаба текст файла по его url.
-        Первый возвращаемый параметр - текст, а второй - формат файла заметки
+        Первый возвращаемый параметр - текст, а второй - формат файла заметки.
+
+        Уже скачанный текст берется из note_store и только перепроверяется:
+        условным запросом по ETag прошлого ответа или, если ETag неизвестен, сравнением айди блоба,
+        полученного запросом HEAD. Файл скачивается заново, только если он изменился
         """
 
         note_attrs = _get_note_attributes(note_url)
-        resp = self._get_note_by_url(note_attrs)
+        self._auth()
+
+        repo_id, file_path = note_attrs[NOTE_ATTR_REPO_ID], note_attrs[NOTE_ATTR_FILE_PATH]
+        file_format = note_attrs[NOTE_ATTR_FILE_FORMAT]
+
+        validators = note_store.get_validators(note_url)
+        text = note_store.get(repo_id, file_path, validators['blob_id']) if validators else None
+
+        if text is not None and validators['etag']:
+            blob_id, etag = validators['blob_id'], validators['etag']
+        else:
+            blob_id, etag = self._get_note_blob_id(note_attrs), None
+            if blob_id:
+                text = note_store.get(repo_id, file_path, blob_id)
+                if text is not None:
+                    if not validators or validators['blob_id'] != blob_id:
+                        note_store.set_validators(note_url, blob_id, None)
+                    return text, file_format
 
-        if resp.ok:
+        resp = self._get_note_by_url(note_attrs, etag)
+
+        if resp.status_code == 304:
+            return text, file_format
+
+        elif resp.ok:
             text = resp.text
-            return text, note_attrs[NOTE_ATTR_FILE_FORMAT]
+            # текст сохраняется только под айди блоба из этого же ответа: айди из HEAD или прошлого ответа
+            # может относиться к другому содержимому, если файл изменился
+            blob_id = resp.headers.get(GITLAB_BLOB_ID_HEADER)
+            if blob_id:
+                note_store.set(repo_id, file_path, blob_id, text)
+                note_store.set_validators(note_url, blob_id, resp.headers.get(ETAG_HEADER))
+            return text, file_format
 
         else:
             raise GitlabError(str(resp.content), resp.status_code)
+
+    def get_note_text_or_stale(self, note_url: str) -> (str, str, bool):
+        """
+        Как get_note_raw_text_by_url, но если гитлаб недоступен - возвращает последний полученный текст заметки.
+        Третий возвращаемый параметр - True, если текст взят из сохраненных и мог устареть.
+        Такие заметки обновятся в фоне, когда гитлаб снова ответит.
+        GitlabError - если гитлаб недоступен, а сохраненного текста нет, или он вернул ошибку (например, 404)
+        """
+        try:
+            text, file_format = self.get_note_raw_text_by_url(note_url)
+        except GitlabError as e:
+            if not isinstance(e, GitlabUnavailable) and e.code < 500:
+                raise
+
+            text = _get_last_note_text(note_url)
+            if text is None:
+                raise
+            with _stale_lock:
+                _stale_note_urls.add(note_url)
+            return text, _get_note_attributes(note_url)[NOTE_ATTR_FILE_FORMAT], True
+
+        with _stale_lock:
+            _stale_note_urls.discard(note_url)
+        return text, file_format, False
+
+
+def _get_last_note_text(note_url: str) -> Optional[str]:
+    validators = note_store.get_validators(note_url)
+    if not validators:
+        return None
+    note_attrs = _get_note_attributes(note_url)
+    return note_store.get(note_attrs[NOTE_ATTR_REPO_ID], note_attrs[NOTE_ATTR_FILE_PATH], validators['blob_id'])
+
+
+def _refresh_stale_notes():
+    client = GLClient()
+    while True:
+        with _stale_lock:
+            if not _stale_note_urls:
+                return
+            note_url = _stale_note_urls.pop()
+
+        try:
+            client.get_note_raw_text_by_url(note_url)
+        except GitlabUnavailable:
+            # гитлаб снова недоступен: обновление продолжится после следующего восстановления
+            with _stale_lock:
+                _stale_note_urls.add(note_url)
+            return
+        except GitlabError:
+            # заметка удалена или недоступна токену - ее текст обновится при следующем запросе
+            pass
+
+
+def _start_stale_refresh():
+    with _stale_lock:
+        if not _stale_note_urls:
+            return
+    threading.Thread(target=_refresh_stale_notes, name='gitlab-stale-refresh', daemon=True).start()
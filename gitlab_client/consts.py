@@ -5,3 +5,9 @@ NOTE_ATTR_FILE_PATH = 'file_path'
 NOTE_ATTR_NOTE_TYPE = 'note_type'
 NOTE_ATTR_FILE_FORMAT = 'file_format'
 
+# заголовок ответа api файлов гитлаба с айди блоба (sha git-объекта) файла
+GITLAB_BLOB_ID_HEADER = 'X-Gitlab-Blob-Id'
+
+# заголовки условных запросов (RFC 9110)
+ETAG_HEADER = 'ETag'
+IF_NONE_MATCH_HEADER = 'If-None-Match'
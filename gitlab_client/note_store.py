@@ -0,0 +1,48 @@
+"""
+Хранилище исходных текстов заметок на диске, ключ - (репозиторий, путь к файлу, айди блоба в гитлабе).
+
+Айди блоба (sha git-объекта) меняется только вместе с содержимым файла, поэтому сохраненный текст
+не устаревает, а один и тот же файл, на который ссылаются разные заметки или ветки, скачивается один раз.
+
+Кроме текстов для каждого url заметки хранятся валидаторы последнего полученного ответа (ETag и айди блоба),
+по ним текст заметки перепроверяется условным запросом без повторного скачивания.
+"""
+import hashlib
+import json
+from typing import Optional
+
+from sci_activity_doc.disk_cache import DiskCache
+from sci_activity_doc.settings import GITLAB_NOTE_STORE_DIR, GITLAB_NOTE_STORE_MAX_SIZE
+
+
+class NoteSourceStore:
+    def __init__(self, directory, max_size: int):
+        self._cache = DiskCache(directory, max_size)
+
+    @staticmethod
+    def _key(repo_id: str, file_path: str, blob_id: str) -> str:
+        return hashlib.sha256(f'{repo_id}\0{file_path}\0{blob_id}'.encode()).hexdigest()
+
+    def get(self, repo_id: str, file_path: str, blob_id: str) -> Optional[str]:
+        content = self._cache.get(self._key(repo_id, file_path, blob_id))
+        return None if content is None else content.decode()
+
+    def set(self, repo_id: str, file_path: str, blob_id: str, text: str):
+        self._cache.set(self._key(repo_id, file_path, blob_id), text.encode())
+
+    @staticmethod
+    def _validators_key(note_url: str) -> str:
+        return hashlib.sha256(f'validators\0{note_url}'.encode()).hexdigest()
+
+    def get_validators(self, note_url: str) -> Optional[dict]:
+        """
+        Валидаторы последнего ответа гитлаба по заметке: {'blob_id': ..., 'etag': ...}, etag может быть None
+        """
+        content = self._cache.get(self._validators_key(note_url))
+        return None if content is None else json.loads(content)
+
+    def set_validators(self, note_url: str, blob_id: str, etag: Optional[str]):
+        self._cache.set(self._validators_key(note_url), json.dumps({'blob_id': blob_id, 'etag': etag}).encode())
+
+
+note_store = NoteSourceStore(GITLAB_NOTE_STORE_DIR, GITLAB_NOTE_STORE_MAX_SIZE)
@@ -0,0 +1,84 @@
+"""
+Общие для процесса HTTP-соединения с гитлабом.
+
+На каждый хост создается один HTTPAdapter с пулом keep-alive соединений и повторами запросов
+с экспоненциальной задержкой при ошибках соединения и ответах 5xx. Пул адаптера потокобезопасен и общий
+для всех потоков, а requests.Session (хранит куки и прочее состояние) у каждого потока своя.
+
+Каждая неудачная попытка, после которой делается повтор, считается отказом гитлаба в общем для процесса
+выключателе breaker (см. gitlab_client.circuit_breaker), и как только он разомкнулся, повторы прекращаются.
+Последнюю попытку запроса учитывает GLClient.
+"""
+import threading
+from typing import Dict
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import MaxRetryError, ResponseError
+from urllib3.util.retry import Retry
+
+from gitlab_client.circuit_breaker import CircuitBreaker, CLOSED
+from sci_activity_doc.settings import GITLAB_POOL_SIZE, GITLAB_RETRIES, GITLAB_RETRY_BACKOFF, \
+    GITLAB_CIRCUIT_FAILURE_THRESHOLD, GITLAB_CIRCUIT_RESET_TIMEOUT
+
+RETRY_STATUSES = (500, 502, 503, 504)
+
+# общий для процесса выключатель запросов к гитлабу
+breaker = CircuitBreaker(GITLAB_CIRCUIT_FAILURE_THRESHOLD, GITLAB_CIRCUIT_RESET_TIMEOUT)
+
+_adapters: Dict[str, HTTPAdapter] = dict()
+_adapters_lock = threading.Lock()
+_local = threading.local()
+
+
+class _BreakerRetry(Retry):
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        # если повторы исчерпаны, здесь бросается MaxRetryError, и попытку учтет GLClient
+        new_retry = super().increment(method, url, response, error, _pool, _stacktrace)
+
+        # выключатель разомкнулся - повтор не делается; GLClient еще раз отметит отказ, для
+        # разомкнутого выключателя это лишь сдвигает начало reset_timeout
+        breaker.record_failure()
+        if breaker.state != CLOSED:
+            reason = error or ResponseError(f'{response.status} error response' if response else 'request failed')
+            raise MaxRetryError(_pool, url, reason) from reason
+        return new_retry
+
+
+def _make_adapter() -> HTTPAdapter:
+    retry = _BreakerRetry(
+        total=GITLAB_RETRIES,
+        backoff_factor=GITLAB_RETRY_BACKOFF,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset({'GET', 'HEAD'}),
+        # после исчерпания повторов возвращается последний ответ, а не исключение
+        raise_on_status=False,
+    )
+    return HTTPAdapter(pool_connections=1, pool_maxsize=GITLAB_POOL_SIZE, max_retries=retry, pool_block=False)
+
+
+def get_adapter(url: str) -> HTTPAdapter:
+    parsed = urlparse(url)
+    host = f'{parsed.scheme}://{parsed.netloc}'
+    with _adapters_lock:
+        if host not in _adapters:
+            _adapters[host] = _make_adapter()
+        return _adapters[host]
+
+
+def get_session(url: str) -> requests.Session:
+    """
+    Сессия текущего потока, запросы которой к хосту url идут через общий пул соединений
+    """
+    sessions: Dict[str, requests.Session] = getattr(_local, 'sessions', None)
+    if sessions is None:
+        sessions = _local.sessions = dict()
+
+    parsed = urlparse(url)
+    host = f'{parsed.scheme}://{parsed.netloc}'
+    if host not in sessions:
+        session = requests.Session()
+        session.mount(f'{host}/', get_adapter(url))
+        sessions[host] = session
+    return sessions[host]
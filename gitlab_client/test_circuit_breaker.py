@@ -0,0 +1,43 @@
+from unittest import TestCase, mock
+
+from gitlab_client import circuit_breaker
+from gitlab_client.circuit_breaker import CircuitBreaker, CLOSED, OPEN, HALF_OPEN
+
+
+class TestCircuitBreaker(TestCase):
+    def test_opens_after_consecutive_failures(self):
+        breaker = CircuitBreaker(failure_threshold=3, reset_timeout=10)
+        breaker.record_failure()
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CLOSED)
+        self.assertTrue(breaker.allow())
+
+        breaker.record_failure()
+        self.assertEqual(breaker.state, OPEN)
+        self.assertFalse(breaker.allow())
+
+    def test_single_trial_after_reset_timeout(self):
+        with mock.patch.object(circuit_breaker.time, 'monotonic', return_value=100.):
+            breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+            breaker.record_failure()
+
+        with mock.patch.object(circuit_breaker.time, 'monotonic', return_value=105.):
+            self.assertFalse(breaker.allow())
+
+        with mock.patch.object(circuit_breaker.time, 'monotonic', return_value=110.):
+            self.assertTrue(breaker.allow())
+            self.assertEqual(breaker.state, HALF_OPEN)
+            self.assertFalse(breaker.allow())
+
+            breaker.record_failure()
+            self.assertEqual(breaker.state, OPEN)
+            self.assertFalse(breaker.allow())
+
+        with mock.patch.object(circuit_breaker.time, 'monotonic', return_value=120.):
+            self.assertTrue(breaker.allow())
+            self.assertTrue(breaker.record_success())
+            self.assertEqual(breaker.state, CLOSED)
+            self.assertFalse(breaker.record_success())
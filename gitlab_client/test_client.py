@@ -0,0 +1,164 @@
+import tempfile
+from unittest import TestCase, mock
+
+from requests import ConnectionError
+
+from gitlab_client import client
+from gitlab_client.circuit_breaker import CircuitBreaker
+from gitlab_client.client import GLClient, GitlabError, GitlabUnavailable
+from gitlab_client.consts import GITLAB_BLOB_ID_HEADER, ETAG_HEADER
+from gitlab_client.note_store import NoteSourceStore
+
+NOTE_URL = 'https://sa2systems.ru:88/rnd/rndcse/blob/main/ResearchNotes/rndcse_not_dev_2021_11_21.tex'
+
+
+def _response(status_code: int, text: str = '', headers: dict = None) -> mock.Mock:
+    return mock.Mock(status_code=status_code, ok=status_code < 400, text=text, content=text.encode(),
+                     headers=headers or {})
+
+
+class TestGLClient_auth(TestCase):
+    def setUp(self):
+        client._auth_checked_at.clear()
+        self.addCleanup(client._auth_checked_at.clear)
+        patcher = mock.patch.object(GLClient, '_get_note_blob_id', return_value=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_checked_lazily_and_cached(self):
+        with mock.patch.object(GLClient, '_get_projects', return_value=_response(200)) as get_projects, \
+                mock.patch.object(GLClient, '_get_note_by_url', return_value=_response(200, 'text')):
+            GLClient()
+            get_projects.assert_not_called()
+
+            self.assertEqual(GLClient().get_note_raw_text_by_url(NOTE_URL), ('text', 'tex'))
+            self.assertEqual(GLClient().get_note_raw_text_by_url(NOTE_URL), ('text', 'tex'))
+            self.assertEqual(get_projects.call_count, 1)
+
+            with mock.patch.object(client, 'GITLAB_AUTH_CHECK_TTL', 0):
+                GLClient().get_note_raw_text_by_url(NOTE_URL)
+            self.assertEqual(get_projects.call_count, 2)
+
+    def test_failed_check_not_cached(self):
+        with mock.patch.object(GLClient, '_get_projects', return_value=_response(401)) as get_projects, \
+                mock.patch.object(GLClient, '_get_note_by_url') as get_note:
+            for _ in range(2):
+                with self.assertRaises(GitlabError):
+                    GLClient().get_note_raw_text_by_url(NOTE_URL)
+            self.assertEqual(get_projects.call_count, 2)
+            get_note.assert_not_called()
+
+
+class TestGLClient_note_store(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        for patcher in (
+                mock.patch.object(client, 'note_store', NoteSourceStore(tmp.name, 1024 * 1024)),
+                mock.patch.object(GLClient, '_auth'),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_same_blob_fetched_once(self):
+        with mock.patch.object(GLClient, '_head', return_value=_response(200, headers={GITLAB_BLOB_ID_HEADER: 'a1'})), \
+                mock.patch.object(GLClient, '_get_note_by_url', return_value=_response(
+                    200, 'text', {GITLAB_BLOB_ID_HEADER: 'a1'})) as get_note:
+            self.assertEqual(GLClient().get_note_raw_text_by_url(NOTE_URL), ('text', 'tex'))
+            self.assertEqual(GLClient().get_note_raw_text_by_url(NOTE_URL), ('text', 'tex'))
+            self.assertEqual(get_note.call_count, 1)
+
+    def test_changed_blob_fetched_again(self):
+        with mock.patch.object(GLClient, '_head', side_effect=[
+            _response(200, headers={GITLAB_BLOB_ID_HEADER: 'a1'}),
+            _response(200, headers={GITLAB_BLOB_ID_HEADER: 'b2'}),
+        ]), mock.patch.object(GLClient, '_get_note_by_url', side_effect=[
+            _response(200, 'old', {GITLAB_BLOB_ID_HEADER: 'a1'}),
+            _response(200, 'new', {GITLAB_BLOB_ID_HEADER: 'b2'}),
+        ]):
+            self.assertEqual(GLClient().get_note_raw_text_by_url(NOTE_URL), ('old', 'tex'))
+            self.assertEqual(GLClient().get_note_raw_text_by_url(NOTE_URL), ('new', 'tex'))
+
+    def test_without_blob_id_not_stored(self):
+        with mock.patch.object(GLClient, '_head', return_value=_response(404)), \
+                mock.patch.object(GLClient, '_get_note_by_url', return_value=_response(200, 'text')) as get_note:
+            for _ in range(2):
+                self.assertEqual(GLClient().get_note_raw_text_by_url(NOTE_URL), ('text', 'tex'))
+            self.assertEqual(get_note.call_count, 2)
+
+    def test_revalidated_by_etag(self):
+        with mock.patch.object(GLClient, '_head', return_value=_response(200, headers={GITLAB_BLOB_ID_HEADER: 'a1'})) \
+                as head, mock.patch.object(GLClient, '_get_note_by_url', side_effect=[
+                    _response(200, 'old', {GITLAB_BLOB_ID_HEADER: 'a1', ETAG_HEADER: '"a1"'}),
+                    _response(304),
+                    _response(200, 'new', {GITLAB_BLOB_ID_HEADER: 'b2', ETAG_HEADER: '"b2"'}),
+                    _response(304),
+                ]) as get_note:
+            for expected in ('old', 'old', 'new', 'new'):
+                self.assertEqual(GLClient().get_note_raw_text_by_url(NOTE_URL), (expected, 'tex'))
+
+            self.assertEqual(head.call_count, 1)
+            self.assertEqual([call.args[1] for call in get_note.call_args_list], [None, '"a1"', '"a1"', '"b2"'])
+
+    def test_text_without_blob_id_not_stored(self):
+        other_branch_url = NOTE_URL.replace('/blob/main/', '/blob/dev/')
+        with mock.patch.object(GLClient, '_head', return_value=_response(200, headers={GITLAB_BLOB_ID_HEADER: 'a1'})), \
+                mock.patch.object(GLClient, '_get_note_by_url', side_effect=[
+                    _response(200, 'old', {GITLAB_BLOB_ID_HEADER: 'a1', ETAG_HEADER: '"a1"'}),
+                    _response(200, 'new'),
+                ]):
+            self.assertEqual(GLClient().get_note_raw_text_by_url(NOTE_URL), ('old', 'tex'))
+            self.assertEqual(GLClient().get_note_raw_text_by_url(NOTE_URL), ('new', 'tex'))
+            # новый текст не записан под прежним айди блоба
+            self.assertEqual(GLClient().get_note_raw_text_by_url(other_branch_url), ('old', 'tex'))
+
+
+class TestGLClient_get_note_text_or_stale(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.session = mock.Mock()
+        for patcher in (
+                mock.patch.object(client, 'note_store', NoteSourceStore(tmp.name, 1024 * 1024)),
+                mock.patch.object(client, 'breaker', CircuitBreaker(failure_threshold=2, reset_timeout=60)),
+                mock.patch.object(client, 'get_session', return_value=self.session),
+                mock.patch.object(client, '_start_stale_refresh'),
+                mock.patch.object(GLClient, '_auth'),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        client._stale_note_urls.clear()
+        self.addCleanup(client._stale_note_urls.clear)
+
+    def test_fails_fast_and_serves_stale_when_gitlab_is_down(self):
+        self.session.request.side_effect = [
+            _response(200, headers={GITLAB_BLOB_ID_HEADER: 'a1'}),
+            _response(200, 'text', {GITLAB_BLOB_ID_HEADER: 'a1', ETAG_HEADER: '"a1"'}),
+        ]
+        self.assertEqual(GLClient().get_note_text_or_stale(NOTE_URL), ('text', 'tex', False))
+
+        self.session.request.side_effect = ConnectionError('connection refused')
+        for _ in range(3):
+            self.assertEqual(GLClient().get_note_text_or_stale(NOTE_URL), ('text', 'tex', True))
+        # после двух отказов подряд выключатель разомкнулся, и третий запрос в гитлаб не отправлялся
+        self.assertEqual(self.session.request.call_count, 4)
+        self.assertEqual(client._stale_note_urls, {NOTE_URL})
+
+        with self.assertRaises(GitlabUnavailable):
+            GLClient().get_note_text_or_stale(NOTE_URL.replace('2021_11_21', '2021_11_22'))
+
+    def test_client_errors_not_served_stale(self):
+        self.session.request.return_value = _response(200, 'text', {GITLAB_BLOB_ID_HEADER: 'a1', ETAG_HEADER: '"a1"'})
+        GLClient().get_note_text_or_stale(NOTE_URL)
+
+        self.session.request.return_value = _response(404)
+        with self.assertRaises(GitlabError):
+            GLClient().get_note_text_or_stale(NOTE_URL)
+
+    def test_stale_notes_refreshed_after_recovery(self):
+        client._stale_note_urls.add(NOTE_URL)
+        self.session.request.return_value = _response(200, 'new', {GITLAB_BLOB_ID_HEADER: 'b2'})
+        client._refresh_stale_notes()
+
+        self.assertEqual(client._stale_note_urls, set())
+        self.assertEqual(client._get_last_note_text(NOTE_URL), 'new')
@@ -0,0 +1,67 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import TestCase, mock
+
+from gitlab_client import session
+from gitlab_client.circuit_breaker import CircuitBreaker, OPEN
+from gitlab_client.session import get_session
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive
+
+    def do_GET(self):
+        server = self.server
+        server.requests += 1
+        server.connections.add(self.client_address)
+        status = server.statuses.pop(0) if server.statuses else 200
+
+        body = b'ok'
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestSession(TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self.server.requests = 0
+        self.server.connections = set()
+        self.server.statuses = list()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}/api/v4/projects/'
+        for name, value in (('_adapters', dict()), ('breaker', CircuitBreaker(10, 60))):
+            patcher = mock.patch.object(session, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        session._local.sessions = dict()
+
+    def test_keep_alive(self):
+        for _ in range(3):
+            self.assertEqual(get_session(self.url).get(self.url, timeout=2).text, 'ok')
+        self.assertEqual(self.server.requests, 3)
+        self.assertEqual(len(self.server.connections), 1)
+
+    def test_retry_on_5xx(self):
+        self.server.statuses = [503, 502]
+        with mock.patch.object(session, 'GITLAB_RETRY_BACKOFF', 0):
+            resp = get_session(self.url).get(self.url, timeout=2)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(self.server.requests, 3)
+        self.assertEqual(session.breaker._failures, 2)
+
+    def test_no_retry_after_breaker_opened(self):
+        self.server.statuses = [503, 503, 503]
+        with mock.patch.object(session, 'breaker', CircuitBreaker(2, 60)), \
+                mock.patch.object(session, 'GITLAB_RETRY_BACKOFF', 0):
+            resp = get_session(self.url).get(self.url, timeout=2)
+            self.assertEqual(resp.status_code, 503)
+            self.assertEqual(session.breaker.state, OPEN)
+        self.assertEqual(self.server.requests, 2)
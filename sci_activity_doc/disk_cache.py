@@ -0,0 +1,99 @@
+"""
+Кеш на диске с адресацией по содержимому и вытеснением давно не использованных файлов (LRU) по суммарному размеру.
+
+Значение хранится в файле <directory>/<первые два символа ключа>/<ключ>. Время последнего использования -
+mtime файла: оно обновляется при каждом чтении, поэтому кеш переживает перезапуск процесса
+и может использоваться несколькими процессами сразу.
+
+Суммарный размер считается обходом папки только при первой записи и при вытеснении, а между ними
+ведется счетчиком в памяти процесса. Записи других процессов счетчик не видит, поэтому размер кеша
+может на время превысить max_size, пока вытеснение не запустится в каком-нибудь из процессов.
+"""
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Optional
+
+
+class DiskCache:
+    # после вытеснения размер кеша не больше этой доли max_size, чтобы следующие записи не вытесняли сразу же
+    EVICT_TO_RATIO = 0.9
+
+    def __init__(self, directory, max_size: int):
+        self.directory = Path(directory)
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._size = None  # суммарный размер файлов по подсчету этого процесса, None - еще не подсчитан
+
+    def _path(self, key: str) -> Path:
+        if not key or os.sep in key or key.startswith('.'):
+            raise ValueError(f'invalid cache key {key!r}')
+        return self.directory / key[:2] / key
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            content = path.read_bytes()
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return content
+
+    def set(self, key: str, content: bytes):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        try:
+            old_size = path.stat().st_size
+        except FileNotFoundError:
+            old_size = 0
+
+        # запись через временный файл, чтобы параллельное чтение не увидело недописанный файл
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        with self._lock:
+            if self._size is not None:
+                self._size += len(content) - old_size
+            need_evict = self._size is None or self._size > self.max_size
+        if need_evict:
+            self.evict()
+
+    def evict(self):
+        """
+        Подсчитывает размер кеша обходом папки и, если он больше max_size, удаляет давно не использованные
+        файлы, пока размер не станет не больше max_size * EVICT_TO_RATIO
+        """
+        with self._lock:
+            files = list()
+            total_size = 0
+            for path in self.directory.glob('*/*'):
+                if path.name.startswith('.'):
+                    continue
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+                total_size += stat.st_size
+
+            if total_size > self.max_size:
+                files.sort()
+                for _, size, path in files:
+                    if total_size <= self.max_size * self.EVICT_TO_RATIO:
+                        break
+                    try:
+                        path.unlink()
+                    except FileNotFoundError:
+                        pass
+                    total_size -= size
+
+            self._size = total_size
@@ -91,6 +91,20 @@ WSGI_APPLICATION = 'sci_activity_doc.wsgi.application'
 
 # время в секундах, на которое будет закеширован запрос детальной информации по заметке
 NOTE_DETAIL_GET_CACHE_TIME = int(os.environ.get("NOTE_DETAIL_GET_CACHE_TIME", 60 * 20))
+# время в секундах, на которое кешируется укладка графа для отрисовки (ключ кеша - хеш содержимого графа)
+GRAPH_LAYOUT_CACHE_TIME = int(os.environ.get("GRAPH_LAYOUT_CACHE_TIME", 60 * 60 * 24))
+# папка для кеша изображений графов (ключ - хеш содержимого графа)
+GRAPH_RENDER_CACHE_DIR = os.environ.get("GRAPH_RENDER_CACHE_DIR", str(BASE_DIR / 'cache' / 'graph_render'))
+# максимальный размер кеша изображений графов в байтах, при превышении удаляются давно не запрошенные изображения
+GRAPH_RENDER_CACHE_MAX_SIZE = int(os.environ.get("GRAPH_RENDER_CACHE_MAX_SIZE", 256 * 1024 * 1024))
+# ограничение времени в секундах на отрисовку графа программой dot
+GRAPH_RENDER_TIMEOUT = int(os.environ.get("GRAPH_RENDER_TIMEOUT", 10))
+# сколько процессов dot может работать одновременно
+GRAPH_RENDER_CONCURRENCY = int(os.environ.get("GRAPH_RENDER_CONCURRENCY", 2))
+# путь к программе dot из Graphviz
+GRAPH_RENDER_DOT_BINARY = os.environ.get("GRAPH_RENDER_DOT_BINARY", "dot")
+# раз в сколько версий графа сохраняется полный текст графа, между ними хранятся только изменения
+GRAPH_VERSION_SNAPSHOT_INTERVAL = int(os.environ.get("GRAPH_VERSION_SNAPSHOT_INTERVAL", 20))
 # если включено, то текст заметок будет преобразовываться в html
 REMAKE_LATEX2HTML_ENABLE = bool(os.environ.get("REMAKE_LATEX2HTML_ENABLE", True))
 
@@ -98,6 +112,25 @@ GITLAB_API_ADDRESS = os.environ.get("GITLAB_API_ADDRESS")
 GITLAB_ACCESS_TOKEN = os.environ.get("GITLAB_ACCESS_TOKEN")
 GITLAB_ACCESS_TOKEN_HEADER_KEY = os.environ.get("GITLAB_ACCESS_TOKEN_HEADER_KEY", 'PRIVATE-TOKEN')
 GITLAB_TIMEOUT = float(os.environ.get("GITLAB_TIMEOUT", default=2.))
+# ограничения времени в секундах на установку соединения с гитлабом и на ожидание данных от него
+GITLAB_CONNECT_TIMEOUT = float(os.environ.get("GITLAB_CONNECT_TIMEOUT", GITLAB_TIMEOUT))
+GITLAB_READ_TIMEOUT = float(os.environ.get("GITLAB_READ_TIMEOUT", GITLAB_TIMEOUT))
+# число keep-alive соединений с одним хостом гитлаба, которые держит процесс
+GITLAB_POOL_SIZE = int(os.environ.get("GITLAB_POOL_SIZE", 10))
+# число повторов запроса к гитлабу при ошибках соединения и ответах 5xx
+# и множитель экспоненциальной задержки между ними в секундах
+GITLAB_RETRIES = int(os.environ.get("GITLAB_RETRIES", 2))
+GITLAB_RETRY_BACKOFF = float(os.environ.get("GITLAB_RETRY_BACKOFF", 0.2))
+# папка для скачанных из гитлаба текстов заметок (ключ - репозиторий, путь и айди блоба файла)
+GITLAB_NOTE_STORE_DIR = os.environ.get("GITLAB_NOTE_STORE_DIR", str(BASE_DIR / 'cache' / 'notes'))
+# максимальный размер папки с текстами заметок в байтах, при превышении удаляются давно не запрошенные тексты
+GITLAB_NOTE_STORE_MAX_SIZE = int(os.environ.get("GITLAB_NOTE_STORE_MAX_SIZE", 512 * 1024 * 1024))
+# время в секундах, на которое запоминается успешная проверка токена гитлаба (общая для всех запросов процесса)
+GITLAB_AUTH_CHECK_TTL = float(os.environ.get("GITLAB_AUTH_CHECK_TTL", 60 * 5))
+# после стольких неудачных запросов к гитлабу подряд запросы к нему прекращаются
+# на GITLAB_CIRCUIT_RESET_TIMEOUT секунд, а заметки отдаются из сохраненных ранее текстов
+GITLAB_CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get("GITLAB_CIRCUIT_FAILURE_THRESHOLD", 5))
+GITLAB_CIRCUIT_RESET_TIMEOUT = float(os.environ.get("GITLAB_CIRCUIT_RESET_TIMEOUT", 30))
 
 # Database
 # https://docs.djangoproject.com/en/4.1/ref/settings/#databases
@@ -0,0 +1,51 @@
+import os
+import tempfile
+from unittest import TestCase, mock
+
+from sci_activity_doc.disk_cache import DiskCache
+
+
+class TestDiskCache(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_get_set(self):
+        cache = DiskCache(self.tmp.name, 100)
+        self.assertIsNone(cache.get('abc.svg'))
+
+        cache.set('abc.svg', b'<svg/>')
+        self.assertEqual(cache.get('abc.svg'), b'<svg/>')
+        self.assertTrue(os.path.exists(os.path.join(self.tmp.name, 'ab', 'abc.svg')))
+
+    def test_evicts_least_recently_used(self):
+        cache = DiskCache(self.tmp.name, 25)
+        cache.set('k1', b'1' * 10)
+        cache.set('k2', b'2' * 10)
+        # k1 только что запрошен, поэтому вытесняется k2
+        os.utime(os.path.join(self.tmp.name, 'k2', 'k2'), (1, 1))
+        cache.get('k1')
+        cache.set('k3', b'3' * 10)
+
+        self.assertEqual(cache.get('k1'), b'1' * 10)
+        self.assertIsNone(cache.get('k2'))
+        self.assertEqual(cache.get('k3'), b'3' * 10)
+
+    def test_size_tracked_without_scanning(self):
+        cache = DiskCache(self.tmp.name, 100)
+        cache.set('k1', b'1' * 10)
+        with mock.patch.object(cache, 'evict', wraps=cache.evict) as evict:
+            cache.set('k2', b'2' * 40)
+            cache.set('k2', b'2' * 50)
+            evict.assert_not_called()
+
+            cache.set('k3', b'3' * 50)
+            evict.assert_called_once()
+        self.assertIsNone(cache.get('k1'))
+        self.assertIsNone(cache.get('k2'))
+        self.assertEqual(cache.get('k3'), b'3' * 50)
+
+    def test_invalid_key(self):
+        cache = DiskCache(self.tmp.name, 100)
+        with self.assertRaises(ValueError):
+            cache.get('../etc/passwd')